@@ -37,9 +37,6 @@ country_filter = st.sidebar.multiselect("Select Countries", country_options)
 # New Section to Select Customer ID for Demographics
 customer_id = st.sidebar.number_input("Enter Customer ID for Demographics", min_value=1, step=1)
 
-# Close Filters after fetching data
-filters.close()
-
 kpi_metrics = KPI(date_range=date_range, countries=country_filter)
 
 #--Put this inside a box--
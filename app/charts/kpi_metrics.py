@@ -1,5 +1,7 @@
 import streamlit as st
 from utils.config import Database_Connection
+from utils.date_keys import date_key
+from utils.rollups import rollup_available
 
 class KPI:
     def __init__(self, date_range, countries):
@@ -31,20 +33,32 @@ class KPI:
         }
 
         try:
+            # Every KPI is a sum over days and countries, so the daily rollup answers them when it exists
+            use_rollup = rollup_available(db, "agg_sales_daily_country")
+            country_column = "r.country" if use_rollup else "c.country"
+
             # Total Sales and Total Quantity
-            query = """
-                SELECT 
-                    SUM(f.totalamount) AS total_sales,
-                    SUM(f.quantity) AS total_quantity
-                FROM dw_online_retail.fact_sales f
-                JOIN dw_online_retail.dim_time t ON f.timeid = t.timeid
-                JOIN dw_online_retail.dim_customers c ON f.customerid = c.customerid
-                WHERE t.invoicedate BETWEEN %s AND %s
-            """
-            params = [self.date_range[0], self.date_range[1]]
+            if use_rollup:
+                query = """
+                    SELECT
+                        SUM(r.totalsales) AS total_sales,
+                        CAST(SUM(r.totalquantity) AS BIGINT) AS total_quantity
+                    FROM dw_online_retail.agg_sales_daily_country r
+                    WHERE r.timeid BETWEEN %s AND %s
+                """
+            else:
+                query = """
+                    SELECT 
+                        SUM(f.totalamount) AS total_sales,
+                        SUM(f.quantity) AS total_quantity
+                    FROM dw_online_retail.fact_sales f
+                    JOIN dw_online_retail.dim_customers c ON f.customerid = c.customerid
+                    WHERE f.timeid BETWEEN %s AND %s
+                """
+            params = [date_key(self.date_range[0]), date_key(self.date_range[1])]
 
             if self.countries:
-                query += " AND c.country = ANY(%s)"
+                query += f" AND {country_column} = ANY(%s)"
                 params.append(self.countries)
 
             result = db.execute_query(query, params)
@@ -59,20 +73,26 @@ class KPI:
                 )
 
             # Top Selling Country
-            query = """
-                SELECT c.country, SUM(f.totalamount) AS total_sales
-                FROM dw_online_retail.fact_sales f
-                JOIN dw_online_retail.dim_customers c ON f.customerid = c.customerid
-                JOIN dw_online_retail.dim_time t ON f.timeid = t.timeid
-                WHERE t.invoicedate BETWEEN %s AND %s
-            """
-            params = [self.date_range[0], self.date_range[1]]
+            if use_rollup:
+                query = """
+                    SELECT r.country, SUM(r.totalsales) AS total_sales
+                    FROM dw_online_retail.agg_sales_daily_country r
+                    WHERE r.timeid BETWEEN %s AND %s
+                """
+            else:
+                query = """
+                    SELECT c.country, SUM(f.totalamount) AS total_sales
+                    FROM dw_online_retail.fact_sales f
+                    JOIN dw_online_retail.dim_customers c ON f.customerid = c.customerid
+                    WHERE f.timeid BETWEEN %s AND %s
+                """
+            params = [date_key(self.date_range[0]), date_key(self.date_range[1])]
 
             if self.countries:
-                query += " AND c.country = ANY(%s)"
+                query += f" AND {country_column} = ANY(%s)"
                 params.append(self.countries)
 
-            query += " GROUP BY c.country ORDER BY total_sales DESC LIMIT 1"
+            query += f" GROUP BY {country_column} ORDER BY total_sales DESC LIMIT 1"
             result = db.execute_query(query, params)
             if result:
                 kpis["Top Selling Country"] = result[0]["country"]
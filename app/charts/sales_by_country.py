@@ -2,6 +2,8 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 from utils.config import Database_Connection
+from utils.date_keys import date_key
+from utils.rollups import rollup_available
 
 class SalesByCountry:
     def __init__(self, date_range=None, countries=None):
@@ -10,28 +12,37 @@ class SalesByCountry:
         """
         self.date_range = date_range
         self.countries = countries
-        self.db = Database_Connection()
-        self.db.connect()
 
     def fetch_data(self):
         """
         Fetch sales data by country filtered by date range and selected countries.
         """
-        query = """
-            SELECT c.country, SUM(f.totalamount) AS total_sales
-            FROM dw_online_retail.fact_sales f
-            JOIN dw_online_retail.dim_customers c ON f.customerid = c.customerid
-            JOIN dw_online_retail.dim_time t ON f.timeid = t.timeid
-            WHERE t.invoicedate BETWEEN %s AND %s
-        """
-        params = [self.date_range[0], self.date_range[1]]
+        # Hold a pooled connection only while querying
+        with Database_Connection() as db:
+            if rollup_available(db, "agg_sales_daily_country"):
+                # The daily rollup already holds sales per day and country
+                query = """
+                    SELECT r.country, SUM(r.totalsales) AS total_sales
+                    FROM dw_online_retail.agg_sales_daily_country r
+                    WHERE r.timeid BETWEEN %s AND %s
+                """
+                country_column = "r.country"
+            else:
+                query = """
+                    SELECT c.country, SUM(f.totalamount) AS total_sales
+                    FROM dw_online_retail.fact_sales f
+                    JOIN dw_online_retail.dim_customers c ON f.customerid = c.customerid
+                    WHERE f.timeid BETWEEN %s AND %s
+                """
+                country_column = "c.country"
+            params = [date_key(self.date_range[0]), date_key(self.date_range[1])]
 
-        if self.countries:
-            query += " AND c.country = ANY(%s)"
-            params.append(self.countries)
+            if self.countries:
+                query += f" AND {country_column} = ANY(%s)"
+                params.append(self.countries)
 
-        query += " GROUP BY c.country ORDER BY total_sales DESC;"
-        return pd.DataFrame(self.db.execute_query(query, params))
+            query += f" GROUP BY {country_column} ORDER BY total_sales DESC;"
+            return pd.DataFrame(db.execute_query(query, params))
 
     def render(self):
         """
@@ -43,6 +54,3 @@ class SalesByCountry:
         else:
             fig = px.bar(data, x="country", y="total_sales", title="Sales by Country")
             st.plotly_chart(fig, use_container_width=True)
-
-    def __del__(self):
-        self.db.close()
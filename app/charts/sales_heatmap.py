@@ -2,6 +2,9 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 from utils.config import Database_Connection
+from datetime import timedelta
+from utils.date_keys import date_key
+from utils.rollups import rollup_available
 
 class SalesHeatmap:
     def __init__(self, date_range=None, countries=None):
@@ -10,28 +13,51 @@ class SalesHeatmap:
         """
         self.date_range = date_range
         self.countries = countries
-        self.db = Database_Connection()
-        self.db.connect()
 
     def fetch_data(self):
         """
         Fetch sales data for heatmap, filtered by date range and countries.
         """
-        query = """
-            SELECT t.dayofweek, t.month, SUM(f.totalamount) AS total_sales
-            FROM dw_online_retail.fact_sales f
-            JOIN dw_online_retail.dim_time t ON f.timeid = t.timeid
-            JOIN dw_online_retail.dim_customers c ON f.customerid = c.customerid
-            WHERE t.invoicedate BETWEEN %s AND %s
-        """
-        params = [self.date_range[0], self.date_range[1]]
+        # Hold a pooled connection only while querying
+        with Database_Connection() as db:
+            start, end = self.date_range[0], self.date_range[1]
+            whole_months = start.day == 1 and (end + timedelta(days=1)).day == 1
+
+            if whole_months and rollup_available(db, "agg_sales_monthly_weekday_country"):
+                # A range of whole months is answered by the month x weekday rollup alone
+                query = """
+                    SELECT r.dayofweek, r.month, SUM(r.totalsales) AS total_sales
+                    FROM dw_online_retail.agg_sales_monthly_weekday_country r
+                    WHERE r.monthid BETWEEN %s AND %s
+                """
+                params = [date_key(start) // 100, date_key(end) // 100]
+                country_column, group_columns = "r.country", "r.dayofweek, r.month"
+            elif rollup_available(db, "agg_sales_daily_country"):
+                query = """
+                    SELECT t.dayofweek, t.month, SUM(r.totalsales) AS total_sales
+                    FROM dw_online_retail.agg_sales_daily_country r
+                    JOIN dw_online_retail.dim_time t ON r.timeid = t.timeid
+                    WHERE r.timeid BETWEEN %s AND %s
+                """
+                params = [date_key(start), date_key(end)]
+                country_column, group_columns = "r.country", "t.dayofweek, t.month"
+            else:
+                query = """
+                    SELECT t.dayofweek, t.month, SUM(f.totalamount) AS total_sales
+                    FROM dw_online_retail.fact_sales f
+                    JOIN dw_online_retail.dim_time t ON f.timeid = t.timeid
+                    JOIN dw_online_retail.dim_customers c ON f.customerid = c.customerid
+                    WHERE f.timeid BETWEEN %s AND %s
+                """
+                params = [date_key(start), date_key(end)]
+                country_column, group_columns = "c.country", "t.dayofweek, t.month"
 
-        if self.countries:
-            query += " AND c.country = ANY(%s)"
-            params.append(self.countries)
+            if self.countries:
+                query += f" AND {country_column} = ANY(%s)"
+                params.append(self.countries)
 
-        query += " GROUP BY t.dayofweek, t.month ORDER BY t.month, t.dayofweek;"
-        return pd.DataFrame(self.db.execute_query(query, params))
+            query += f" GROUP BY {group_columns} ORDER BY 2, 1;"
+            return pd.DataFrame(db.execute_query(query, params))
 
     def render(self):
         """
@@ -50,6 +76,3 @@ class SalesHeatmap:
                 title="Sales Heatmap",
             )
             st.plotly_chart(fig, use_container_width=True)
-
-    def __del__(self):
-        self.db.close()
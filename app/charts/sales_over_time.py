@@ -2,6 +2,8 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 from utils.config import Database_Connection
+from utils.date_keys import date_key
+from utils.rollups import rollup_available
 
 class SalesOverTime:
     def __init__(self, date_range=None, countries=None):
@@ -10,28 +12,39 @@ class SalesOverTime:
         """
         self.date_range = date_range
         self.countries = countries
-        self.db = Database_Connection()
-        self.db.connect()
 
     def fetch_data(self):
         """
         Fetch sales data over time, filtered by date range and countries.
         """
-        query = """
-            SELECT t.invoicedate, SUM(f.totalamount) AS total_sales
-            FROM dw_online_retail.fact_sales f
-            JOIN dw_online_retail.dim_time t ON f.timeid = t.timeid
-            JOIN dw_online_retail.dim_customers c ON f.customerid = c.customerid
-            WHERE t.invoicedate BETWEEN %s AND %s
-        """
-        params = [self.date_range[0], self.date_range[1]]
+        # Hold a pooled connection only while querying
+        with Database_Connection() as db:
+            if rollup_available(db, "agg_sales_daily_country"):
+                # The chart is daily, the grain of the rollup
+                query = """
+                    SELECT t.invoicedate, SUM(r.totalsales) AS total_sales
+                    FROM dw_online_retail.agg_sales_daily_country r
+                    JOIN dw_online_retail.dim_time t ON r.timeid = t.timeid
+                    WHERE r.timeid BETWEEN %s AND %s
+                """
+                country_column = "r.country"
+            else:
+                query = """
+                    SELECT t.invoicedate, SUM(f.totalamount) AS total_sales
+                    FROM dw_online_retail.fact_sales f
+                    JOIN dw_online_retail.dim_time t ON f.timeid = t.timeid
+                    JOIN dw_online_retail.dim_customers c ON f.customerid = c.customerid
+                    WHERE f.timeid BETWEEN %s AND %s
+                """
+                country_column = "c.country"
+            params = [date_key(self.date_range[0]), date_key(self.date_range[1])]
 
-        if self.countries:
-            query += " AND c.country = ANY(%s)"
-            params.append(self.countries)
+            if self.countries:
+                query += f" AND {country_column} = ANY(%s)"
+                params.append(self.countries)
 
-        query += " GROUP BY t.invoicedate ORDER BY t.invoicedate;"
-        return pd.DataFrame(self.db.execute_query(query, params))
+            query += " GROUP BY t.invoicedate ORDER BY t.invoicedate;"
+            return pd.DataFrame(db.execute_query(query, params))
 
     def render(self):
         """
@@ -43,6 +56,3 @@ class SalesOverTime:
         else:
             fig = px.line(data, x="invoicedate", y="total_sales", title="Sales Over Time")
             st.plotly_chart(fig, use_container_width=True)
-
-    def __del__(self):
-        self.db.close()
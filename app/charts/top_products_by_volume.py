@@ -2,6 +2,8 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 from utils.config import Database_Connection
+from utils.date_keys import date_key
+from utils.rollups import rollup_available
 
 class TopProductsByVolume:
     def __init__(self, date_range=None, countries=None):
@@ -10,29 +12,37 @@ class TopProductsByVolume:
         """
         self.date_range = date_range
         self.countries = countries
-        self.db = Database_Connection()
-        self.db.connect()
 
     def fetch_data(self):
         """
         Fetch top products by sales volume, filtered by date range and countries.
         """
-        query = """
-            SELECT p.productdescription, SUM(f.quantity) AS total_quantity
-            FROM dw_online_retail.fact_sales f
-            JOIN dw_online_retail.dim_products p ON f.productid = p.productid
-            JOIN dw_online_retail.dim_time t ON f.timeid = t.timeid
-            JOIN dw_online_retail.dim_customers c ON f.customerid = c.customerid
-            WHERE t.invoicedate BETWEEN %s AND %s
-        """
-        params = [self.date_range[0], self.date_range[1]]
+        # Hold a pooled connection only while querying
+        with Database_Connection() as db:
+            params = [date_key(self.date_range[0]), date_key(self.date_range[1])]
 
-        if self.countries:
-            query += " AND c.country = ANY(%s)"
-            params.append(self.countries)
+            # The product rollup has no country, so it only serves unfiltered views
+            if not self.countries and rollup_available(db, "agg_quantity_daily_product"):
+                query = """
+                    SELECT p.productdescription, CAST(SUM(r.totalquantity) AS BIGINT) AS total_quantity
+                    FROM dw_online_retail.agg_quantity_daily_product r
+                    JOIN dw_online_retail.dim_products p ON r.productid = p.productid
+                    WHERE r.timeid BETWEEN %s AND %s
+                """
+            else:
+                query = """
+                    SELECT p.productdescription, SUM(f.quantity) AS total_quantity
+                    FROM dw_online_retail.fact_sales f
+                    JOIN dw_online_retail.dim_products p ON f.productid = p.productid
+                    JOIN dw_online_retail.dim_customers c ON f.customerid = c.customerid
+                    WHERE f.timeid BETWEEN %s AND %s
+                """
+                if self.countries:
+                    query += " AND c.country = ANY(%s)"
+                    params.append(self.countries)
 
-        query += " GROUP BY p.productdescription ORDER BY total_quantity DESC LIMIT 10;"
-        return pd.DataFrame(self.db.execute_query(query, params))
+            query += " GROUP BY p.productdescription ORDER BY total_quantity DESC LIMIT 10;"
+            return pd.DataFrame(db.execute_query(query, params))
 
     def render(self):
         """
@@ -50,6 +60,3 @@ class TopProductsByVolume:
                 labels={"productdescription": "Product Description", "total_quantity": "Total Quantity Sold"},
             )
             st.plotly_chart(fig, use_container_width=True)
-
-    def __del__(self):
-        self.db.close()
@@ -111,15 +111,13 @@ class CustomerDemographics:
         """
         Render the full customer demographic profile with charts.
         """
-        # Keep the connection open until all queries are completed
-        self.db.connect()
-
-        customer_data = self.fetch_customer_data(customer_id)
-        purchase_data = self.fetch_customer_purchases(customer_id)
+        # Hold the connection for both queries only; the plotting below needs no database
+        with self.db:
+            customer_data = self.fetch_customer_data(customer_id)
+            purchase_data = self.fetch_customer_purchases(customer_id)
 
         if customer_data.empty:
             st.warning(f"No demographic data available for Customer with ID: {customer_id}.")
-            self.db.close()  # Close the connection
             return
 
         # Display the demographic data
@@ -158,9 +156,6 @@ class CustomerDemographics:
             fig4 = self.plot_expenditure_trend(purchase_data)
             st.pyplot(fig4)
 
-        # Close the connection after all queries and visualizations are completed
-        self.db.close()
-
 
 if __name__ == "__main__":
     customer_demographics = CustomerDemographics()
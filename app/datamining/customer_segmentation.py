@@ -23,8 +23,6 @@ class CustomerSegmentation:
         Returns:
             pd.DataFrame: Customer data for clustering.
         """
-        db = Database_Connection()
-        db.connect()
         query = """
             SELECT c.customerid, 
                    SUM(f.totalamount) AS total_spent,
@@ -33,8 +31,8 @@ class CustomerSegmentation:
             JOIN dw_online_retail.dim_customers c ON f.customerid = c.customerid
             GROUP BY c.customerid
         """
-        data = db.execute_query(query)
-        db.close()
+        with Database_Connection() as db:
+            data = db.execute_query(query)
 
         return pd.DataFrame(data)
 
@@ -45,8 +43,6 @@ class CustomerSegmentation:
         Returns:
             pd.DataFrame: Top products with their total sales count.
         """
-        db = Database_Connection()
-        db.connect()
         query = """
             SELECT p.productdescription, 
                    COUNT(f.salesid) AS total_purchases
@@ -56,8 +52,8 @@ class CustomerSegmentation:
             ORDER BY total_purchases DESC
             LIMIT 10
         """
-        data = db.execute_query(query)
-        db.close()
+        with Database_Connection() as db:
+            data = db.execute_query(query)
 
         return pd.DataFrame(data)
 
@@ -21,8 +21,6 @@ class SalesForecasting:
         Returns:
             pd.DataFrame: Historical sales data.
         """
-        db = Database_Connection()
-        db.connect()
         query = """
             SELECT t.year, t.month, 
                    SUM(f.totalamount) AS total_sales
@@ -31,8 +29,8 @@ class SalesForecasting:
             GROUP BY t.year, t.month
             ORDER BY t.year, t.month
         """
-        data = db.execute_query(query)
-        db.close()
+        with Database_Connection() as db:
+            data = db.execute_query(query)
 
         return pd.DataFrame(data)
 
@@ -0,0 +1,229 @@
+import os
+import json
+import time
+import argparse
+import statistics
+from datetime import datetime
+from dotenv import load_dotenv
+from sqlalchemy import text
+from utils.engines import get_engine
+
+from benchmarks.generate_online_retail import OnlineRetailGenerator, MAX_ROWS_PER_WORKBOOK
+from etl.etl_process import ETLProcess
+from etl.datawarehouse import SchemaManager
+from providers.insert_tables import InsertTables
+from models.create_tables.create_dim_customers_table import CreateDimCustomersTable
+from models.create_tables.create_dim_products_table import CreateDimProductsTable
+from models.create_tables.create_dim_time_table import CreateDimTimeTable
+from models.create_tables.create_fact_sales_table import CreateFactSalesTable
+from models.create_tables.create_rollup_tables import CreateRollupTables
+from app.charts.kpi_metrics import KPI
+from app.charts.sales_by_country import SalesByCountry
+from app.charts.sales_heatmap import SalesHeatmap
+from app.charts.sales_over_time import SalesOverTime
+from app.charts.top_products_by_volume import TopProductsByVolume
+from app.datamining.customer_demographics import CustomerDemographics
+from app.datamining.customer_segmentation import CustomerSegmentation
+from app.datamining.sales_forecasting import SalesForecasting
+from app.filters.filters import Filters
+
+# Load environment variables
+load_dotenv()
+
+DEFAULT_SCALES = [10_000, 100_000, 1_000_000, 10_000_000, 50_000_000]
+
+class ETLBenchmark:
+    """Time the ETL, the warehouse inserts and the dashboard queries at increasing data volumes.
+
+    Each scale is generated once and cached under work_dir. Scales above one workbook are split
+    into parts that run through ETLProcess and InsertTables one after another, the way monthly
+    exports arrive in production.
+    """
+    def __init__(self, db_uri, work_dir=os.path.join("data", "benchmark"), rows_per_file=MAX_ROWS_PER_WORKBOOK,
+                 query_repeats=3, reset_warehouse=False, etl_options=None, insert_options=None):
+        self.db_uri = db_uri
+        self.engine = get_engine(db_uri)
+        self.work_dir = work_dir
+        self.rows_per_file = rows_per_file
+        self.query_repeats = query_repeats
+        self.reset_warehouse = reset_warehouse
+        self.etl_options = etl_options or {}
+        self.insert_options = insert_options or {}
+        self.results_dir = os.path.join("benchmarks", "results")
+
+    def prepare_warehouse(self):
+        """Create the schema and the warehouse tables, emptying them first when reset_warehouse is set."""
+        SchemaManager().create_schema()
+        CreateDimCustomersTable(self.db_uri).create_table()
+        CreateDimProductsTable(self.engine).create_table()
+        CreateDimTimeTable(self.db_uri).create_table()
+        CreateFactSalesTable(self.db_uri).create_table()
+        CreateRollupTables(self.db_uri).create_tables()
+
+        if self.reset_warehouse:
+            with self.engine.connect() as connection:
+                connection.execute(text("""
+                    TRUNCATE dw_online_retail.fact_sales, dw_online_retail.dim_time,
+                             dw_online_retail.dim_customers, dw_online_retail.dim_products,
+                             dw_online_retail.load_batches, dw_online_retail.fact_load_checkpoints,
+                             dw_online_retail.agg_sales_daily_country,
+                             dw_online_retail.agg_quantity_daily_product,
+                             dw_online_retail.agg_sales_monthly_weekday_country
+                    RESTART IDENTITY CASCADE;
+                """))
+                connection.execute(text("COMMIT;"))
+
+    def generate(self, rows):
+        """Generate (or reuse) the raw workbooks for a scale and return their part directories."""
+        scale_dir = os.path.join(self.work_dir, str(rows))
+        n_parts = max(1, -(-rows // self.rows_per_file))
+
+        part_dirs = []
+        for index in range(n_parts):
+            part_dir = os.path.join(scale_dir, f"part{index + 1:02d}")
+            raw_file = os.path.join(part_dir, "raw", "online_retail.xlsx")
+            part_rows = min(self.rows_per_file, rows - index * self.rows_per_file)
+
+            # Every part is named online_retail.xlsx so it lands in stg_online_retail_cleaned
+            if not os.path.isfile(raw_file):
+                os.makedirs(os.path.dirname(raw_file), exist_ok=True)
+                OnlineRetailGenerator(part=index).write_workbook(part_rows, raw_file)
+            part_dirs.append(part_dir)
+        return part_dirs
+
+    def sample_customer(self):
+        """Return a random CustomerID for the customer queries, or None if no customer is loaded."""
+        with self.engine.connect() as connection:
+            return connection.execute(text(
+                "SELECT CustomerID FROM dw_online_retail.dim_customers ORDER BY random() LIMIT 1;"
+            )).scalar()
+
+    def time_queries(self):
+        """Time every dashboard query over the full date range, keeping the best and median of the repeats."""
+        filters = Filters()
+        min_date, max_date = filters.get_date_range()
+        date_range = (min_date, max_date)
+        # One customer for every repeat, so the repeats time the same query
+        customer_id = self.sample_customer()
+        demographics = CustomerDemographics()
+
+        queries = {
+            "filters.country_options": filters.get_country_filter_options,
+            "filters.date_range": filters.get_date_range,
+            "kpi_metrics": KPI(date_range=date_range, countries=[]).fetch_data,
+            "sales_by_country": SalesByCountry(date_range=date_range, countries=[]).fetch_data,
+            "sales_heatmap": SalesHeatmap(date_range=date_range, countries=[]).fetch_data,
+            "sales_over_time": SalesOverTime(date_range=date_range, countries=[]).fetch_data,
+            "top_products_by_volume": TopProductsByVolume(date_range=date_range, countries=[]).fetch_data,
+            "customer_segmentation": CustomerSegmentation().fetch_data,
+            "sales_forecasting": SalesForecasting().fetch_data,
+        }
+        if customer_id is not None:
+            queries["customer_demographics.customer_data"] = lambda: demographics.fetch_customer_data(customer_id)
+            queries["customer_demographics.purchases"] = lambda: demographics.fetch_customer_purchases(customer_id)
+
+        timings = {}
+        with demographics.db:
+            for name, query in queries.items():
+                samples = []
+                for _ in range(self.query_repeats):
+                    start = time.perf_counter()
+                    query()
+                    samples.append(time.perf_counter() - start)
+                timings[name] = {"best": min(samples), "median": statistics.median(samples)}
+                print(f"  {name}: {timings[name]['best']:.3f}s")
+        return timings
+
+    def run_scale(self, rows):
+        """Run the full pipeline for one scale and return its timings."""
+        print(f"\n=== Benchmarking {rows:,} rows ===")
+        part_dirs = self.generate(rows)
+        self.prepare_warehouse()
+
+        result = {"rows": rows, "parts": len(part_dirs), "etl": 0.0, "inserts": 0.0, "stages": {}}
+        for part_dir in part_dirs:
+            etl = ETLProcess(
+                input_dir=os.path.join(part_dir, "raw"),
+                output_dir=os.path.join(part_dir, "cleaned"),
+                full_refresh=True,
+                **self.etl_options,
+            )
+            start = time.perf_counter()
+            etl.run()
+            result["etl"] += time.perf_counter() - start
+
+            inserter = InsertTables(**self.insert_options)
+            start = time.perf_counter()
+            inserter.insert_all()
+            result["inserts"] += time.perf_counter() - start
+
+            # Sum the per-stage metrics of every part
+            for report in (etl.report, inserter.report):
+                for stage, metrics in report.stage_dicts().items():
+                    totals = result["stages"].setdefault(stage, {"wall_time": 0.0, "rows_out": 0})
+                    totals["wall_time"] += metrics["wall_time"]
+                    totals["rows_out"] += metrics["rows_out"]
+
+        print(f"ETL: {result['etl']:.2f}s, inserts: {result['inserts']:.2f}s")
+        result["queries"] = self.time_queries()
+        return result
+
+    def run(self, scales):
+        """Benchmark each scale in turn and write the results as JSON."""
+        results = []
+        for rows in scales:
+            try:
+                results.append(self.run_scale(rows))
+            except Exception as e:
+                # Record where it broke and carry on with the summary
+                print(f"Benchmark failed at {rows:,} rows: {str(e)}")
+                results.append({"rows": rows, "error": str(e)})
+                break
+
+        os.makedirs(self.results_dir, exist_ok=True)
+        results_file = os.path.join(self.results_dir, f"benchmark_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+        with open(results_file, "w") as f:
+            json.dump(results, f, indent=2)
+
+        self.print_summary(results)
+        print(f"\nResults written to: {results_file}")
+        return results
+
+    def print_summary(self, results):
+        """Print one line per scale with the ETL, insert and slowest query times."""
+        print(f"\n{'rows':>12} {'etl (s)':>10} {'inserts (s)':>12} {'slowest query':>28}")
+        for result in results:
+            if "error" in result:
+                print(f"{result['rows']:>12,} failed: {result['error']}")
+                continue
+            slowest = max(result["queries"].items(), key=lambda item: item[1]["best"])
+            print(f"{result['rows']:>12,} {result['etl']:>10.2f} {result['inserts']:>12.2f} "
+                  f"{slowest[0]:>20} {slowest[1]['best']:>6.3f}s")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the ETL and dashboard queries against a local PostgreSQL.")
+    parser.add_argument("--scales", type=int, nargs="+", default=DEFAULT_SCALES,
+                        help="Row counts to benchmark (default: 10k 100k 1M 10M 50M).")
+    parser.add_argument("--rows-per-file", type=int, default=MAX_ROWS_PER_WORKBOOK,
+                        help="Rows per generated workbook; larger scales are split into parts.")
+    parser.add_argument("--repeats", type=int, default=3, help="Runs per dashboard query (default: 3).")
+    parser.add_argument("--reset-warehouse", action="store_true",
+                        help="Truncate the warehouse tables before each scale. Only use on a disposable database.")
+    parser.add_argument("--streaming", action="store_true", help="Run the ETL in streaming mode.")
+    parser.add_argument("--concurrent-inserts", action="store_true", help="Load the dimensions in parallel.")
+    parser.add_argument("--chunk-rows", type=int, default=None, help="Insert the facts in checkpointed chunks of ~N rows.")
+    args = parser.parse_args()
+
+    db_uri = os.getenv("DATABASE_URL")
+    if not db_uri:
+        print("DATABASE_URL is not set in the .env file")
+    else:
+        benchmark = ETLBenchmark(
+            db_uri,
+            rows_per_file=args.rows_per_file,
+            query_repeats=args.repeats,
+            reset_warehouse=args.reset_warehouse,
+            etl_options={"streaming": args.streaming},
+            insert_options={"concurrent": args.concurrent_inserts, "chunk_rows": args.chunk_rows},
+        )
+        benchmark.run(args.scales)
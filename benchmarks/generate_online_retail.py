@@ -0,0 +1,186 @@
+import os
+import argparse
+import numpy as np
+import pandas as pd
+from openpyxl import Workbook
+
+# Excel caps a worksheet at 1,048,576 rows including the header
+MAX_ROWS_PER_WORKBOOK = 1_048_575
+
+COLUMNS = ["InvoiceNo", "StockCode", "Description", "Quantity", "InvoiceDate", "UnitPrice", "CustomerID", "Country"]
+
+# Share of customers per country, heavily skewed towards the UK as in the original dataset
+COUNTRIES = {
+    "United Kingdom": 0.89,
+    "Germany": 0.022,
+    "France": 0.02,
+    "EIRE": 0.018,
+    "Spain": 0.0075,
+    "Netherlands": 0.0065,
+    "Belgium": 0.0055,
+    "Switzerland": 0.0055,
+    "Portugal": 0.0045,
+    "Australia": 0.0035,
+    "Norway": 0.003,
+    "Italy": 0.003,
+    "Channel Islands": 0.0025,
+    "Finland": 0.0025,
+    "Japan": 0.002,
+}
+
+# Typical pack sizes; small quantities dominate with a long tail of wholesale orders
+QUANTITIES = np.array([1, 2, 3, 4, 6, 8, 10, 12, 24, 36, 48, 72, 96, 144, 480])
+QUANTITY_WEIGHTS = np.array([22, 14, 6, 8, 10, 3, 5, 16, 7, 1.5, 2.5, 1, 1.5, 1.2, 0.3])
+
+# Relative sales volume per month (January first) and per weekday (Monday first, no Saturday trading)
+MONTH_WEIGHTS = np.array([0.7, 0.65, 0.85, 0.75, 0.9, 0.85, 0.85, 0.85, 1.2, 1.3, 1.6, 1.0])
+WEEKDAY_WEIGHTS = np.array([1.0, 1.2, 1.2, 1.4, 1.0, 0.0, 0.8])
+
+ADJECTIVES = ["WHITE", "RED", "PINK", "BLUE", "VINTAGE", "REGENCY", "JUMBO", "SMALL", "LARGE", "RETRO",
+              "PAPER", "WOODEN", "GLASS", "HEART", "STAR", "FLORAL", "SPOTTY", "CHRISTMAS", "PARTY", "LUNCH"]
+NOUNS = ["T-LIGHT HOLDER", "LANTERN", "BAG", "MUG", "CAKE CASES", "BUNTING", "DOORMAT", "CLOCK",
+         "NAPKINS", "TEACUP AND SAUCER", "BOTTLE", "CANDLE", "BOX", "SIGN", "ALARM CLOCK", "CHALKBOARD"]
+
+class OnlineRetailGenerator:
+    """Generate Online Retail-shaped data with realistic skew.
+
+    Product and customer popularity follow Zipf-like distributions, countries are dominated by
+    the UK, sales are seasonal, and the raw data carries the same defects the ETL cleans up:
+    missing CustomerIDs and descriptions, cancelled invoices with negative quantities and
+    zero-priced lines.
+
+    The product and customer catalogs depend only on seed; part selects an independent stream of
+    invoices over the same catalogs, so parts can be generated separately without repeating rows.
+    """
+    def __init__(self, seed=42, part=0, n_products=4000, n_customers=4400, start_date="2010-12-01", days=373,
+                 lines_per_invoice=20):
+        self.rng = np.random.default_rng(seed)
+        self.lines_per_invoice = lines_per_invoice
+        self.next_invoice = 536365 + part * 1_000_000
+
+        # Products: code, description and a list price, drawn once
+        codes = self.rng.choice(np.arange(10000, 90000), size=n_products, replace=False)
+        suffixes = self.rng.choice(["", "", "", "A", "B", "C", "L"], size=n_products)
+        self.stock_codes = np.array([f"{code}{suffix}" for code, suffix in zip(codes, suffixes)])
+        self.descriptions = np.array([
+            f"{adjective} {noun}"
+            for adjective, noun in zip(self.rng.choice(ADJECTIVES, n_products), self.rng.choice(NOUNS, n_products))
+        ])
+        self.prices = np.round(self.rng.lognormal(mean=0.9, sigma=0.8, size=n_products), 2).clip(0.1, 650)
+        self.product_weights = self._zipf_weights(n_products, 0.7)
+
+        # Customers: an ID and a home country each
+        self.customer_ids = self.rng.choice(np.arange(12346, 12346 + n_customers * 2), size=n_customers, replace=False)
+        self.customer_countries = self.rng.choice(
+            list(COUNTRIES), size=n_customers, p=np.array(list(COUNTRIES.values())) / sum(COUNTRIES.values())
+        )
+        self.customer_weights = self._zipf_weights(n_customers, 0.8)
+
+        # Trading days, weighted by month and weekday
+        self.days = pd.date_range(start_date, periods=days, freq="D")
+        day_weights = MONTH_WEIGHTS[self.days.month - 1] * WEEKDAY_WEIGHTS[self.days.dayofweek]
+        self.day_weights = day_weights / day_weights.sum()
+
+        # Invoices are drawn from a stream of their own
+        self.rng = np.random.default_rng([seed, part])
+
+    def _zipf_weights(self, n, exponent):
+        """Return normalized popularity weights for n items, shuffled so popularity is not ordered by ID."""
+        weights = 1.0 / np.arange(1, n + 1) ** exponent
+        self.rng.shuffle(weights)
+        return weights / weights.sum()
+
+    def generate(self, rows):
+        """Return a DataFrame of rows raw invoice lines."""
+        rng = self.rng
+
+        # Split the rows into invoices of geometric size; every line of an invoice shares its header
+        sizes = rng.geometric(1.0 / self.lines_per_invoice, size=rows // self.lines_per_invoice + 1)
+        sizes = sizes[:np.searchsorted(np.cumsum(sizes), rows) + 1]
+        sizes[-1] -= sizes.sum() - rows
+        n_invoices = len(sizes)
+
+        invoice_numbers = np.arange(self.next_invoice, self.next_invoice + n_invoices)
+        self.next_invoice += n_invoices
+        cancelled = rng.random(n_invoices) < 0.02
+        invoice_labels = np.where(cancelled, "C", "") + invoice_numbers.astype(str)
+
+        customers = rng.choice(len(self.customer_ids), size=n_invoices, p=self.customer_weights)
+        customer_ids = self.customer_ids[customers].astype("float64")
+        customer_ids[rng.random(n_invoices) < 0.25] = np.nan  # Guest checkouts have no CustomerID
+        countries = self.customer_countries[customers]
+
+        days = self.days[rng.choice(len(self.days), size=n_invoices, p=self.day_weights)]
+        seconds = rng.integers(8 * 3600, 20 * 3600, size=n_invoices) // 60 * 60
+        invoice_dates = days + pd.to_timedelta(seconds, unit="s")
+
+        # Line-level attributes
+        products = rng.choice(len(self.stock_codes), size=rows, p=self.product_weights)
+        quantities = rng.choice(QUANTITIES, size=rows, p=QUANTITY_WEIGHTS / QUANTITY_WEIGHTS.sum())
+        quantities = np.where(np.repeat(cancelled, sizes), -quantities, quantities)
+        prices = self.prices[products]
+        prices = np.where(rng.random(rows) < 0.002, 0.0, prices)  # Samples and adjustments
+        descriptions = self.descriptions[products].astype(object)
+        descriptions[rng.random(rows) < 0.003] = None
+
+        return pd.DataFrame({
+            "InvoiceNo": np.repeat(invoice_labels, sizes),
+            "StockCode": self.stock_codes[products],
+            "Description": descriptions,
+            "Quantity": quantities,
+            "InvoiceDate": np.repeat(invoice_dates.values, sizes),
+            "UnitPrice": prices,
+            "CustomerID": np.repeat(customer_ids, sizes),
+            "Country": np.repeat(countries, sizes),
+        }, columns=COLUMNS)
+
+    def write_workbook(self, rows, output_file, chunk_size=100000):
+        """Write rows generated lines to a single workbook, chunk_size rows at a time."""
+        if rows > MAX_ROWS_PER_WORKBOOK:
+            raise ValueError(f"A workbook holds at most {MAX_ROWS_PER_WORKBOOK} rows, got {rows}")
+
+        # write_only workbooks stream rows to disk, so memory is bounded by chunk_size
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet()
+        sheet.append(COLUMNS)
+        remaining = rows
+        while remaining > 0:
+            chunk = self.generate(min(chunk_size, remaining))
+            chunk["InvoiceDate"] = chunk["InvoiceDate"].dt.to_pydatetime()
+            chunk = chunk.astype(object).where(chunk.notna(), None)
+            for row in chunk.itertuples(index=False, name=None):
+                sheet.append(row)
+            remaining -= len(chunk)
+        workbook.save(output_file)
+        return output_file
+
+    def write(self, rows, output_dir, rows_per_file=MAX_ROWS_PER_WORKBOOK, file_name="online_retail"):
+        """Write rows generated lines as one or more workbooks and return their paths.
+
+        A single workbook is named <file_name>.xlsx; larger scales are split into
+        <file_name>_partNN.xlsx files of at most rows_per_file rows.
+        """
+        os.makedirs(output_dir, exist_ok=True)
+        rows_per_file = min(rows_per_file, MAX_ROWS_PER_WORKBOOK)
+        n_files = max(1, -(-rows // rows_per_file))
+
+        files = []
+        for index in range(n_files):
+            file_rows = min(rows_per_file, rows - index * rows_per_file)
+            name = file_name if n_files == 1 else f"{file_name}_part{index + 1:02d}"
+            files.append(self.write_workbook(file_rows, os.path.join(output_dir, f"{name}.xlsx")))
+            print(f"Generated {file_rows} rows in {files[-1]}")
+        return files
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate synthetic Online Retail workbooks.")
+    parser.add_argument("rows", type=int, help="Number of invoice lines to generate.")
+    parser.add_argument("--output-dir", default=os.path.join("data", "raw"),
+                        help="Directory for the generated workbooks (default: data/raw).")
+    parser.add_argument("--rows-per-file", type=int, default=MAX_ROWS_PER_WORKBOOK,
+                        help="Split the output into workbooks of at most this many rows.")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed (default: 42).")
+    args = parser.parse_args()
+
+    generator = OnlineRetailGenerator(seed=args.seed)
+    generator.write(args.rows, args.output_dir, rows_per_file=args.rows_per_file)
@@ -0,0 +1,129 @@
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+
+# Column types of the cleaned layer, the Parquet handoff between transform and load
+CLEANED_SCHEMA = pa.schema([
+    ("InvoiceNo", pa.string()),
+    ("InvoiceLine", pa.int32()),
+    ("StockCode", pa.string()),
+    ("Description", pa.string()),
+    ("Quantity", pa.int64()),
+    ("InvoiceDate", pa.timestamp("us")),
+    ("UnitPrice", pa.float64()),
+    ("CustomerID", pa.int64()),
+    ("Country", pa.string()),
+    ("RowHash", pa.int64()),
+])
+
+# PostgreSQL types of the staging columns, matching CLEANED_SCHEMA
+STAGING_COLUMNS = {
+    "InvoiceNo": "TEXT",
+    "InvoiceLine": "INTEGER",
+    "StockCode": "TEXT",
+    "Description": "TEXT",
+    "Quantity": "BIGINT",
+    "InvoiceDate": "TIMESTAMP",
+    "UnitPrice": "DOUBLE PRECISION",
+    "CustomerID": "BIGINT",
+    "Country": "TEXT",
+    "RowHash": "BIGINT",
+}
+
+# Source columns that make up a row's content hash. InvoiceLine is left out: it is derived from
+# the row's position, so the same row in an overlapping export would otherwise hash differently.
+HASHED_COLUMNS = ["InvoiceNo", "StockCode", "Description", "Quantity", "InvoiceDate", "UnitPrice", "CustomerID", "Country"]
+
+# Types of the cleaned-layer columns as pandas dtypes
+CLEANED_DTYPES = {
+    "InvoiceNo": str,
+    "InvoiceLine": "int32",
+    "StockCode": str,
+    "Description": str,
+    "Quantity": "int64",
+    "InvoiceDate": "datetime64[us]",
+    "UnitPrice": "float64",
+    "CustomerID": "int64",
+    "Country": str,
+    "RowHash": "int64",
+}
+
+PARQUET_COMPRESSION = "zstd"
+
+class RowOccurrences:
+    """Number the repeats of identical rows across the chunks of one file.
+
+    Keeps a count per distinct content hash seen so far, in a Series rather than a dict so a
+    streamed file costs a few bytes per row.
+    """
+    def __init__(self):
+        self.counts = pd.Series(dtype="int64")
+
+    def number(self, hashes):
+        """Return how many identical rows came before each row, in this chunk and the earlier ones."""
+        occurrences = hashes.groupby(hashes, sort=False).cumcount()
+        if len(self.counts):
+            occurrences += hashes.map(self.counts).fillna(0).astype("int64")
+        self.counts = self.counts.add(hashes.value_counts(sort=False), fill_value=0).astype("int64")
+        return occurrences
+
+def row_hashes(df, occurrences=None):
+    """Return a signed 64-bit hash of each row's HASHED_COLUMNS and its occurrence, stable across files and runs.
+
+    The columns are cast to their cleaned-layer types first, so the same row hashes the same
+    whether it was read with pandas or streamed through openpyxl. Identical lines of one invoice
+    are separate sales, so each repeat also hashes its occurrence number among them: repeats
+    within a file stay apart, while the same rows in an overlapping export collide. For a file
+    read in chunks, occurrences (a RowOccurrences) carries the numbering across chunks.
+    """
+    content = df[HASHED_COLUMNS].astype({column: CLEANED_DTYPES[column] for column in HASHED_COLUMNS})
+    hashes = pd.util.hash_pandas_object(content, index=False)
+    if occurrences is None:
+        occurrence = hashes.groupby(hashes, sort=False).cumcount()
+    else:
+        occurrence = occurrences.number(hashes)
+    # The first occurrence keeps the plain content hash, matching rows loaded before repeats were numbered
+    numbered = pd.util.hash_pandas_object(pd.DataFrame({"content": hashes, "occurrence": occurrence}), index=False)
+    hashes = hashes.where(occurrence.eq(0), numbered)
+    # PostgreSQL has no unsigned BIGINT, so the bits are reinterpreted as int64
+    return pd.Series(hashes.to_numpy(dtype="uint64").view("int64"), index=df.index)
+
+def to_arrow(df):
+    """Convert a cleaned DataFrame into an Arrow table with the cleaned-layer column types."""
+    df = df[CLEANED_SCHEMA.names].astype(CLEANED_DTYPES)
+    return pa.Table.from_pandas(df, schema=CLEANED_SCHEMA, preserve_index=False)
+
+def parquet_writer(output_file):
+    """Open a Parquet writer for the cleaned layer."""
+    return pq.ParquetWriter(output_file, CLEANED_SCHEMA, compression=PARQUET_COMPRESSION)
+
+class ParquetCsvStream:
+    """Read-only file object that renders a Parquet file as headerless CSV, one record batch at a time.
+
+    Passing it to COPY ... FROM STDIN streams the file without materializing it in memory.
+    An optional transform maps each record batch to the Arrow table or batch that is written.
+    """
+    def __init__(self, parquet_file, batch_size=50000, transform=None):
+        self._batches = pq.ParquetFile(parquet_file).iter_batches(batch_size=batch_size)
+        self._transform = transform
+        self._buffer = memoryview(b"")
+        self.rows = 0
+
+    def read(self, size=-1):
+        """Return up to size bytes of CSV; an empty result marks the end of the file."""
+        while not self._buffer:
+            batch = next(self._batches, None)
+            if batch is None:
+                return b""
+            if self._transform is not None:
+                batch = self._transform(batch)
+            sink = pa.BufferOutputStream()
+            pa_csv.write_csv(batch, sink, pa_csv.WriteOptions(include_header=False))
+            self._buffer = memoryview(sink.getvalue().to_pybytes())
+            self.rows += batch.num_rows
+
+        if size is None or size < 0:
+            size = len(self._buffer)
+        data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data.tobytes()
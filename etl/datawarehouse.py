@@ -1,4 +1,5 @@
-from sqlalchemy import create_engine, text
+from sqlalchemy import text
+from utils.engines import get_engine
 import os
 from dotenv import load_dotenv
 
@@ -13,7 +14,7 @@ class SchemaManager:
         if not self.db_uri:
             raise ValueError("DATABASE_URL is not set in the .env file")
 
-        self.engine = create_engine(self.db_uri)
+        self.engine = get_engine(self.db_uri)
 
     def check_connection(self):
         """Test the connection to the database."""
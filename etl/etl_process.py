@@ -1,37 +1,107 @@
 import os
+import time
+import argparse
 import pandas as pd
-from sqlalchemy import create_engine, text
+import pyarrow.parquet as pq
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from openpyxl import Workbook, load_workbook
 from utils.config import Database_Connection
 from etl.datawarehouse import SchemaManager  # Import SchemaManager to manage schema creation
+from etl.manifest import IngestionManifest
+from etl.cleaned_layer import STAGING_COLUMNS, ParquetCsvStream, RowOccurrences, parquet_writer, row_hashes, to_arrow
+from etl.staging import StagingTableManager
+from etl.metrics import BufferedLogger, RunReport
+from etl.profiler import DataProfile
+from etl.validation import QuarantineWriter, validate
+from etl.key_maps import FACT_COLUMNS, MEMBER_COLUMNS, DimensionKeyMaps
+from models.create_tables.manage_partitions import PartitionManager
+from models.create_tables.create_data_profiles_table import CreateDataProfilesTable
+from models.create_tables.create_load_batches_table import CreateLoadBatchesTable
+from models.insert_tables.refresh_rollups import RefreshRollups
+from utils.date_keys import date_key
+
+def transform_file(file_path, streaming, chunk_size, export_xlsx, export_csv, input_dir, output_dir):
+    """Transform a single file inside a worker process, without opening a database connection.
+
+    Returns the cleaned file together with the worker's stage metrics.
+    """
+    etl = ETLProcess(streaming=streaming, chunk_size=chunk_size, export_xlsx=export_xlsx,
+                     export_csv=export_csv, input_dir=input_dir, output_dir=output_dir, connect=False)
+    try:
+        return etl.transform(file_path), etl.report.stage_dicts()
+    finally:
+        etl.logger.close()  # Worker processes exit without running atexit hooks
 
 class ETLProcess:
-    def __init__(self):
+    def __init__(self, streaming=False, chunk_size=50000, parallel=False, workers=None,
+                 load_concurrency=2, full_refresh=False, export_xlsx=False, export_csv=False,
+                 input_dir=os.path.join("data", "raw"), output_dir=os.path.join("data", "cleaned"),
+                 direct_facts=False, connect=True):
         # Initialize the database connection and directories
-        self.db_connection = Database_Connection()
-        self.db_connection.connect()  # Establish the database connection
-        self.input_dir = os.path.join("data", "raw")
-        self.output_dir = os.path.join("data", "cleaned")
+        self.db_connection = None
+        self.schema_manager = None
+        if connect:
+            self.db_connection = Database_Connection()
+            self.db_connection.connect()  # Establish the database connection
+        self.input_dir = input_dir
+        self.output_dir = output_dir
         self.log_file = os.path.join("etl", "etl_log.log")
+        self.report_dir = os.path.join("etl", "reports")
+
+        # Log lines are buffered on one open handle; per-stage metrics end up in a JSON run report
+        self.logger = BufferedLogger(self.log_file)
+        self.report = RunReport("etl_run")
+
+        # The manifest remembers ingested files so unchanged ones are skipped unless full_refresh is set
+        self.manifest = IngestionManifest(
+            os.path.join(os.path.dirname(self.input_dir), "ingestion_manifest.json")
+        )
+        self.full_refresh = full_refresh
+
+        # Streaming mode reads and cleans the raw workbook chunk_size rows at a time
+        self.streaming = streaming
+        self.chunk_size = chunk_size
+
+        # Cleaned data is handed from transform to load as Parquet; Excel and CSV copies are optional exports
+        self.export_xlsx = export_xlsx
+        self.export_csv = export_csv
+
+        # Parallel mode transforms files in a process pool (workers=None uses every core)
+        # and loads at most load_concurrency files at once
+        self.parallel = parallel
+        self.workers = workers
+        self.load_concurrency = load_concurrency
+
+        # Direct fact loading keys rows against client-side dimension maps and COPYs them into
+        # fact_sales, instead of loading staging for InsertTables to join server-side
+        self.direct_facts = direct_facts
+        self.key_maps = None
+        self.partition_manager = None
+        self.rollups = None
 
         # Ensure output directory exists
         os.makedirs(self.output_dir, exist_ok=True)
 
         # Initialize SchemaManager to handle schema creation
-        self.schema_manager = SchemaManager()
+        if connect:
+            self.schema_manager = SchemaManager()
 
     def log(self, message):
         """Write a log message to the log file."""
-        with open(self.log_file, "a") as log_file:
-            log_file.write(f"{message}\n")
+        self.logger.write(message)
         print(message)
 
     def create_schema(self):
         """Call SchemaManager to create the schema in the database."""
         self.log("Starting schema creation...")
         try:
-            # Use SchemaManager for schema creation and connection checks
-            self.schema_manager.check_connection()  # Ensure connection is valid
-            self.schema_manager.create_schema()  # Create the schema if necessary
+            with self.report.stage("schema_check"):
+                # Use SchemaManager for schema creation and connection checks
+                self.schema_manager.check_connection()  # Ensure connection is valid
+                self.schema_manager.create_schema()  # Create the schema if necessary
+                CreateDataProfilesTable(self.schema_manager.db_uri, engine=self.schema_manager.engine).create_table()
+                # Direct fact loads open a load batch
+                CreateLoadBatchesTable(self.schema_manager.db_uri).create_table()
             self.log("Schema created successfully (or already exists).")
         except Exception as e:
             self.log(f"Error creating schema: {str(e)}")
@@ -42,73 +112,423 @@ class ETLProcess:
         self.log("Starting data extraction...")
         files = []
         try:
-            for filename in os.listdir(self.input_dir):
-                if filename.endswith(".xlsx"):
-                    file_path = os.path.join(self.input_dir, filename)
-                    if os.path.isfile(file_path):
-                        files.append(file_path)
+            with self.report.stage("extract") as metrics:
+                for filename in os.listdir(self.input_dir):
+                    if filename.endswith(".xlsx"):
+                        file_path = os.path.join(self.input_dir, filename)
+                        if os.path.isfile(file_path):
+                            files.append(file_path)
+                metrics.rows_out = len(files)
             self.log(f"Found {len(files)} files for extraction.")
         except Exception as e:
             self.log(f"Extraction error: {str(e)}")
             raise
         return files
 
+    def select_changed(self, files):
+        """Keep only the files that are new or modified since they were last ingested."""
+        if self.full_refresh:
+            self.log(f"Full refresh requested: processing all {len(files)} files.")
+            return files
+
+        changed = [file_path for file_path in files if self.manifest.is_changed(file_path)]
+        self.manifest.save()
+        self.log(f"{len(changed)} new or modified files, skipping {len(files) - len(changed)} unchanged files.")
+        return changed
+
+    def number_lines(self, df, line_offsets=None):
+        """Number each raw row within its invoice, giving every line a stable (InvoiceNo, InvoiceLine) key.
+
+        Lines are numbered before cleaning so the key does not shift when other rows are dropped.
+        For chunked reads, line_offsets carries the last line number seen per invoice across chunks.
+        """
+        invoice_numbers = df['InvoiceNo']
+        lines = invoice_numbers.groupby(invoice_numbers, sort=False, dropna=False).cumcount() + 1
+        if line_offsets is not None:
+            lines += invoice_numbers.map(line_offsets).fillna(0).astype("int64")
+            line_offsets.update(lines.groupby(invoice_numbers, sort=False).max().to_dict())
+        df['InvoiceLine'] = lines
+        return df
+
+    def clean(self, df, metrics=None, quarantine=None, occurrences=None):
+        """Apply the validation rules to a frame of raw rows, counting the rows each rule rejects.
+
+        Rejected rows and their reason codes are appended to quarantine (a QuarantineWriter) if given.
+        For chunked reads, occurrences numbers identical rows across chunks (see row_hashes).
+        """
+        df, rejected, counts = validate(df)
+        if metrics is not None:
+            for code, rows in counts.items():
+                metrics.drop(code, rows)
+        if quarantine is not None:
+            quarantine.write(rejected)
+
+        # Escape single quotes in text
+        df['Description'] = df['Description'].apply(
+            lambda x: x.replace("'", "''") if isinstance(x, str) else x
+        )
+
+        # Rows repeated by an overlapping export get the same content hash and are skipped by the
+        # unique RowHash key of fact_sales; identical lines within the file are numbered apart
+        return df.assign(RowHash=row_hashes(df, occurrences))
+
+    def output_paths(self, file_path):
+        """Return the cleaned Parquet, Excel and CSV paths for a raw file."""
+        base_name = os.path.splitext(os.path.basename(file_path))[0]
+        output_parquet = os.path.join(self.output_dir, f"{base_name}_cleaned.parquet")
+        output_xlsx = os.path.join(self.output_dir, f"{base_name}_cleaned.xlsx")
+        output_csv = os.path.join(self.output_dir, f"{base_name}_cleaned.csv")
+        return output_parquet, output_xlsx, output_csv
+
+    def quarantine_path(self, file_path):
+        """Return the Parquet file receiving the rejected rows of a raw file."""
+        base_name = os.path.splitext(os.path.basename(file_path))[0]
+        return os.path.join(self.output_dir, f"{base_name}_quarantine.parquet")
+
+    def profile_path(self, cleaned_file):
+        """Return the JSON sidecar holding the profile of a cleaned file's raw rows."""
+        return f"{os.path.splitext(cleaned_file)[0]}.profile.json"
+
     def transform(self, file_path):
-        """Clean and transform the data from the given file."""
+        """Clean and transform the data from the given file, returning the cleaned Parquet path."""
+        with self.report.stage("transform") as metrics:
+            metrics.bytes_read += os.path.getsize(file_path)
+            if self.streaming:
+                output_parquet = self.transform_streaming(file_path, metrics)
+            else:
+                output_parquet = self.transform_in_memory(file_path, metrics)
+
+            _, output_xlsx, output_csv = self.output_paths(file_path)
+            outputs = [output_parquet]
+            if self.export_xlsx:
+                outputs.append(output_xlsx)
+            if self.export_csv:
+                outputs.append(output_csv)
+            metrics.bytes_written += sum(os.path.getsize(output) for output in outputs)
+        return output_parquet
+
+    def transform_in_memory(self, file_path, metrics=None):
+        """Clean the given file in a single DataFrame."""
         self.log(f"Transforming file: {file_path}")
         try:
             # Load the Excel file
-            df = pd.read_excel(file_path)
+            df = self.number_lines(pd.read_excel(file_path))
+
+            # Profile the raw rows before cleaning, so the profile shows what the source sent
+            profile = DataProfile()
+            profile.update(df)
+
+            with QuarantineWriter(self.quarantine_path(file_path)) as quarantine:
+                cleaned_data = self.clean(df, metrics, quarantine)
+            if metrics is not None:
+                metrics.rows_in += len(df)
+                metrics.rows_out += len(cleaned_data)
+
+            # Save cleaned data as Parquet, plus the requested exports
+            output_parquet, output_xlsx, output_csv = self.output_paths(file_path)
+            outputs = [output_parquet]
+
+            with parquet_writer(output_parquet) as writer:
+                writer.write_table(to_arrow(cleaned_data))
+            profile.write(self.profile_path(output_parquet))
+            if self.export_xlsx:
+                cleaned_data.to_excel(output_xlsx, index=False)
+                outputs.append(output_xlsx)
+            if self.export_csv:
+                cleaned_data.to_csv(output_csv, index=False)
+                outputs.append(output_csv)
+
+            self.log(f"Cleaned data saved to: {', '.join(outputs)}")
+            if quarantine.rows:
+                self.log(f"Quarantined {quarantine.rows} rows to: {self.quarantine_path(file_path)}")
+            return output_parquet
+
+        except Exception as e:
+            self.log(f"Transformation error for {file_path}: {str(e)}")
+            raise
+
+    def read_chunks(self, file_path):
+        """Yield the rows of the first worksheet as DataFrames of at most chunk_size rows."""
+        # read_only mode streams rows from the archive instead of building the whole sheet
+        workbook = load_workbook(file_path, read_only=True, data_only=True)
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            header = next(rows, None)
+            if header is None:
+                return
+
+            batch = []
+            emitted = False
+            for row in rows:
+                batch.append(row)
+                if len(batch) >= self.chunk_size:
+                    yield pd.DataFrame.from_records(batch, columns=header)
+                    emitted = True
+                    batch = []
+
+            # Always emit at least one (possibly empty) frame so the header reaches the output
+            if batch or not emitted:
+                yield pd.DataFrame.from_records(batch, columns=header)
+        finally:
+            workbook.close()
+
+    def transform_streaming(self, file_path, metrics=None):
+        """Clean the given file in fixed-size chunks, appending each one to the outputs."""
+        self.log(f"Transforming file (streaming, {self.chunk_size} rows per chunk): {file_path}")
+        try:
+            output_parquet, output_xlsx, output_csv = self.output_paths(file_path)
+            outputs = [output_parquet]
 
-            # Drop rows with missing values
-            df = df.dropna()
+            # write_only workbooks flush rows to disk as they are appended
+            workbook = sheet = csv_file = None
+            if self.export_xlsx:
+                workbook = Workbook(write_only=True)
+                sheet = workbook.create_sheet()
+                outputs.append(output_xlsx)
+            if self.export_csv:
+                csv_file = open(output_csv, "w", newline="")
+                outputs.append(output_csv)
 
-            # Ensure InvoiceDate is in datetime format
-            df['InvoiceDate'] = pd.to_datetime(df['InvoiceDate'], errors='coerce')
-            df['InvoiceDate'] = df['InvoiceDate'].dt.strftime('%d/%m/%Y %I:%M:%S %p')
+            header_written = False
+            line_offsets = {}
+            occurrences = RowOccurrences()
+            profile = DataProfile()  # Chunk statistics accumulate into the file's profile
+            rows_in = 0
+            rows_out = 0
 
-            # Escape single quotes in text
-            df['Description'] = df['Description'].apply(
-                lambda x: x.replace("'", "''") if isinstance(x, str) else x
-            )
+            try:
+                with parquet_writer(output_parquet) as writer, \
+                        QuarantineWriter(self.quarantine_path(file_path)) as quarantine:
+                    for chunk in self.read_chunks(file_path):
+                        rows_in += len(chunk)
+                        chunk = self.number_lines(chunk, line_offsets)
+                        profile.update(chunk)
+                        cleaned_data = self.clean(chunk, metrics, quarantine, occurrences)
+                        rows_out += len(cleaned_data)
 
-            # Remove rows with negative values for UnitPrice and Quantity
-            cleaned_data = df[(df['UnitPrice'] > 0) & (df['Quantity'] > 0)]
+                        # Each chunk becomes one Parquet row group
+                        writer.write_table(to_arrow(cleaned_data))
 
-            # Save cleaned data as Excel and CSV
-            base_name = os.path.splitext(os.path.basename(file_path))[0]
-            output_xlsx = os.path.join(self.output_dir, f"{base_name}_cleaned.xlsx")
-            output_csv = os.path.join(self.output_dir, f"{base_name}_cleaned.csv")
+                        if sheet is not None:
+                            if not header_written:
+                                sheet.append(list(cleaned_data.columns))
+                            for row in cleaned_data.itertuples(index=False, name=None):
+                                sheet.append(row)
+                        if csv_file is not None:
+                            cleaned_data.to_csv(csv_file, index=False, header=not header_written)
+                        header_written = True
+            finally:
+                if csv_file is not None:
+                    csv_file.close()
 
-            cleaned_data.to_excel(output_xlsx, index=False)
-            cleaned_data.to_csv(output_csv, index=False)
+            if workbook is not None:
+                workbook.save(output_xlsx)
+            profile.write(self.profile_path(output_parquet))
 
-            self.log(f"Cleaned data saved to: {output_xlsx} and {output_csv}")
-            return output_xlsx, output_csv
+            if metrics is not None:
+                metrics.rows_in += rows_in
+                metrics.rows_out += rows_out
+
+            self.log(f"Cleaned {rows_out}/{rows_in} rows saved to: {', '.join(outputs)}")
+            if quarantine.rows:
+                self.log(f"Quarantined {quarantine.rows} rows to: {self.quarantine_path(file_path)}")
+            return output_parquet
 
         except Exception as e:
             self.log(f"Transformation error for {file_path}: {str(e)}")
             raise
 
-    def load(self, cleaned_file):
-        """Load cleaned data into the database."""
+    def load(self, cleaned_file, db_connection=None):
+        """Bulk load a cleaned Parquet file into its staging table with COPY."""
         self.log(f"Loading file into database: {cleaned_file}")
+        db_connection = db_connection or self.db_connection
         try:
-            # Load cleaned data
-            df = pd.read_excel(cleaned_file)
-
-            # Get the connection URI and create an engine
-            engine = create_engine(self.db_connection.get_database_uri())
             schema = 'dw_online_retail'  # Specify the schema for the table
             table_name = f"stg_{os.path.splitext(os.path.basename(cleaned_file))[0]}"
 
-            # Load data into the database with the specified schema
-            df.to_sql(table_name, engine, schema=schema, if_exists='replace', index=False)
-            self.log(f"Data loaded into table: {schema}.{table_name}")
+            column_list = ", ".join(f'"{column}"' for column in STAGING_COLUMNS)
+
+            # Load into an UNLOGGED shadow table, then swap it in once the COPY has committed
+            staging = StagingTableManager(db_connection, schema)
+            shadow = staging.create_shadow(table_name)
+
+            try:
+                with self.report.stage("load") as metrics:
+                    # Stream the Parquet row groups to COPY as CSV, one record batch at a time
+                    start = time.perf_counter()
+                    row_count = db_connection.copy_expert(
+                        f"COPY {shadow} ({column_list}) FROM STDIN WITH (FORMAT csv)",
+                        ParquetCsvStream(cleaned_file, batch_size=self.chunk_size),
+                    )
+                    elapsed = time.perf_counter() - start
+
+                    staging.swap_in(table_name)
+
+                    metrics.bytes_read += os.path.getsize(cleaned_file)
+                    metrics.rows_in += row_count
+                    metrics.rows_out += row_count
+            except Exception:
+                staging.drop_shadow(table_name)
+                raise
+
+            rate = row_count / elapsed if elapsed > 0 else 0
+            self.log(f"Data loaded into table: {schema}.{table_name} "
+                     f"({row_count} rows in {elapsed:.2f}s, {rate:,.0f} rows/sec)")
+            return row_count
         except Exception as e:
             self.log(f"Load error for {cleaned_file}: {str(e)}")
             raise
 
+    def _connect_fact_managers(self):
+        """Create the partition manager and rollup refresher used by direct fact loads, sharing one engine."""
+        self.partition_manager = PartitionManager(self.db_connection.get_database_uri())
+        self.rollups = RefreshRollups(self.db_connection.get_database_uri(), engine=self.partition_manager.engine)
+
+    def load_facts(self, cleaned_file, db_connection=None):
+        """Key a cleaned Parquet file against the dimension maps and COPY its fact rows into fact_sales."""
+        self.log(f"Loading facts directly from: {cleaned_file}")
+        db_connection = db_connection or self.db_connection
+        schema = 'dw_online_retail'
+        try:
+            with self.report.stage("load_facts") as metrics:
+                # The maps are loaded once per run and shared by every file
+                if self.key_maps is None:
+                    self.key_maps = DimensionKeyMaps(self.db_connection, schema).load()
+
+                # Pass 1: register new products, customers and days, noting the months fact_sales needs
+                parquet_file = pq.ParquetFile(cleaned_file)
+                days = set()
+                for batch in parquet_file.iter_batches(batch_size=self.chunk_size, columns=MEMBER_COLUMNS):
+                    df = batch.to_pandas()
+                    self.key_maps.add_members(df)
+                    days.update(df["InvoiceDate"].dropna().dt.normalize().drop_duplicates().dt.date)
+                if self.partition_manager is None:
+                    self._connect_fact_managers()
+                self.partition_manager.ensure_partitions(days)
+
+                # Pass 2: stream keyed fact rows through COPY and insert the lines not loaded yet
+                column_list = ", ".join(FACT_COLUMNS)
+                stream = ParquetCsvStream(cleaned_file, batch_size=self.chunk_size, transform=self.key_maps.fact_batch)
+                connection = db_connection.connection
+                try:
+                    with connection.cursor() as cursor:
+                        cursor.execute(f"INSERT INTO {schema}.load_batches DEFAULT VALUES RETURNING LoadBatchID;")
+                        batch_id = cursor.fetchone()[0]
+                        cursor.execute(f"""
+                            CREATE TEMP TABLE fact_sales_incoming ON COMMIT DROP AS
+                            SELECT {column_list} FROM {schema}.fact_sales WITH NO DATA;
+                        """)
+                        cursor.copy_expert(f"COPY fact_sales_incoming ({column_list}) FROM STDIN WITH (FORMAT csv)", stream)
+                        cursor.execute(f"""
+                            INSERT INTO {schema}.fact_sales ({column_list}, LoadBatchID)
+                            SELECT {column_list}, %s FROM fact_sales_incoming
+                            ON CONFLICT DO NOTHING;
+                        """, (batch_id,))
+                        inserted = cursor.rowcount
+                        cursor.execute(f"""
+                            UPDATE {schema}.load_batches SET FinishedAt = now(), RowsInserted = %s
+                            WHERE LoadBatchID = %s;
+                        """, (inserted, batch_id))
+                    connection.commit()
+                except Exception:
+                    connection.rollback()
+                    raise
+
+                metrics.bytes_read += os.path.getsize(cleaned_file)
+                metrics.rows_in += stream.rows
+                metrics.rows_out += inserted
+
+            # Facts bypass InsertTables here, so the rollups are refreshed for this file's days
+            self.rollups.refresh([date_key(day) for day in days])
+
+            self.log(f"Inserted {inserted}/{stream.rows} lines into {schema}.fact_sales (load batch {batch_id}).")
+            return inserted
+        except Exception as e:
+            self.log(f"Fact load error for {cleaned_file}: {str(e)}")
+            raise
+
+    def store_profile(self, cleaned_file, db_connection=None):
+        """Insert the profile written by transform for a cleaned file into data_profiles."""
+        profile_file = self.profile_path(cleaned_file)
+        if not os.path.exists(profile_file):
+            self.log(f"No profile found for {cleaned_file}; skipping.")
+            return 0
+
+        db_connection = db_connection or self.db_connection
+        rows = DataProfile.read(profile_file).rows()
+        source_file = os.path.basename(cleaned_file)
+        connection = db_connection.connection
+        try:
+            with connection.cursor() as cursor:
+                cursor.executemany("""
+                    INSERT INTO dw_online_retail.data_profiles
+                        (SourceFile, ColumnName, RowCount, NullCount, InvalidCount, MinValue, MaxValue,
+                         DistinctEstimate, TopValues, Histogram)
+                    VALUES (%(source_file)s, %(column)s, %(rows)s, %(nulls)s, %(invalid)s, %(min)s, %(max)s,
+                            %(distinct)s, %(top)s, %(histogram)s);
+                """, [dict(row, source_file=source_file) for row in rows])
+            connection.commit()
+        except Exception:
+            connection.rollback()
+            raise
+        return len(rows)
+
+    def load_cleaned(self, cleaned_file, db_connection=None):
+        """Load a cleaned file into staging, or straight into fact_sales in direct mode, then store its profile."""
+        if self.direct_facts:
+            loaded = self.load_facts(cleaned_file, db_connection)
+        else:
+            loaded = self.load(cleaned_file, db_connection)
+        self.store_profile(cleaned_file, db_connection)
+        return loaded
+
+    def load_with_own_connection(self, cleaned_file):
+        """Load a file over a dedicated connection so concurrent loads do not share a transaction."""
+        with Database_Connection() as db_connection:
+            return self.load_cleaned(cleaned_file, db_connection)
+
+    def run_parallel(self, files):
+        """Transform files across a process pool and load them with bounded concurrency.
+
+        Returns a dict mapping each failed file to its error; the other files still complete.
+        """
+        failures = {}
+        loads = {}
+
+        with ProcessPoolExecutor(max_workers=self.workers) as transform_pool, \
+                ThreadPoolExecutor(max_workers=self.load_concurrency) as load_pool:
+            transforms = {
+                transform_pool.submit(transform_file, file_path, self.streaming, self.chunk_size,
+                                      self.export_xlsx, self.export_csv, self.input_dir,
+                                      self.output_dir): file_path
+                for file_path in files
+            }
+
+            # Start loading each file as soon as its transform finishes
+            for future in as_completed(transforms):
+                file_path = transforms[future]
+                try:
+                    cleaned_file, stages = future.result()
+                    for name, metrics in stages.items():
+                        self.report.merge(name, metrics)
+                except Exception as e:
+                    failures[file_path] = e
+                    self.log(f"Transformation failed for {file_path}: {str(e)}")
+                    continue
+                loads[load_pool.submit(self.load_with_own_connection, cleaned_file)] = file_path
+
+            for future in as_completed(loads):
+                file_path = loads[future]
+                try:
+                    future.result()
+                    self.manifest.record(file_path)
+                    self.log(f"Processed file: {file_path}")
+                except Exception as e:
+                    failures[file_path] = e
+                    self.log(f"Load failed for {file_path}: {str(e)}")
+
+        return failures
+
     def run(self):
         """Run the full ETL process."""
         try:
@@ -117,21 +537,67 @@ class ETLProcess:
             # Step 1: Create the schema
             self.create_schema()  # Ensure schema exists before any data operations
             
+            if self.direct_facts:
+                self.key_maps = DimensionKeyMaps(self.db_connection).load()
+                self._connect_fact_managers()
+
             # Step 2: Extract data
-            files = self.extract()
+            files = self.select_changed(self.extract())
             
             # Step 3: Process each file (transform and load)
-            for idx, file_path in enumerate(files, start=1):
-                self.log(f"Processing file {idx}/{len(files)}: {file_path}")
-                cleaned_xlsx, _ = self.transform(file_path)  # Transform and save cleaned data
-                self.load(cleaned_xlsx)  # Load cleaned data into the database
+            if self.parallel:
+                failures = self.run_parallel(files)
+                if failures:
+                    self.log(f"ETL process completed with {len(failures)}/{len(files)} failed files:")
+                    for file_path, error in failures.items():
+                        self.log(f"  - {file_path}: {str(error)}")
+                    return
+            else:
+                for idx, file_path in enumerate(files, start=1):
+                    self.log(f"Processing file {idx}/{len(files)}: {file_path}")
+                    cleaned_file = self.transform(file_path)  # Transform and save cleaned data
+                    self.load_cleaned(cleaned_file)  # Load cleaned data into the database
+                    self.manifest.record(file_path)  # Skip this file on the next run unless it changes
 
             self.log("ETL process completed successfully.")
         except Exception as e:
             self.log(f"ETL process failed: {str(e)}")
         finally:
+            self.log(f"Run report written to: {self.report.write(self.report_dir)}")
+            self.logger.close()
             self.db_connection.close()  # Close the database connection after ETL process
 
 if __name__ == "__main__":
-    etl = ETLProcess()
+    parser = argparse.ArgumentParser(description="Run the Online Retail ETL process.")
+    parser.add_argument("--streaming", action="store_true",
+                        help="Clean raw workbooks in fixed-size chunks to keep memory flat.")
+    parser.add_argument("--chunk-size", type=int, default=50000,
+                        help="Rows per chunk in streaming mode (default: 50000).")
+    parser.add_argument("--parallel", action="store_true",
+                        help="Transform files in a process pool and load them concurrently.")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Transform processes in parallel mode (default: one per CPU core).")
+    parser.add_argument("--load-concurrency", type=int, default=2,
+                        help="Files loaded at once in parallel mode (default: 2).")
+    parser.add_argument("--export-xlsx", action="store_true",
+                        help="Also write the cleaned data as an Excel workbook.")
+    parser.add_argument("--export-csv", action="store_true",
+                        help="Also write the cleaned data as CSV.")
+    parser.add_argument("--direct-facts", action="store_true",
+                        help="Key rows client-side and COPY them straight into fact_sales instead of staging.")
+    parser.add_argument("--full-refresh", action="store_true",
+                        help="Reprocess every raw file, ignoring the ingestion manifest.")
+    args = parser.parse_args()
+
+    etl = ETLProcess(
+        streaming=args.streaming,
+        chunk_size=args.chunk_size,
+        parallel=args.parallel,
+        workers=args.workers,
+        load_concurrency=args.load_concurrency,
+        full_refresh=args.full_refresh,
+        export_xlsx=args.export_xlsx,
+        export_csv=args.export_csv,
+        direct_facts=args.direct_facts,
+    )
     etl.run()
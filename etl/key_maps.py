@@ -0,0 +1,110 @@
+import threading
+import pandas as pd
+import pyarrow as pa
+from utils.date_keys import date_keys
+from models.create_tables.create_dim_time_table import CALENDAR_QUERY
+
+# Fact columns built client-side, in COPY order
+FACT_COLUMNS = ["ProductID", "CustomerID", "TimeID", "Quantity", "UnitPrice", "TotalAmount", "InvoiceNo", "InvoiceLine", "RowHash"]
+
+# Cleaned-layer columns needed to register new dimension members
+MEMBER_COLUMNS = ["StockCode", "Description", "UnitPrice", "CustomerID", "Country", "InvoiceDate"]
+
+class DimensionKeyMaps:
+    """Client-side lookups from natural keys to the keys of dim_products, dim_customers and dim_time.
+
+    The maps are loaded once and extended as new members are inserted, so fact rows are keyed
+    with vectorized lookups instead of a join against the dimensions inside PostgreSQL. TimeIDs
+    are computed from the date; only the span of the gapless dim_time calendar is tracked.
+    """
+    def __init__(self, db_connection, schema="dw_online_retail"):
+        self.db_connection = db_connection
+        self.schema = schema
+        self.product_ids = pd.Index([], dtype=object)
+        self.customer_ids = pd.Index([], dtype="int64")
+        self.calendar_span = None  # (first, last) day in dim_time
+        self._lock = threading.Lock()
+
+    def load(self):
+        """Read the current members of every dimension."""
+        products = self._execute(f"SELECT ProductID FROM {self.schema}.dim_products;", fetch=True)
+        customers = self._execute(f"SELECT CustomerID FROM {self.schema}.dim_customers;", fetch=True)
+        span = self._execute(f"SELECT MIN(InvoiceDate), MAX(InvoiceDate) FROM {self.schema}.dim_time;", fetch=True)
+
+        with self._lock:
+            self.product_ids = pd.Index([row[0] for row in products], dtype=object)
+            self.customer_ids = pd.Index([row[0] for row in customers], dtype="int64")
+            self.calendar_span = span[0] if span[0][0] is not None else None
+        return self
+
+    def add_members(self, df):
+        """Insert the dimension members of df that are not in the maps yet, then add them to the maps."""
+        with self._lock:
+            products = df.loc[~df["StockCode"].isin(self.product_ids), ["StockCode", "Description", "UnitPrice"]]
+            products = products.drop_duplicates("StockCode")
+            if len(products):
+                self._execute(f"""
+                    INSERT INTO {self.schema}.dim_products (ProductID, ProductDescription, UnitPrice)
+                    SELECT * FROM unnest(%s::text[], %s::text[], %s::double precision[])
+                    ON CONFLICT (ProductID) DO NOTHING;
+                """, (products["StockCode"].tolist(), products["Description"].tolist(), products["UnitPrice"].tolist()))
+                self.product_ids = self.product_ids.append(pd.Index(products["StockCode"], dtype=object))
+
+            customers = df.loc[~df["CustomerID"].isin(self.customer_ids), ["CustomerID", "Country"]]
+            customers = customers.drop_duplicates("CustomerID")
+            if len(customers):
+                self._execute(f"""
+                    INSERT INTO {self.schema}.dim_customers (CustomerID, Country)
+                    SELECT * FROM unnest(%s::bigint[], %s::text[])
+                    ON CONFLICT (CustomerID) DO NOTHING;
+                """, (customers["CustomerID"].tolist(), customers["Country"].tolist()))
+                self.customer_ids = self.customer_ids.append(pd.Index(customers["CustomerID"], dtype="int64"))
+
+            dates = df["InvoiceDate"].dropna()
+            if len(dates):
+                first, last = dates.min().date(), dates.max().date()
+                if self.calendar_span is None or first < self.calendar_span[0] or last > self.calendar_span[1]:
+                    # Generate over the union of both spans so the calendar stays gapless
+                    if self.calendar_span is not None:
+                        first, last = min(first, self.calendar_span[0]), max(last, self.calendar_span[1])
+                    self._execute(CALENDAR_QUERY.format(schema=self.schema, start="%s", end="%s"), (first, last))
+                    # The calendar is generated by whole years
+                    self.calendar_span = (first.replace(month=1, day=1), last.replace(month=12, day=31))
+
+    def resolve(self, df):
+        """Return the fact rows for df keyed through the maps; like the old join, unknown members are dropped."""
+        known = (
+            df["InvoiceDate"].notna()
+            & df["StockCode"].isin(self.product_ids)
+            & df["CustomerID"].isin(self.customer_ids)
+        )
+        df = df[known]
+
+        return pd.DataFrame({
+            "ProductID": df["StockCode"],
+            "CustomerID": df["CustomerID"],
+            "TimeID": date_keys(df["InvoiceDate"]),
+            "Quantity": df["Quantity"],
+            "UnitPrice": df["UnitPrice"],
+            "TotalAmount": df["Quantity"] * df["UnitPrice"],
+            "InvoiceNo": df["InvoiceNo"],
+            "InvoiceLine": df["InvoiceLine"],
+            "RowHash": df["RowHash"],
+        }, columns=FACT_COLUMNS)
+
+    def fact_batch(self, batch):
+        """Map a cleaned-layer record batch to an Arrow table of fact rows, for ParquetCsvStream."""
+        return pa.Table.from_pandas(self.resolve(batch.to_pandas()), preserve_index=False)
+
+    def _execute(self, query, params=None, fetch=False):
+        """Run a query in its own transaction, returning the rows when fetch is set."""
+        connection = self.db_connection.connection
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(query, params)
+                rows = cursor.fetchall() if fetch else None
+            connection.commit()
+            return rows
+        except Exception:
+            connection.rollback()
+            raise
@@ -0,0 +1,82 @@
+import os
+import json
+import hashlib
+from datetime import datetime
+
+class IngestionManifest:
+    """Track the raw files that have already been ingested, keyed by path, size, mtime and content hash."""
+    def __init__(self, manifest_file):
+        self.manifest_file = manifest_file
+        self.entries = {}
+
+        if os.path.isfile(self.manifest_file):
+            with open(self.manifest_file) as f:
+                self.entries = json.load(f)
+
+    @staticmethod
+    def file_hash(file_path, block_size=1024 * 1024):
+        """Return the SHA-256 of the file contents, read in fixed-size blocks."""
+        digest = hashlib.sha256()
+        with open(file_path, "rb") as f:
+            for block in iter(lambda: f.read(block_size), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+    @staticmethod
+    def _key(file_path):
+        return os.path.normpath(file_path)
+
+    def is_changed(self, file_path):
+        """Return True if the file is new or its contents differ from the recorded entry."""
+        entry = self.entries.get(self._key(file_path))
+        if entry is None:
+            return True
+
+        stat = os.stat(file_path)
+        if stat.st_size != entry["size"]:
+            return True
+        if stat.st_mtime == entry["mtime"]:
+            return False
+
+        # Same size but touched since the last run: only the content hash can tell
+        if self.file_hash(file_path) != entry["sha256"]:
+            return True
+        entry["mtime"] = stat.st_mtime  # Remember the new mtime so the next check stays cheap
+        return False
+
+    def record(self, file_path):
+        """Record the file as ingested and persist the manifest."""
+        stat = os.stat(file_path)
+        self.entries[self._key(file_path)] = {
+            "size": stat.st_size,
+            "mtime": stat.st_mtime,
+            "sha256": self.file_hash(file_path),
+            "ingested_at": datetime.now().isoformat(timespec="seconds"),
+        }
+        self.save()
+
+    def forget_staged(self, staging_table):
+        """Drop the entries of the raw files loaded into staging_table, so the next run stages them again.
+
+        Returns the forgotten paths.
+        """
+        forgotten = [
+            path for path in self.entries
+            if f"stg_{os.path.splitext(os.path.basename(path))[0]}_cleaned" == staging_table
+        ]
+        for path in forgotten:
+            del self.entries[path]
+        if forgotten:
+            self.save()
+        return forgotten
+
+    def save(self):
+        """Write the manifest atomically so an interrupted run never leaves it half-written."""
+        directory = os.path.dirname(self.manifest_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        temp_file = f"{self.manifest_file}.tmp"
+        with open(temp_file, "w") as f:
+            json.dump(self.entries, f, indent=2, sort_keys=True)
+        os.replace(temp_file, self.manifest_file)
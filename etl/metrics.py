@@ -0,0 +1,142 @@
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+class BufferedLogger:
+    """Append log lines to a file that stays open for the whole run instead of reopening it per line."""
+    def __init__(self, log_file, flush_every=100):
+        self.log_file = log_file
+        self.flush_every = flush_every
+        self._file = None
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def write(self, message):
+        """Buffer a line, flushing to disk every flush_every lines."""
+        with self._lock:
+            if self._file is None:
+                self._file = open(self.log_file, "a", buffering=64 * 1024)
+            self._file.write(f"{message}\n")
+            self._pending += 1
+            if self._pending >= self.flush_every:
+                self._file.flush()
+                self._pending = 0
+
+    def flush(self):
+        """Write any buffered lines to disk."""
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+                self._pending = 0
+
+    def close(self):
+        """Flush and close the log file; a later write reopens it."""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+                self._pending = 0
+
+class StageMetrics:
+    """Counters for one stage of a run: timings, rows, bytes and rows dropped per cleaning rule."""
+    def __init__(self, name):
+        self.name = name
+        self.calls = 0
+        self.wall_time = 0.0
+        self.cpu_time = 0.0
+        self.rows_in = 0
+        self.rows_out = 0
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.dropped = {}
+
+    def drop(self, rule, rows):
+        """Record rows removed by a cleaning rule."""
+        self.dropped[rule] = self.dropped.get(rule, 0) + int(rows)
+
+    def merge(self, other):
+        """Add the counters of another StageMetrics, or of its to_dict() form."""
+        if isinstance(other, StageMetrics):
+            other = other.to_dict()
+        self.calls += other["calls"]
+        self.wall_time += other["wall_time"]
+        self.cpu_time += other["cpu_time"]
+        self.rows_in += other["rows_in"]
+        self.rows_out += other["rows_out"]
+        self.bytes_read += other["bytes_read"]
+        self.bytes_written += other["bytes_written"]
+        for rule, rows in other["dropped"].items():
+            self.drop(rule, rows)
+
+    def to_dict(self):
+        rows = self.rows_in or self.rows_out
+        return {
+            "calls": self.calls,
+            "wall_time": round(self.wall_time, 6),
+            "cpu_time": round(self.cpu_time, 6),
+            "rows_in": self.rows_in,
+            "rows_out": self.rows_out,
+            "rows_per_sec": round(rows / self.wall_time, 1) if self.wall_time > 0 else None,
+            "bytes_read": self.bytes_read,
+            "bytes_written": self.bytes_written,
+            "dropped": dict(self.dropped),
+        }
+
+class RunReport:
+    """Collect per-stage metrics for a run and write them as a JSON report.
+
+    Stages may be timed from several threads at once; each call gets its own StageMetrics,
+    which is merged into the stage total when the call finishes.
+    """
+    def __init__(self, name):
+        self.name = name
+        self.started_at = datetime.now()
+        self._start = time.perf_counter()
+        self.stages = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name):
+        """Time a block as one call of the named stage, yielding its StageMetrics for counting."""
+        metrics = StageMetrics(name)
+        wall_start = time.perf_counter()
+        cpu_start = time.thread_time()
+        try:
+            yield metrics
+        finally:
+            metrics.calls = 1
+            metrics.wall_time = time.perf_counter() - wall_start
+            metrics.cpu_time = time.thread_time() - cpu_start
+            self.merge(name, metrics)
+
+    def merge(self, name, metrics):
+        """Add metrics (a StageMetrics or its dict form, e.g. from a worker process) to a stage."""
+        with self._lock:
+            if name not in self.stages:
+                self.stages[name] = StageMetrics(name)
+            self.stages[name].merge(metrics)
+
+    def stage_dicts(self):
+        with self._lock:
+            return {name: metrics.to_dict() for name, metrics in self.stages.items()}
+
+    def to_dict(self):
+        return {
+            "run": self.name,
+            "started_at": self.started_at.isoformat(timespec="seconds"),
+            "wall_time": round(time.perf_counter() - self._start, 6),
+            "stages": self.stage_dicts(),
+        }
+
+    def write(self, report_dir):
+        """Write the report to report_dir as <run>_<timestamp>.json and return its path."""
+        os.makedirs(report_dir, exist_ok=True)
+        report_file = os.path.join(
+            report_dir, f"{self.name}_{self.started_at.strftime('%Y%m%d_%H%M%S')}.json"
+        )
+        with open(report_file, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+        return report_file
@@ -1,20 +1,55 @@
-from sqlalchemy import create_engine, text
-import pandas as pd
+from sqlalchemy import text
+from utils.engines import get_engine
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import argparse
+import math
 import os
 from dotenv import load_dotenv
+from models.create_tables.create_null_check_results_table import CreateNullCheckResultsTable
 
 # Load environment variables from the .env file
 load_dotenv()
 
+# Two-sided 95% confidence
+WILSON_Z = 1.96
+
+def wilson_interval(nulls, sample_rows, z=WILSON_Z):
+    """Return the Wilson score interval (low, high) for a null fraction observed in a sample."""
+    if sample_rows <= 0:
+        return 0.0, 1.0
+    fraction = nulls / sample_rows
+    denominator = 1 + z * z / sample_rows
+    center = (fraction + z * z / (2 * sample_rows)) / denominator
+    margin = z * math.sqrt(fraction * (1 - fraction) / sample_rows + z * z / (4 * sample_rows * sample_rows)) / denominator
+    return max(0.0, center - margin), min(1.0, center + margin)
+
 class NullChecker:
-    def __init__(self):
+    """Count the NULLs of every column in a schema and store the counts in null_check_results.
+
+    Each table is read in a single scan that counts the NULLs of all its columns at once, and
+    tables are checked in parallel over a pool of `workers` connections.
+
+    In approximate mode the null fraction of each column is estimated first, from a
+    TABLESAMPLE SYSTEM sample ("sample", with its pages as the sample size) or from the
+    fractions ANALYZE left in pg_stats ("stats", combined over partitions). Only the columns
+    whose upper confidence bound exceeds `threshold` are counted exactly, so tables without
+    suspicious columns are never fully scanned.
+    """
+    def __init__(self, workers=4, approximate=False, estimate="sample", sample_percent=1.0, threshold=0.001):
         # Fetch the database URI from the environment variable
         self.db_uri = os.getenv('DATABASE_URL')
 
         if not self.db_uri:
             raise ValueError("DATABASE_URL is not set in the .env file")
 
-        self.engine = create_engine(self.db_uri)
+        self.workers = workers
+        self.approximate = approximate
+        self.estimate = estimate
+        self.sample_percent = sample_percent
+        self.threshold = threshold
+        # Sized for the workers if this creates the process's engine; otherwise workers wait for a free connection
+        self.engine = get_engine(self.db_uri, pool_size=workers)
         self.log_file = "null_checker.log"
 
     def log(self, message):
@@ -23,57 +58,187 @@ class NullChecker:
             log_file.write(f"{message}\n")
         print(message)
 
+    def list_columns(self, schema):
+        """Return {table: [columns]} for the tables of schema, leaving out partitions and the results table."""
+        with self.engine.connect() as connection:
+            # A partitioned table already covers its partitions, so they are not scanned twice
+            result = connection.execute(text("""
+                SELECT c.relname, a.attname
+                FROM pg_class c
+                JOIN pg_namespace n ON n.oid = c.relnamespace
+                JOIN pg_attribute a ON a.attrelid = c.oid AND a.attnum > 0 AND NOT a.attisdropped
+                WHERE n.nspname = :schema
+                AND c.relkind IN ('r', 'p')
+                AND NOT c.relispartition
+                AND c.relname <> 'null_check_results'
+                ORDER BY c.relname, a.attnum;
+            """), {"schema": schema})
+
+            columns = {}
+            for table, column in result:
+                columns.setdefault(table, []).append(column)
+        return columns
+
+    def count_nulls(self, schema, table, columns):
+        """Return the row count of table and the NULL count of each column, from one scan."""
+        null_counts = ", ".join(f'COUNT(*) FILTER (WHERE "{column}" IS NULL)' for column in columns)
+        with self.engine.connect() as connection:
+            row = connection.execute(text(f'SELECT COUNT(*), {null_counts} FROM "{schema}"."{table}";')).one()
+        return row[0], dict(zip(columns, row[1:]))
+
+    def sample_nulls(self, schema, table, columns):
+        """Return the estimated rows of table, a TABLESAMPLE's rows and pages, and the NULL count of each column in it.
+
+        SYSTEM sampling reads whole pages, so only sample_percent of the table is read. Rows of a
+        page are not independent (nulls cluster, e.g. in pages written before a column existed),
+        so the sampled pages rather than rows are the sample size of the confidence interval.
+        """
+        null_counts = ", ".join(f'COUNT(*) FILTER (WHERE "{column}" IS NULL)' for column in columns)
+        with self.engine.connect() as connection:
+            # Pages are numbered per partition, so each is told apart by its table too
+            row = connection.execute(text(f"""
+                SELECT COUNT(*), COUNT(DISTINCT (CAST(tableoid AS bigint) << 32) + CAST((CAST(CAST(ctid AS text) AS point))[0] AS bigint)),
+                       {null_counts}
+                FROM "{schema}"."{table}" TABLESAMPLE SYSTEM ({float(self.sample_percent)});
+            """)).one()
+        return round(row[0] * 100 / self.sample_percent), row[0], row[1], dict(zip(columns, row[2:]))
+
+    def stats_nulls(self, schema, table, columns):
+        """Return the estimated rows of table, the size of its ANALYZE sample and the NULL count of each column in it.
+
+        The fractions of a partitioned table are combined from the statistics of its partitions,
+        weighted by their rows, since autovacuum never analyzes the parent itself. Columns without
+        statistics on every non-empty table or partition are left out, so they are counted exactly.
+        """
+        with self.engine.connect() as connection:
+            statistics_target = connection.execute(text("SELECT current_setting('default_statistics_target')::int;")).scalar()
+            relations = connection.execute(text("""
+                SELECT c.relname, c.reltuples, pg_relation_size(c.oid) > 0 AS has_pages
+                FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace
+                WHERE n.nspname = :schema
+                AND ((c.relname = :table AND c.relkind <> 'p')
+                     OR c.oid IN (SELECT inhrelid FROM pg_inherits WHERE inhparent = to_regclass(:qualified)));
+            """), {"schema": schema, "table": table, "qualified": f'"{schema}"."{table}"'}).all()
+            fractions = {}
+            for relname, column, null_frac in connection.execute(text("""
+                SELECT tablename, attname, null_frac FROM pg_stats
+                WHERE schemaname = :schema AND tablename = ANY(:relations) AND NOT inherited;
+            """), {"schema": schema, "relations": [relation.relname for relation in relations]}):
+                fractions[(relname, column)] = null_frac
+
+        estimated_rows = 0
+        sample_rows = 0
+        null_counts = dict.fromkeys(columns, 0.0)
+        for relation in relations:
+            # reltuples is -1 until the first ANALYZE; such a relation has data only if it has pages
+            if relation.reltuples <= 0 and not relation.has_pages:
+                continue
+            rows = max(relation.reltuples, 0)
+            # ANALYZE samples 300 rows per unit of statistics target
+            relation_sample = min(rows, 300 * statistics_target)
+            estimated_rows += rows
+            sample_rows += relation_sample
+            for column in list(null_counts):
+                if (relation.relname, column) in fractions and relation.reltuples > 0:
+                    null_counts[column] += fractions[(relation.relname, column)] * relation_sample
+                else:
+                    del null_counts[column]
+
+        sample_rows = int(sample_rows)
+        return round(estimated_rows), sample_rows, sample_rows, {column: round(count) for column, count in null_counts.items()}
+
+    def check_table(self, schema, table, columns, checked_at):
+        """Check one table and return its result rows."""
+        if self.approximate:
+            return self.check_table_approximate(schema, table, columns, checked_at)
+
+        row_count, null_counts = self.count_nulls(schema, table, columns)
+        self.log_table(schema, table, row_count, null_counts)
+        return [self.exact_result(checked_at, table, column, row_count, count) for column, count in null_counts.items()]
+
+    def check_table_approximate(self, schema, table, columns, checked_at):
+        """Estimate the null fraction of each column and count exactly only the columns above the threshold."""
+        sampler = self.stats_nulls if self.estimate == "stats" else self.sample_nulls
+        estimated_rows, sample_rows, sample_size, sample_counts = sampler(schema, table, columns)
+
+        results = []
+        flagged = []
+        for column in columns:
+            if column not in sample_counts:
+                flagged.append(column)
+                continue
+            # The interval is taken over the independent units of the sample (pages for TABLESAMPLE)
+            fraction = sample_counts[column] / sample_rows if sample_rows else 0.0
+            low, high = wilson_interval(fraction * sample_size, sample_size)
+            if high > self.threshold:
+                flagged.append(column)
+                continue
+            results.append({
+                "checked_at": checked_at, "table": table, "column": column, "rows": estimated_rows,
+                "nulls": None, "method": self.estimate, "fraction": fraction,
+                "low": low, "high": high,
+            })
+
+        if not flagged:
+            self.log(f"No null rates above {self.threshold:.4%} in {schema}.{table} "
+                     f"(estimated from {sample_rows} of ~{estimated_rows} rows).")
+            return results
+
+        # One scan covers every flagged column of the table
+        row_count, null_counts = self.count_nulls(schema, table, flagged)
+        self.log_table(schema, table, row_count, null_counts, note=f"{len(flagged)}/{len(columns)} columns escalated")
+        return results + [self.exact_result(checked_at, table, column, row_count, count) for column, count in null_counts.items()]
+
+    def exact_result(self, checked_at, table, column, row_count, nulls):
+        """Return the result row of an exact count."""
+        fraction = nulls / row_count if row_count else 0.0
+        return {
+            "checked_at": checked_at, "table": table, "column": column, "rows": row_count, "nulls": nulls,
+            "method": "exact", "fraction": fraction, "low": fraction, "high": fraction,
+        }
+
+    def log_table(self, schema, table, row_count, null_counts, note=None):
+        """Log the exact null counts of a table on one line."""
+        suffix = f", {note}" if note else ""
+        with_nulls = [column for column, count in null_counts.items() if count > 0]
+        if with_nulls:
+            self.log(f"Null values found in {schema}.{table} ({row_count} rows{suffix}): " + ", ".join(
+                f"{column}={null_counts[column]}" for column in with_nulls
+            ))
+        else:
+            self.log(f"No null values found in {schema}.{table} ({row_count} rows{suffix}).")
+
+    def save_results(self, schema, results):
+        """Append the result rows to null_check_results."""
+        if not results:
+            return
+        with self.engine.begin() as connection:
+            connection.execute(text(f"""
+                INSERT INTO {schema}.null_check_results
+                    (CheckedAt, TableName, ColumnName, RowCount, NullCount, Method, NullFraction, NullFractionLow, NullFractionHigh)
+                VALUES (:checked_at, :table, :column, :rows, :nulls, :method, :fraction, :low, :high);
+            """), results)
+
     def check_for_nulls(self, schema="dw_online_retail"):
-        """Check for null values in all tables of the specified schema."""
+        """Check for null values in all tables of the specified schema and return the result rows."""
         self.log("Starting null value check...")
         try:
-            with self.engine.connect() as connection:
-                # Get all tables in the schema
-                query = text(f"""
-                    SELECT table_name
-                    FROM information_schema.tables
-                    WHERE table_schema = :schema
-                """)
-                result = connection.execute(query, {"schema": schema})
-                tables = [row[0] for row in result.fetchall()]  # Access table names as tuple indices
-
-                if not tables:
-                    self.log(f"No tables found in schema '{schema}'.")
-                    return
-
-                # Iterate through each table and check for null values
-                for table in tables:
-                    self.log(f"Checking table: {schema}.{table}")
-
-                    # Ensure table name is quoted correctly for PostgreSQL
-                    quoted_table = f'"{schema}"."{table}"'
-
-                    # Get columns for the current table
-                    column_query = text(f"""
-                        SELECT column_name
-                        FROM information_schema.columns
-                        WHERE table_schema = :schema AND table_name = :table
-                    """)
-                    columns_result = connection.execute(column_query, {"schema": schema, "table": table})
-                    columns = [row[0] for row in columns_result.fetchall()]  # Access column names as tuple indices
-
-                    # Check for null values in each column
-                    for column in columns:
-                        # Ensure column name is quoted correctly for PostgreSQL
-                        quoted_column = f'"{column}"'
-
-                        null_query = text(f"""
-                            SELECT COUNT(*)
-                            FROM {quoted_table}
-                            WHERE {quoted_column} IS NULL
-                        """)
-                        null_count = connection.execute(null_query).scalar()
-
-                        if null_count > 0:
-                            self.log(f"Null values found in {quoted_table}.{quoted_column}: {null_count} null values.")
-                        else:
-                            self.log(f"No null values found in {quoted_table}.{quoted_column}.")
-                        
+            columns = self.list_columns(schema)
+            if not columns:
+                self.log(f"No tables found in schema '{schema}'.")
+                return []
+
+            checked_at = datetime.now()
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                futures = [
+                    executor.submit(self.check_table, schema, table, table_columns, checked_at)
+                    for table, table_columns in columns.items()
+                ]
+                results = [row for future in futures for row in future.result()]
+
+            self.save_results(schema, results)
+            self.log(f"Checked {len(results)} columns in {len(columns)} tables; results saved to {schema}.null_check_results.")
+            return results
         except Exception as e:
             self.log(f"Error during null value check: {str(e)}")
             raise
@@ -82,6 +247,7 @@ class NullChecker:
         """Run the null checker process."""
         self.log("Running NullChecker...")
         try:
+            CreateNullCheckResultsTable(self.db_uri, engine=self.engine).create_table()
             self.check_for_nulls()
             self.log("Null checking process completed successfully.")
         except Exception as e:
@@ -89,5 +255,18 @@ class NullChecker:
 
 
 if __name__ == "__main__":
-    null_checker = NullChecker()
+    parser = argparse.ArgumentParser(description="Count the NULLs in every column of the warehouse.")
+    parser.add_argument("--workers", type=int, default=4, help="Tables checked at once (default: 4).")
+    parser.add_argument("--approximate", action="store_true",
+                        help="Estimate null rates first and count exactly only the columns above --threshold.")
+    parser.add_argument("--estimate", choices=["sample", "stats"], default="sample",
+                        help="Estimate from a TABLESAMPLE (default) or from the pg_stats null fractions.")
+    parser.add_argument("--sample-percent", type=float, default=1.0,
+                        help="Percentage of table pages sampled (default: 1).")
+    parser.add_argument("--threshold", type=float, default=0.001,
+                        help="Null fraction whose upper 95%% bound triggers an exact count (default: 0.001).")
+    args = parser.parse_args()
+
+    null_checker = NullChecker(workers=args.workers, approximate=args.approximate, estimate=args.estimate,
+                               sample_percent=args.sample_percent, threshold=args.threshold)
     null_checker.run()
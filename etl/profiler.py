@@ -0,0 +1,283 @@
+import json
+import base64
+import numpy as np
+import pandas as pd
+
+# How each raw column is profiled. Raw values are coerced to the kind first, so chunks read
+# with pandas or openpyxl profile alike; values that do not coerce are counted as invalid.
+PROFILE_COLUMNS = {
+    "InvoiceNo": "text",
+    "InvoiceLine": "numeric",
+    "StockCode": "text",
+    "Description": "text",
+    "Quantity": "numeric",
+    "InvoiceDate": "datetime",
+    "UnitPrice": "numeric",
+    "CustomerID": "numeric",
+    "Country": "text",
+}
+
+# HyperLogLog with 2^12 registers: about 1.6% standard error on distinct counts
+HLL_PRECISION = 12
+
+class HyperLogLog:
+    """Mergeable distinct-count sketch; registers keep the longest run of leading zeros per bucket."""
+    def __init__(self, precision=HLL_PRECISION, registers=None):
+        self.precision = precision
+        self.registers = registers if registers is not None else np.zeros(1 << precision, dtype=np.uint8)
+
+    def update(self, hashes):
+        if not len(hashes):
+            return
+        buckets = (hashes >> np.uint64(64 - self.precision)).astype(np.int64)
+        # The next 32 bits give the rank; a uint32 converts to float64 exactly, so log2 is exact
+        bits = ((hashes >> np.uint64(32 - self.precision)) & np.uint64(0xFFFFFFFF)).astype(np.float64)
+        ranks = np.where(bits > 0, 32 - np.floor(np.log2(np.maximum(bits, 1))), 33).astype(np.uint8)
+        np.maximum.at(self.registers, buckets, ranks)
+
+    def merge(self, other):
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def estimate(self):
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(np.exp2(-self.registers.astype(np.float64)))
+        empty = np.count_nonzero(self.registers == 0)
+        # Linear counting is more accurate while many buckets are still empty
+        if raw <= 2.5 * m and empty:
+            return int(round(m * np.log(m / empty)))
+        return int(round(raw))
+
+    def to_dict(self):
+        return {"precision": self.precision, "registers": base64.b64encode(self.registers.tobytes()).decode("ascii")}
+
+    @classmethod
+    def from_dict(cls, data):
+        registers = np.frombuffer(base64.b64decode(data["registers"]), dtype=np.uint8).copy()
+        return cls(data["precision"], registers)
+
+class TopK:
+    """Misra-Gries heavy-hitter summary: counts are lower bounds, off by at most rows / capacity."""
+    def __init__(self, k=10, capacity=None, counts=None):
+        self.k = k
+        self.capacity = capacity or 10 * k
+        self.counts = counts or {}
+
+    def update(self, values):
+        chunk = values.value_counts(sort=False)
+        self._add(dict(zip(chunk.index.tolist(), chunk.tolist())))
+
+    def merge(self, other):
+        self._add(other.counts)
+
+    def _add(self, counts):
+        for value, count in counts.items():
+            self.counts[value] = self.counts.get(value, 0) + count
+        if len(self.counts) > self.capacity:
+            # Subtracting the (capacity + 1)-th largest count keeps the summary mergeable
+            cutoff = sorted(self.counts.values(), reverse=True)[self.capacity]
+            self.counts = {value: count - cutoff for value, count in self.counts.items() if count > cutoff}
+
+    def top(self):
+        return sorted(self.counts.items(), key=lambda item: item[1], reverse=True)[:self.k]
+
+    def to_dict(self):
+        return {"k": self.k, "capacity": self.capacity, "counts": [[value, count] for value, count in self.counts.items()]}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["k"], data["capacity"], {value: count for value, count in data["counts"]})
+
+class LogHistogram:
+    """Histogram of numeric values over power-of-two bins, by sign: [2^e, 2^(e+1)) and its negative."""
+    def __init__(self, bins=None):
+        self.bins = bins or {}  # (sign, exponent) -> count; zero is (0, 0)
+
+    def update(self, values):
+        values = values.to_numpy(dtype=np.float64)
+        values = values[np.isfinite(values)]
+        if not len(values):
+            return
+        signs = np.sign(values).astype(np.int64)
+        exponents = np.zeros(len(values), dtype=np.int64)
+        nonzero = signs != 0
+        exponents[nonzero] = np.floor(np.log2(np.abs(values[nonzero]))).astype(np.int64)
+        keys, counts = np.unique(np.stack([signs, exponents]), axis=1, return_counts=True)
+        for (sign, exponent), count in zip(keys.T.tolist(), counts.tolist()):
+            self._add((sign, exponent), count)
+
+    def merge(self, other):
+        for key, count in other.bins.items():
+            self._add(key, count)
+
+    def _add(self, key, count):
+        self.bins[key] = self.bins.get(key, 0) + count
+
+    def to_dict(self):
+        """Return the bins as sorted [low, high, count] triples."""
+        triples = []
+        for (sign, exponent), count in self.bins.items():
+            low, high = (0.0, 0.0) if sign == 0 else sorted((sign * 2.0 ** exponent, sign * 2.0 ** (exponent + 1)))
+            triples.append([low, high, count])
+        return sorted(triples)
+
+    @classmethod
+    def from_dict(cls, data):
+        bins = {}
+        for low, high, count in data:
+            if low == high == 0:
+                bins[(0, 0)] = count
+            elif low >= 0:
+                bins[(1, int(np.log2(low)))] = count
+            else:
+                bins[(-1, int(np.log2(-high)))] = count
+        return cls(bins)
+
+class ColumnProfile:
+    """Mergeable statistics of one column: counts, min/max, distinct estimate, top values and histogram."""
+    def __init__(self, name, kind):
+        self.name = name
+        self.kind = kind
+        self.rows = 0
+        self.nulls = 0
+        self.invalid = 0  # Present but not coercible to the column's kind
+        self.min = None
+        self.max = None
+        self.distinct = HyperLogLog()
+        self.top = TopK() if kind != "datetime" else None
+        self.histogram = LogHistogram() if kind == "numeric" else None
+
+    def coerce(self, values):
+        if self.kind == "numeric":
+            return pd.to_numeric(values, errors="coerce").astype(np.float64)
+        if self.kind == "datetime":
+            return pd.to_datetime(values, errors="coerce", format="mixed")
+        return values.where(values.isna(), values.astype(str))
+
+    def update(self, values):
+        """Add a Series of raw values."""
+        present = values.notna()
+        coerced = self.coerce(values)
+        valid = coerced[coerced.notna()]
+
+        self.rows += len(values)
+        self.nulls += int((~present).sum())
+        self.invalid += int(present.sum()) - len(valid)
+        if not len(valid):
+            return
+
+        self._extend(valid.min(), valid.max())
+        self.distinct.update(pd.util.hash_array(valid.to_numpy()))
+        if self.top is not None:
+            self.top.update(valid)
+        if self.histogram is not None:
+            self.histogram.update(valid)
+
+    def _extend(self, low, high):
+        self.min = low if self.min is None or low < self.min else self.min
+        self.max = high if self.max is None or high > self.max else self.max
+
+    def merge(self, other):
+        self.rows += other.rows
+        self.nulls += other.nulls
+        self.invalid += other.invalid
+        if other.min is not None:
+            self._extend(other.min, other.max)
+        self.distinct.merge(other.distinct)
+        if self.top is not None:
+            self.top.merge(other.top)
+        if self.histogram is not None:
+            self.histogram.merge(other.histogram)
+
+    def _value(self, value):
+        """Return a JSON-friendly form of a min, max or top value."""
+        if value is None:
+            return None
+        if self.kind == "datetime":
+            return pd.Timestamp(value).isoformat()
+        if self.kind == "numeric":
+            return float(value)
+        return value
+
+    def summary(self):
+        """Return the column's statistics as one data_profiles row."""
+        return {
+            "column": self.name,
+            "rows": self.rows,
+            "nulls": self.nulls,
+            "invalid": self.invalid,
+            "min": None if self.min is None else str(self._value(self.min)),
+            "max": None if self.max is None else str(self._value(self.max)),
+            "distinct": self.distinct.estimate(),
+            "top": None if self.top is None else json.dumps(
+                [[self._value(value), count] for value, count in self.top.top()]
+            ),
+            "histogram": None if self.histogram is None else json.dumps(self.histogram.to_dict()),
+        }
+
+    def to_dict(self):
+        return {
+            "kind": self.kind,
+            "rows": self.rows,
+            "nulls": self.nulls,
+            "invalid": self.invalid,
+            "min": self._value(self.min),
+            "max": self._value(self.max),
+            "distinct": self.distinct.to_dict(),
+            "top": self.top.to_dict() if self.top is not None else None,
+            "histogram": self.histogram.to_dict() if self.histogram is not None else None,
+        }
+
+    @classmethod
+    def from_dict(cls, name, data):
+        profile = cls(name, data["kind"])
+        profile.rows, profile.nulls, profile.invalid = data["rows"], data["nulls"], data["invalid"]
+        convert = pd.Timestamp if profile.kind == "datetime" else (lambda value: value)
+        if data["min"] is not None:
+            profile.min, profile.max = convert(data["min"]), convert(data["max"])
+        profile.distinct = HyperLogLog.from_dict(data["distinct"])
+        if data["top"] is not None:
+            profile.top = TopK.from_dict(data["top"])
+        if data["histogram"] is not None:
+            profile.histogram = LogHistogram.from_dict(data["histogram"])
+        return profile
+
+class DataProfile:
+    """Column profiles of a stream of raw frames, built in the same pass as the cleaning.
+
+    Profiles of chunks, files and runs merge into the profile of their union, and round-trip
+    through a JSON sidecar so worker processes can hand them to the loader.
+    """
+    def __init__(self, columns=None):
+        self.columns = {
+            name: ColumnProfile(name, kind) for name, kind in (columns or PROFILE_COLUMNS).items()
+        }
+
+    def update(self, df):
+        """Add the rows of a raw DataFrame."""
+        for name, profile in self.columns.items():
+            if name in df:
+                profile.update(df[name])
+
+    def merge(self, other):
+        for name, profile in other.columns.items():
+            if name in self.columns:
+                self.columns[name].merge(profile)
+            else:
+                self.columns[name] = profile
+
+    def rows(self):
+        """Return one summary dict per column, as stored in data_profiles."""
+        return [profile.summary() for profile in self.columns.values()]
+
+    def write(self, path):
+        with open(path, "w") as f:
+            json.dump({name: profile.to_dict() for name, profile in self.columns.items()}, f)
+
+    @classmethod
+    def read(cls, path):
+        with open(path) as f:
+            data = json.load(f)
+        profile = cls(columns={})
+        profile.columns = {name: ColumnProfile.from_dict(name, column) for name, column in data.items()}
+        return profile
@@ -0,0 +1,58 @@
+from etl.cleaned_layer import STAGING_COLUMNS
+
+class StagingTableManager:
+    """Create UNLOGGED staging tables with declared column types and swap them in atomically.
+
+    Data is loaded into a shadow table first; the live staging table is only replaced once the
+    load has finished, so readers never see a half-loaded stage.
+    """
+    def __init__(self, db_connection, schema="dw_online_retail", columns=None):
+        self.db_connection = db_connection
+        self.schema = schema
+        self.columns = columns or STAGING_COLUMNS
+
+    def shadow_name(self, table_name):
+        """Return the name of the shadow table loaded in place of table_name."""
+        return f"{table_name}__shadow"
+
+    def create_shadow(self, table_name):
+        """Create an empty UNLOGGED shadow table for table_name and return its qualified name."""
+        shadow = f"{self.schema}.{self.shadow_name(table_name)}"
+        column_definitions = ", ".join(
+            f'"{column}" {data_type}' for column, data_type in self.columns.items()
+        )
+
+        # UNLOGGED skips WAL for the bulk load; staging is rebuilt from the cleaned layer anyway
+        self._execute(
+            f"DROP TABLE IF EXISTS {shadow};",
+            f"CREATE UNLOGGED TABLE {shadow} ({column_definitions});",
+        )
+        return shadow
+
+    def swap_in(self, table_name):
+        """Replace table_name with its loaded shadow in a single transaction."""
+        shadow = f"{self.schema}.{self.shadow_name(table_name)}"
+
+        # Gather statistics before the swap so the exclusive lock is held only for the rename
+        self._execute(f"ANALYZE {shadow};")
+        self._execute(
+            # Both statements commit together, so readers see either the old or the new stage
+            f"DROP TABLE IF EXISTS {self.schema}.{table_name};",
+            f"ALTER TABLE {shadow} RENAME TO {table_name};",
+        )
+
+    def drop_shadow(self, table_name):
+        """Discard a shadow table left behind by a failed load."""
+        self._execute(f"DROP TABLE IF EXISTS {self.schema}.{self.shadow_name(table_name)};")
+
+    def _execute(self, *queries):
+        """Run the queries in one transaction, rolling back and re-raising on failure."""
+        connection = self.db_connection.connection
+        try:
+            with connection.cursor() as cursor:
+                for query in queries:
+                    cursor.execute(query)
+            connection.commit()
+        except Exception:
+            connection.rollback()
+            raise
@@ -0,0 +1,119 @@
+from collections import namedtuple
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from etl.cleaned_layer import CLEANED_SCHEMA, PARQUET_COMPRESSION
+
+# A rule rejects the rows for which check(typed, empty) is True. typed holds the values coerced
+# to their cleaned-layer types, with NaN/NaT where coercion failed; empty flags missing raw values.
+Rule = namedtuple("Rule", ["code", "check"])
+
+TEXT_COLUMNS = ["InvoiceNo", "StockCode", "Description", "Country"]
+INTEGER_COLUMNS = ["Quantity", "CustomerID"]
+
+def blank(values):
+    """Return True where a raw value is missing or an empty string."""
+    # Only text can be blank; object and string dtypes both hold text
+    if pd.api.types.is_numeric_dtype(values) or pd.api.types.is_datetime64_any_dtype(values):
+        return values.isna()
+    return values.isna() | values.astype(str).str.strip().eq("")
+
+def as_text(value):
+    """Return a raw value as text, writing integral floats without a trailing '.0'.
+
+    pandas reads an all-numeric column with a blank cell as float64, while openpyxl returns
+    ints, so 536365.0 and 536365 must give the same key.
+    """
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+def missing(column):
+    return lambda typed, empty: empty[column]
+
+def unparseable(column):
+    return lambda typed, empty: ~empty[column] & typed[column].isna()
+
+VALIDATION_RULES = [
+    Rule("missing_invoice_no", missing("InvoiceNo")),
+    Rule("missing_stock_code", missing("StockCode")),
+    Rule("missing_description", missing("Description")),
+    Rule("missing_quantity", missing("Quantity")),
+    Rule("missing_invoice_date", missing("InvoiceDate")),
+    Rule("missing_unit_price", missing("UnitPrice")),
+    Rule("missing_customer_id", missing("CustomerID")),
+    Rule("missing_country", missing("Country")),
+    # Values that would otherwise fail a cast in staging or in the insert classes
+    Rule("invalid_quantity", unparseable("Quantity")),
+    Rule("invalid_invoice_date", unparseable("InvoiceDate")),
+    Rule("invalid_unit_price", unparseable("UnitPrice")),
+    Rule("invalid_customer_id", unparseable("CustomerID")),
+    Rule("non_positive_unit_price", lambda typed, empty: typed["UnitPrice"] <= 0),
+    Rule("non_positive_quantity", lambda typed, empty: typed["Quantity"] <= 0),
+]
+
+def coerce_types(df, empty):
+    """Return df with its columns coerced to the cleaned-layer types; unparseable values become NaN/NaT."""
+    typed = df.copy()
+    for column in TEXT_COLUMNS:
+        typed[column] = df[column].astype(object).where(~empty[column], None).map(as_text, na_action="ignore")
+    for column in INTEGER_COLUMNS:
+        numbers = pd.to_numeric(df[column], errors="coerce")
+        # Fractional quantities or customer IDs are as unusable as text
+        typed[column] = numbers.where(numbers.mod(1).eq(0))
+    typed["UnitPrice"] = pd.to_numeric(df["UnitPrice"], errors="coerce")
+    typed["InvoiceDate"] = pd.to_datetime(df["InvoiceDate"], errors="coerce", format="mixed")
+    return typed
+
+def validate(df, rules=VALIDATION_RULES):
+    """Evaluate the rules over a raw frame in one pass.
+
+    Returns the typed valid rows, the raw rejected rows with a RejectReasons column of
+    ';'-separated rule codes, and the number of rows each rule rejected.
+    """
+    empty = pd.DataFrame({column: blank(df[column]) for column in df.columns}, index=df.index)
+    typed = coerce_types(df, empty)
+    reasons = np.full(len(df), "", dtype=object)
+    counts = {}
+    for rule in rules:
+        failed = rule.check(typed, empty).to_numpy(dtype=bool)
+        counts[rule.code] = int(failed.sum())
+        reasons[failed] += rule.code + ";"
+
+    rejected = reasons != ""
+    valid = typed[~rejected].astype({column: "int64" for column in INTEGER_COLUMNS})
+    quarantined = df[rejected].assign(RejectReasons=[reason.rstrip(";") for reason in reasons[rejected]])
+    return valid, quarantined, counts
+
+# Raw columns kept for a rejected row, followed by its reason codes
+QUARANTINE_COLUMNS = [column for column in CLEANED_SCHEMA.names if column != "RowHash"] + ["RejectReasons"]
+
+class QuarantineWriter:
+    """Append rejected rows, as text plus their reason codes, to a quarantine Parquet file."""
+    def __init__(self, output_file, columns=QUARANTINE_COLUMNS):
+        self.columns = columns
+        # Raw values can be of any type, so every column is stored as text
+        self.schema = pa.schema([(column, pa.string()) for column in self.columns])
+        self.writer = pq.ParquetWriter(output_file, self.schema, compression=PARQUET_COMPRESSION)
+        self.rows = 0
+
+    def write(self, rejected):
+        if not len(rejected):
+            return
+        table = {column: [None] * len(rejected) for column in self.columns}
+        for column in self.columns:
+            if column in rejected:
+                values = rejected[column]
+                table[column] = values.map(as_text).astype(object).where(values.notna(), None).tolist()
+        self.writer.write_table(pa.Table.from_pydict(table, schema=self.schema))
+        self.rows += len(rejected)
+
+    def close(self):
+        self.writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,47 @@
+import os
+from sqlalchemy import text
+from utils.engines import get_engine
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+class CreateDataProfilesTable:
+    def __init__(self, db_uri, engine=None):
+        self.db_uri = db_uri
+        self.engine = engine or get_engine(self.db_uri)
+        self.schema_name = 'dw_online_retail'
+
+    def create_table(self):
+        try:
+            with self.engine.connect() as connection:
+                create_table_query = text(f"""
+                    CREATE TABLE IF NOT EXISTS {self.schema_name}.data_profiles (
+                        ProfiledAt TIMESTAMP NOT NULL DEFAULT now(),
+                        SourceFile TEXT NOT NULL,  -- Cleaned file whose raw rows were profiled during transform
+                        ColumnName TEXT NOT NULL,
+                        RowCount BIGINT,
+                        NullCount BIGINT,
+                        InvalidCount BIGINT,  -- Present but not coercible to the column's type
+                        MinValue TEXT,
+                        MaxValue TEXT,
+                        DistinctEstimate BIGINT,  -- HyperLogLog estimate
+                        TopValues JSONB,  -- [[value, count], ...], counts are lower bounds
+                        Histogram JSONB,  -- [[low, high, count], ...] over power-of-two bins, numeric columns only
+                        PRIMARY KEY (SourceFile, ProfiledAt, ColumnName)
+                    );
+                """)
+                connection.execute(create_table_query)
+                connection.execute(text("COMMIT;"))
+
+                print("Table 'data_profiles' created successfully.")
+        except Exception as e:
+            print(f"Error creating table 'data_profiles': {str(e)}")
+
+if __name__ == "__main__":
+    db_uri = os.getenv('DATABASE_URL')
+    if db_uri:
+        creator = CreateDataProfilesTable(db_uri)
+        creator.create_table()
+    else:
+        print("DATABASE_URL is not set in the .env file")
@@ -1,11 +1,13 @@
 import os
-from sqlalchemy import create_engine, text
+from sqlalchemy import text
+from utils.engines import get_engine
 from dotenv import load_dotenv
+from models.create_tables.manage_indexes import IndexManager
 
 class CreateDimCustomersTable:
     def __init__(self, db_uri):
         self.db_uri = db_uri
-        self.engine = create_engine(self.db_uri)
+        self.engine = get_engine(self.db_uri)
         self.schema_name = 'dw_online_retail'
 
     def create_table(self):
@@ -21,6 +23,9 @@ class CreateDimCustomersTable:
                 connection.execute(text("COMMIT;"))
 
                 print("Table 'dim_customers' created successfully.")
+
+            # Secondary indexes for the dashboard queries
+            IndexManager(self.db_uri, engine=self.engine).create_indexes(["dim_customers"])
         except Exception as e:
             print(f"Error creating table 'dim_customers': {str(e)}")
 
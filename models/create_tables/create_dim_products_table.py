@@ -1,4 +1,5 @@
-from sqlalchemy import create_engine, text
+from sqlalchemy import text
+from utils.engines import get_engine
 import os
 from dotenv import load_dotenv
 
@@ -44,6 +45,6 @@ if __name__ == "__main__":
     if not db_uri:
         print("DATABASE_URL is not set in the .env file")
     else:
-        engine = create_engine(db_uri)
+        engine = get_engine(db_uri)
         dim_products = CreateDimProductsTable(engine)
         dim_products.create_table()
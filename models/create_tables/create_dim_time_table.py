@@ -1,14 +1,39 @@
 import os
-from sqlalchemy import create_engine, text
+import argparse
+from sqlalchemy import text
+from utils.engines import get_engine
 from dotenv import load_dotenv
+from utils.date_keys import SQL_DATE_KEY
 
 # Load environment variables
 load_dotenv()
 
+# Insert every day of the whole years from {start} to {end} (SQL expressions) into dim_time.
+# The calendar has no gaps, so any date between its first and last day has a TimeID.
+CALENDAR_QUERY = f"""
+    INSERT INTO {{schema}}.dim_time (TimeID, InvoiceDate, DayOfWeek, Month, Year, Quarter)
+    SELECT
+        {SQL_DATE_KEY.format(column="d")},
+        d,
+        TO_CHAR(d, 'Day'),
+        TO_CHAR(d, 'Month'),
+        EXTRACT(YEAR FROM d),
+        CONCAT('Q', EXTRACT(QUARTER FROM d))
+    FROM (
+        SELECT CAST(g AS DATE) AS d
+        FROM generate_series(
+            date_trunc('year', CAST({{start}} AS TIMESTAMP)),
+            date_trunc('year', CAST({{end}} AS TIMESTAMP)) + INTERVAL '1 year - 1 day',
+            INTERVAL '1 day'
+        ) AS g
+    ) days
+    ON CONFLICT DO NOTHING;
+"""
+
 class CreateDimTimeTable:
     def __init__(self, db_uri):
         self.db_uri = db_uri
-        self.engine = create_engine(self.db_uri)
+        self.engine = get_engine(self.db_uri)
         self.schema_name = 'dw_online_retail'
 
     def create_table(self):
@@ -16,8 +41,8 @@ class CreateDimTimeTable:
             with self.engine.connect() as connection:
                 create_table_query = text(f"""
                     CREATE TABLE IF NOT EXISTS {self.schema_name}.dim_time (
-                        TimeID SERIAL PRIMARY KEY,
-                        InvoiceDate DATE UNIQUE,  -- Add unique constraint here
+                        TimeID INTEGER PRIMARY KEY,  -- The day as YYYYMMDD, e.g. 20101201
+                        InvoiceDate DATE UNIQUE NOT NULL,  -- Add unique constraint here
                         DayOfWeek TEXT,
                         Month TEXT,
                         Year BIGINT,
@@ -27,14 +52,83 @@ class CreateDimTimeTable:
                 connection.execute(create_table_query)
                 connection.execute(text("COMMIT;"))
 
+                if self.uses_serial_keys(connection):
+                    print("Table 'dim_time' still has SERIAL TimeIDs; run with --migrate-to-date-keys.")
                 print("Table 'dim_time' created successfully.")
         except Exception as e:
             print(f"Error creating table 'dim_time': {str(e)}")
 
+    def uses_serial_keys(self, connection):
+        """Return True if dim_time was created with the old SERIAL TimeID."""
+        default = connection.execute(text("""
+            SELECT column_default FROM information_schema.columns
+            WHERE table_schema = :schema AND table_name = 'dim_time' AND column_name = 'timeid';
+        """), {"schema": self.schema_name}).scalar()
+        return bool(default and default.startswith("nextval"))
+
+    def populate(self, start, end):
+        """Add the calendar days of the whole years from start to end and return how many were new."""
+        with self.engine.begin() as connection:
+            result = connection.execute(
+                text(CALENDAR_QUERY.format(schema=self.schema_name, start=":start", end=":end")),
+                {"start": start, "end": end},
+            )
+        return result.rowcount
+
+    def migrate_to_date_keys(self):
+        """Re-key a dim_time with SERIAL TimeIDs, and the fact rows that reference it, to YYYYMMDD keys."""
+        try:
+            with self.engine.begin() as connection:
+                if not self.uses_serial_keys(connection):
+                    print("Table 'dim_time' already uses date keys.")
+                    return
+
+                # The foreign key is re-created once both sides use the new keys
+                connection.execute(text(f"ALTER TABLE {self.schema_name}.fact_sales DROP CONSTRAINT IF EXISTS fk_time;"))
+                result = connection.execute(text(f"""
+                    UPDATE {self.schema_name}.fact_sales f
+                    SET TimeID = {SQL_DATE_KEY.format(column="t.InvoiceDate")}
+                    FROM {self.schema_name}.dim_time t
+                    WHERE f.TimeID = t.TimeID;
+                """))
+                # SERIAL keys are far below any YYYYMMDD key, so the update cannot collide
+                connection.execute(text(f"""
+                    UPDATE {self.schema_name}.dim_time SET TimeID = {SQL_DATE_KEY.format(column="InvoiceDate")};
+                """))
+                connection.execute(text(f"ALTER TABLE {self.schema_name}.dim_time ALTER COLUMN TimeID DROP DEFAULT;"))
+                connection.execute(text(f"DROP SEQUENCE IF EXISTS {self.schema_name}.dim_time_timeid_seq;"))
+
+                # Fill the gaps between trading days so the calendar is complete
+                connection.execute(text(CALENDAR_QUERY.format(
+                    schema=self.schema_name,
+                    start=f"(SELECT MIN(InvoiceDate) FROM {self.schema_name}.dim_time)",
+                    end=f"(SELECT MAX(InvoiceDate) FROM {self.schema_name}.dim_time)",
+                )))
+                connection.execute(text(f"""
+                    ALTER TABLE {self.schema_name}.fact_sales ADD CONSTRAINT fk_time
+                    FOREIGN KEY (TimeID) REFERENCES {self.schema_name}.dim_time(TimeID);
+                """))
+            print(f"Re-keyed dim_time and {result.rowcount} fact_sales rows to YYYYMMDD TimeIDs.")
+        except Exception as e:
+            print(f"Error migrating table 'dim_time': {str(e)}")
+            raise
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Create the dim_time calendar table.")
+    parser.add_argument("--migrate-to-date-keys", action="store_true",
+                        help="Re-key an existing dim_time with SERIAL TimeIDs to YYYYMMDD keys.")
+    parser.add_argument("--populate", nargs=2, metavar=("START", "END"),
+                        help="Also generate the calendar for the whole years from START to END (YYYY-MM-DD).")
+    args = parser.parse_args()
+
     db_uri = os.getenv('DATABASE_URL')
     if db_uri:
         creator = CreateDimTimeTable(db_uri)
-        creator.create_table()
+        if args.migrate_to_date_keys:
+            creator.migrate_to_date_keys()
+        else:
+            creator.create_table()
+        if args.populate:
+            print(f"Inserted {creator.populate(*args.populate)} days into dim_time.")
     else:
         print("DATABASE_URL is not set in the .env file")
@@ -0,0 +1,41 @@
+import os
+from sqlalchemy import text
+from utils.engines import get_engine
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+class CreateFactLoadCheckpointsTable:
+    def __init__(self, db_uri):
+        self.db_uri = db_uri
+        self.engine = get_engine(self.db_uri)
+        self.schema_name = 'dw_online_retail'
+
+    def create_table(self):
+        try:
+            with self.engine.connect() as connection:
+                create_table_query = text(f"""
+                    CREATE TABLE IF NOT EXISTS {self.schema_name}.fact_load_checkpoints (
+                        LoadBatchID BIGINT NOT NULL,  -- Batch the chunk belongs to, see load_batches
+                        FirstPage BIGINT NOT NULL,  -- Staging pages [FirstPage, LastPage) covered by the chunk
+                        LastPage BIGINT NOT NULL,
+                        RowsInserted BIGINT,
+                        CommittedAt TIMESTAMP NOT NULL DEFAULT now(),
+                        PRIMARY KEY (LoadBatchID, FirstPage)
+                    );
+                """)
+                connection.execute(create_table_query)
+                connection.execute(text("COMMIT;"))
+
+                print("Table 'fact_load_checkpoints' created successfully.")
+        except Exception as e:
+            print(f"Error creating table 'fact_load_checkpoints': {str(e)}")
+
+if __name__ == "__main__":
+    db_uri = os.getenv('DATABASE_URL')
+    if db_uri:
+        creator = CreateFactLoadCheckpointsTable(db_uri)
+        creator.create_table()
+    else:
+        print("DATABASE_URL is not set in the .env file")
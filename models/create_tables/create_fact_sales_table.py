@@ -1,44 +1,167 @@
 import os
-from sqlalchemy import create_engine, text
+import argparse
+from sqlalchemy import text
+from utils.engines import get_engine
 from dotenv import load_dotenv
+from models.create_tables.manage_indexes import IndexManager
+from models.create_tables.manage_partitions import PartitionManager
+from models.create_tables.create_dim_time_table import CreateDimTimeTable
+from models.create_tables.create_load_batches_table import CreateLoadBatchesTable
+from models.create_tables.create_fact_load_checkpoints_table import CreateFactLoadCheckpointsTable
 
 # Load environment variables
 load_dotenv()
 
 class CreateFactSalesTable:
-    def __init__(self, db_uri):
+    def __init__(self, db_uri, partitioned=True):
         self.db_uri = db_uri
-        self.engine = create_engine(self.db_uri)
+        self.engine = get_engine(self.db_uri)
         self.schema_name = 'dw_online_retail'
+        self.partitioned = partitioned  # Range-partition new tables by month of TimeID
+
+    def _create_query(self):
+        """Return the CREATE TABLE statement for fact_sales, partitioned or not."""
+        if self.partitioned:
+            # Keys of a partitioned table must include the partition key
+            primary_key = "PRIMARY KEY (SalesID, TimeID)"
+            partition_clause = " PARTITION BY RANGE (TimeID)"
+        else:
+            primary_key = "PRIMARY KEY (SalesID)"
+            partition_clause = ""
+
+        return f"""
+            CREATE TABLE IF NOT EXISTS {self.schema_name}.fact_sales (
+                SalesID SERIAL,
+                ProductID TEXT,  -- Changed to TEXT, will reference dim_products
+                CustomerID BIGINT,  -- Will reference dim_customers
+                TimeID INTEGER NOT NULL,  -- Will reference dim_time; the day as YYYYMMDD and the partition key
+                Quantity INT,
+                UnitPrice DOUBLE PRECISION,
+                TotalAmount DOUBLE PRECISION,
+                InvoiceNo TEXT,  -- Natural key of the source line: invoice number
+                InvoiceLine INT,  -- and line position within the invoice
+                LoadBatchID BIGINT,  -- Load batch that inserted the row
+                RowHash BIGINT,  -- Content hash of the source row, computed during transform
+                {primary_key},
+                CONSTRAINT fk_product FOREIGN KEY (ProductID) REFERENCES {self.schema_name}.dim_products(ProductID),
+                CONSTRAINT fk_customer FOREIGN KEY (CustomerID) REFERENCES {self.schema_name}.dim_customers(CustomerID),
+                CONSTRAINT fk_time FOREIGN KEY (TimeID) REFERENCES {self.schema_name}.dim_time(TimeID)
+            ){partition_clause};
+        """
+
+    def _line_key_query(self):
+        """Return the CREATE statement for the unique line key that lets re-runs skip loaded rows."""
+        # An invoice has a single date, so adding the partition key keeps lines unique
+        columns = "InvoiceNo, InvoiceLine, TimeID" if self.partitioned else "InvoiceNo, InvoiceLine"
+        return f"""
+            CREATE UNIQUE INDEX IF NOT EXISTS fact_sales_line_key
+            ON {self.schema_name}.fact_sales ({columns});
+        """
+
+    def _row_hash_key_query(self):
+        """Return the CREATE statement for the unique content-hash key that skips repeated source rows."""
+        # Equal rows have equal dates, so adding the partition key keeps hashes unique
+        columns = "RowHash, TimeID" if self.partitioned else "RowHash"
+        return f"""
+            CREATE UNIQUE INDEX IF NOT EXISTS fact_sales_row_hash_key
+            ON {self.schema_name}.fact_sales ({columns});
+        """
 
     def create_table(self):
+        # Every fact load opens a load batch, and chunked loads record their checkpoints
+        CreateLoadBatchesTable(self.db_uri).create_table()
+        CreateFactLoadCheckpointsTable(self.db_uri).create_table()
         try:
             with self.engine.connect() as connection:
-                create_table_query = text(f"""
-                    CREATE TABLE IF NOT EXISTS {self.schema_name}.fact_sales (
-                        SalesID SERIAL PRIMARY KEY,
-                        ProductID TEXT,  -- Changed to TEXT, will reference dim_products
-                        CustomerID BIGINT,  -- Will reference dim_customers
-                        TimeID BIGINT,  -- Will reference dim_time
-                        Quantity INT,
-                        UnitPrice DOUBLE PRECISION,
-                        TotalAmount DOUBLE PRECISION,
-                        CONSTRAINT fk_product FOREIGN KEY (ProductID) REFERENCES {self.schema_name}.dim_products(ProductID),
-                        CONSTRAINT fk_customer FOREIGN KEY (CustomerID) REFERENCES {self.schema_name}.dim_customers(CustomerID),
-                        CONSTRAINT fk_time FOREIGN KEY (TimeID) REFERENCES {self.schema_name}.dim_time(TimeID)
-                    );
-                """)
-                connection.execute(create_table_query)
+                exists = connection.execute(text("SELECT to_regclass(:table) IS NOT NULL;"),
+                                            {"table": f"{self.schema_name}.fact_sales"}).scalar()
+                if exists:
+                    # Existing tables keep their layout; see migrate_to_partitioned
+                    self.partitioned = PartitionManager(self.db_uri, engine=self.engine).is_partitioned(connection)
+                else:
+                    connection.execute(text(self._create_query()))
+
+                # Bring tables created before the natural key existed up to date
+                for column, data_type in [("InvoiceNo", "TEXT"), ("InvoiceLine", "INT"), ("LoadBatchID", "BIGINT"),
+                                          ("RowHash", "BIGINT")]:
+                    connection.execute(text(
+                        f"ALTER TABLE {self.schema_name}.fact_sales ADD COLUMN IF NOT EXISTS {column} {data_type};"
+                    ))
+
+                connection.execute(text(self._line_key_query()))
+                connection.execute(text(self._row_hash_key_query()))
                 connection.execute(text("COMMIT;"))
 
                 print("Table 'fact_sales' created successfully.")
+
+            # Secondary indexes for the dashboard queries
+            IndexManager(self.db_uri, engine=self.engine).create_indexes(["fact_sales"])
         except Exception as e:
             print(f"Error creating table 'fact_sales': {str(e)}")
 
+    def migrate_to_partitioned(self):
+        """Rebuild an unpartitioned fact_sales as a monthly partitioned table, in one transaction."""
+        partition_manager = PartitionManager(self.db_uri, engine=self.engine)
+        index_manager = IndexManager(self.db_uri, engine=self.engine)
+        self.partitioned = True
+        try:
+            with self.engine.begin() as connection:
+                if partition_manager.is_partitioned(connection):
+                    print("Table 'fact_sales' is already partitioned.")
+                    return
+                # Monthly TimeID ranges only line up with months once TimeIDs are dates
+                if CreateDimTimeTable(self.db_uri).uses_serial_keys(connection):
+                    raise ValueError("dim_time still has SERIAL TimeIDs; run create_dim_time_table --migrate-to-date-keys first")
+
+                # Index names are unique per schema, so the old table's indexes are moved out of the way
+                for name in index_manager.indexes["fact_sales"]:
+                    connection.execute(text(f"DROP INDEX IF EXISTS {self.schema_name}.{name};"))
+                connection.execute(text(f"ALTER TABLE {self.schema_name}.fact_sales RENAME TO fact_sales_unpartitioned;"))
+                connection.execute(text(f"ALTER INDEX IF EXISTS {self.schema_name}.fact_sales_line_key RENAME TO fact_sales_unpartitioned_line_key;"))
+                connection.execute(text(f"ALTER INDEX IF EXISTS {self.schema_name}.fact_sales_row_hash_key RENAME TO fact_sales_unpartitioned_row_hash_key;"))
+                connection.execute(text(f"ALTER TABLE {self.schema_name}.fact_sales_unpartitioned RENAME CONSTRAINT fact_sales_pkey TO fact_sales_unpartitioned_pkey;"))
+
+                connection.execute(text(self._create_query()))
+                connection.execute(text(self._line_key_query()))
+                connection.execute(text(self._row_hash_key_query()))
+                # The indexes are built once the rows are copied, not maintained row by row
+                partition_manager.ensure_partitions_for(
+                    "fact_sales_unpartitioned", "to_date(CAST(TimeID AS TEXT), 'YYYYMMDD')", connection, indexes=False
+                )
+
+                columns = "SalesID, ProductID, CustomerID, TimeID, Quantity, UnitPrice, TotalAmount, InvoiceNo, InvoiceLine, LoadBatchID, RowHash"
+                result = connection.execute(text(f"""
+                    INSERT INTO {self.schema_name}.fact_sales ({columns})
+                    SELECT {columns} FROM {self.schema_name}.fact_sales_unpartitioned;
+                """))
+
+                # New rows continue after the copied SalesIDs
+                connection.execute(text(f"""
+                    SELECT setval(pg_get_serial_sequence('{self.schema_name}.fact_sales', 'salesid'),
+                                  COALESCE(MAX(SalesID), 0) + 1, false)
+                    FROM {self.schema_name}.fact_sales;
+                """))
+                connection.execute(text(f"DROP TABLE {self.schema_name}.fact_sales_unpartitioned;"))
+            print(f"Moved {result.rowcount} rows into the partitioned 'fact_sales'.")
+
+            index_manager.create_indexes(["fact_sales"])
+        except Exception as e:
+            print(f"Error partitioning table 'fact_sales': {str(e)}")
+            raise
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Create the fact_sales table.")
+    parser.add_argument("--unpartitioned", action="store_true", help="Create fact_sales as a single heap table.")
+    parser.add_argument("--migrate-to-partitioned", action="store_true",
+                        help="Rebuild an existing unpartitioned fact_sales as a monthly partitioned table.")
+    args = parser.parse_args()
+
     db_uri = os.getenv('DATABASE_URL')
     if db_uri:
-        creator = CreateFactSalesTable(db_uri)
-        creator.create_table()
+        creator = CreateFactSalesTable(db_uri, partitioned=not args.unpartitioned)
+        if args.migrate_to_partitioned:
+            creator.migrate_to_partitioned()
+        else:
+            creator.create_table()
     else:
         print("DATABASE_URL is not set in the .env file")
@@ -0,0 +1,46 @@
+import os
+from sqlalchemy import text
+from utils.engines import get_engine
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+class CreateLoadBatchesTable:
+    def __init__(self, db_uri):
+        self.db_uri = db_uri
+        self.engine = get_engine(self.db_uri)
+        self.schema_name = 'dw_online_retail'
+
+    def create_table(self):
+        try:
+            with self.engine.connect() as connection:
+                create_table_query = text(f"""
+                    CREATE TABLE IF NOT EXISTS {self.schema_name}.load_batches (
+                        LoadBatchID BIGSERIAL PRIMARY KEY,
+                        StartedAt TIMESTAMP NOT NULL DEFAULT now(),
+                        FinishedAt TIMESTAMP,  -- NULL while the batch is running or if it failed
+                        RowsInserted BIGINT,
+                        StagingOID OID,  -- Staging table a chunked load reads, so it is only resumed on the same data
+                        StagedRows BIGINT,  -- Rows in that staging table when the batch opened, checked on resume
+                        ChunkPages BIGINT  -- Staging pages per chunk, fixed when the batch opens so a resume reuses its boundaries
+                    );
+                """)
+                connection.execute(create_table_query)
+                for column, data_type in [("StagingOID", "OID"), ("StagedRows", "BIGINT"), ("ChunkPages", "BIGINT")]:
+                    connection.execute(text(
+                        f"ALTER TABLE {self.schema_name}.load_batches ADD COLUMN IF NOT EXISTS {column} {data_type};"
+                    ))
+                connection.execute(text("COMMIT;"))
+
+                print("Table 'load_batches' created successfully.")
+        except Exception as e:
+            print(f"Error creating table 'load_batches': {str(e)}")
+
+if __name__ == "__main__":
+    db_uri = os.getenv('DATABASE_URL')
+    if db_uri:
+        creator = CreateLoadBatchesTable(db_uri)
+        creator.create_table()
+    else:
+        print("DATABASE_URL is not set in the .env file")
@@ -0,0 +1,52 @@
+import os
+from sqlalchemy import text
+from utils.engines import get_engine
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+class CreateNullCheckResultsTable:
+    def __init__(self, db_uri, engine=None):
+        self.db_uri = db_uri
+        self.engine = engine or get_engine(self.db_uri)
+        self.schema_name = 'dw_online_retail'
+
+    def create_table(self):
+        try:
+            with self.engine.connect() as connection:
+                create_table_query = text(f"""
+                    CREATE TABLE IF NOT EXISTS {self.schema_name}.null_check_results (
+                        CheckedAt TIMESTAMP NOT NULL,  -- Start of the NullChecker run
+                        TableName TEXT NOT NULL,
+                        ColumnName TEXT NOT NULL,
+                        RowCount BIGINT,  -- Estimated unless Method is 'exact'
+                        NullCount BIGINT,  -- NULL for estimates
+                        Method TEXT NOT NULL DEFAULT 'exact',  -- 'exact', 'sample' (TABLESAMPLE) or 'stats' (pg_stats)
+                        NullFraction DOUBLE PRECISION,
+                        NullFractionLow DOUBLE PRECISION,  -- 95% confidence bounds of an estimated NullFraction
+                        NullFractionHigh DOUBLE PRECISION,
+                        PRIMARY KEY (CheckedAt, TableName, ColumnName)
+                    );
+                """)
+                connection.execute(create_table_query)
+
+                # Bring tables created before approximate checks existed up to date
+                for column, data_type in [("Method", "TEXT NOT NULL DEFAULT 'exact'"), ("NullFraction", "DOUBLE PRECISION"),
+                                          ("NullFractionLow", "DOUBLE PRECISION"), ("NullFractionHigh", "DOUBLE PRECISION")]:
+                    connection.execute(text(
+                        f"ALTER TABLE {self.schema_name}.null_check_results ADD COLUMN IF NOT EXISTS {column} {data_type};"
+                    ))
+                connection.execute(text("COMMIT;"))
+
+                print("Table 'null_check_results' created successfully.")
+        except Exception as e:
+            print(f"Error creating table 'null_check_results': {str(e)}")
+
+if __name__ == "__main__":
+    db_uri = os.getenv('DATABASE_URL')
+    if db_uri:
+        creator = CreateNullCheckResultsTable(db_uri)
+        creator.create_table()
+    else:
+        print("DATABASE_URL is not set in the .env file")
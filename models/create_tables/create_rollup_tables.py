@@ -0,0 +1,78 @@
+import os
+from sqlalchemy import text
+from utils.engines import get_engine
+from dotenv import load_dotenv
+from models.insert_tables.refresh_rollups import RefreshRollups
+
+# Load environment variables
+load_dotenv()
+
+class CreateRollupTables:
+    def __init__(self, db_uri):
+        self.db_uri = db_uri
+        self.engine = get_engine(self.db_uri)
+        self.schema_name = 'dw_online_retail'
+
+    def create_tables(self):
+        """Create the dashboard rollups and, if any were missing, build them from fact_sales."""
+        try:
+            with self.engine.begin() as connection:
+                missing = connection.execute(text(
+                    "SELECT to_regclass(:table) IS NULL;"
+                ), {"table": f"{self.schema_name}.agg_sales_daily_country"}).scalar()
+
+                connection.execute(text(f"""
+                    CREATE TABLE IF NOT EXISTS {self.schema_name}.agg_sales_daily_country (
+                        TimeID INTEGER NOT NULL,  -- YYYYMMDD, as in dim_time
+                        Country TEXT,
+                        TotalSales DOUBLE PRECISION,
+                        TotalQuantity BIGINT
+                    );
+                """))
+                connection.execute(text(f"""
+                    CREATE INDEX IF NOT EXISTS agg_sales_daily_country_key
+                    ON {self.schema_name}.agg_sales_daily_country (TimeID, Country);
+                """))
+
+                connection.execute(text(f"""
+                    CREATE TABLE IF NOT EXISTS {self.schema_name}.agg_quantity_daily_product (
+                        TimeID INTEGER NOT NULL,
+                        ProductID TEXT,
+                        TotalQuantity BIGINT
+                    );
+                """))
+                connection.execute(text(f"""
+                    CREATE INDEX IF NOT EXISTS agg_quantity_daily_product_key
+                    ON {self.schema_name}.agg_quantity_daily_product (TimeID, ProductID);
+                """))
+
+                connection.execute(text(f"""
+                    CREATE TABLE IF NOT EXISTS {self.schema_name}.agg_sales_monthly_weekday_country (
+                        MonthID INTEGER NOT NULL,  -- YYYYMM
+                        Month TEXT,
+                        DayOfWeek TEXT,
+                        Country TEXT,
+                        TotalSales DOUBLE PRECISION,
+                        TotalQuantity BIGINT
+                    );
+                """))
+                connection.execute(text(f"""
+                    CREATE INDEX IF NOT EXISTS agg_sales_monthly_weekday_country_key
+                    ON {self.schema_name}.agg_sales_monthly_weekday_country (MonthID, Country);
+                """))
+
+                # Build new rollups in the same transaction, so charts never see them empty
+                if missing:
+                    RefreshRollups(self.db_uri, engine=self.engine).refresh(connection=connection)
+
+            print("Rollup tables created successfully.")
+        except Exception as e:
+            print(f"Error creating rollup tables: {str(e)}")
+
+if __name__ == "__main__":
+    db_uri = os.getenv('DATABASE_URL')
+    if db_uri:
+        creator = CreateRollupTables(db_uri)
+        creator.create_tables()
+    else:
+        print("DATABASE_URL is not set in the .env file")
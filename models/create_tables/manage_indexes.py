@@ -0,0 +1,218 @@
+import os
+import argparse
+from contextlib import contextmanager
+from sqlalchemy import text
+from utils.engines import get_engine
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Secondary indexes of the warehouse, per table: name -> indexed columns.
+# Primary keys and unique keys (e.g. fact_sales_line_key) are constraints the loads rely on
+# and are never listed here, so they are never dropped.
+WAREHOUSE_INDEXES = {
+    "fact_sales": {
+        "fact_sales_product_idx": "ProductID",
+        "fact_sales_customer_idx": "CustomerID",
+        "fact_sales_time_idx": "TimeID",
+    },
+    "dim_customers": {
+        # Country filters resolve to CustomerIDs with an index-only scan
+        "dim_customers_country_idx": "Country, CustomerID",
+    },
+}
+
+# Drop the indexes when a load adds more than this share of the table's current rows
+DROP_INDEX_RATIO = 0.2
+
+class IndexManager:
+    """Create the warehouse's secondary indexes and drop them around large bulk loads.
+
+    Maintaining a B-tree per inserted row is slower than building it once from sorted data, so
+    large loads run without the secondary indexes and rebuild them afterwards, optionally with
+    CONCURRENTLY so dashboard queries are not blocked while the indexes are rebuilt.
+
+    A partitioned table keeps its secondary indexes on each partition instead of on the parent,
+    named after the partition (fact_sales_product_idx becomes fact_sales_201012_product_idx).
+    A load then only drops and rebuilds the indexes of the partitions it writes to, and those
+    are plain tables, so CONCURRENTLY stays available.
+    """
+    def __init__(self, db_uri, engine=None, indexes=None, maintenance_work_mem="256MB"):
+        self.db_uri = db_uri
+        self.engine = engine or get_engine(self.db_uri)
+        self.schema_name = 'dw_online_retail'
+        self.indexes = indexes or WAREHOUSE_INDEXES
+        self.maintenance_work_mem = maintenance_work_mem
+
+    def _tables(self, tables):
+        return list(self.indexes) if tables is None else list(tables)
+
+    def _partitions(self, connection, table):
+        """Return the partitions of table, or None if it is not a partitioned table."""
+        partitioned = connection.execute(text(
+            "SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(:table);"
+        ), {"table": f"{self.schema_name}.{table}"}).scalar()
+        if not partitioned:
+            return None
+        return list(connection.execute(text("""
+            SELECT c.relname
+            FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = to_regclass(:table)
+            ORDER BY c.relname;
+        """), {"table": f"{self.schema_name}.{table}"}).scalars())
+
+    def partition_indexes(self, table, partition):
+        """Return the secondary indexes of one partition of table: name -> indexed columns."""
+        return {f"{partition}{name[len(table):]}": columns for name, columns in self.indexes.get(table, {}).items()}
+
+    def _targets(self, connection, table, partitions=None):
+        """Return (relation, indexes) pairs holding the secondary indexes of table.
+
+        For a partitioned table these are its partitions, limited to partitions if given.
+        """
+        existing = self._partitions(connection, table)
+        if existing is None:
+            return [(table, self.indexes.get(table, {}))]
+        if partitions is not None:
+            existing = [partition for partition in existing if partition in partitions]
+        return [(partition, self.partition_indexes(table, partition)) for partition in existing]
+
+    def create_indexes(self, tables=None, concurrently=False, partitions=None):
+        """Create the missing secondary indexes of tables (all tables by default).
+
+        partitions limits a partitioned table to the named partitions.
+        """
+        keyword = "CONCURRENTLY " if concurrently else ""
+        # CONCURRENTLY cannot run inside a transaction block
+        with self.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+            connection.execute(text(f"SET maintenance_work_mem = '{self.maintenance_work_mem}';"))
+            try:
+                for table in self._tables(tables):
+                    scope = partitions
+                    parent_indexes = self._parent_indexes(connection, table)
+                    if parent_indexes and self._partitions(connection, table) is not None:
+                        # Indexes created on the parent before they moved to the partitions; dropping
+                        # them drops them on every partition, so every partition is rebuilt
+                        for name in parent_indexes:
+                            connection.execute(text(f"DROP INDEX IF EXISTS {self.schema_name}.{name};"))
+                        scope = None
+
+                    for relation, indexes in self._targets(connection, table, scope):
+                        self.create_relation_indexes(connection, relation, indexes, keyword)
+                    print(f"Indexes on '{table}' created successfully.")
+            finally:
+                # The connection goes back to the shared engine's pool, so the setting must not outlive the build
+                connection.execute(text("RESET maintenance_work_mem;"))
+
+    def create_relation_indexes(self, connection, relation, indexes, keyword=""):
+        """Create the given indexes (name -> columns) on one table or partition of the schema."""
+        # A failed concurrent build leaves an INVALID index that IF NOT EXISTS would keep
+        for name in self._invalid_indexes(connection, relation, indexes):
+            connection.execute(text(f"DROP INDEX IF EXISTS {self.schema_name}.{name};"))
+
+        for name, columns in indexes.items():
+            connection.execute(text(f"""
+                CREATE INDEX {keyword}IF NOT EXISTS {name}
+                ON {self.schema_name}.{relation} ({columns});
+            """))
+
+    def drop_indexes(self, tables=None, concurrently=False, partitions=None):
+        """Drop the secondary indexes of tables (all tables by default).
+
+        partitions limits a partitioned table to the named partitions.
+        """
+        keyword = "CONCURRENTLY " if concurrently else ""
+        with self.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+            for table in self._tables(tables):
+                for relation, indexes in self._targets(connection, table, partitions):
+                    for name in indexes:
+                        connection.execute(text(
+                            f"DROP INDEX {keyword}IF EXISTS {self.schema_name}.{name};"
+                        ))
+                print(f"Indexes on '{table}' dropped.")
+
+    def _parent_indexes(self, connection, table):
+        """Return the declared indexes of table that exist on the table itself."""
+        result = connection.execute(text("""
+            SELECT c.relname
+            FROM pg_index i
+            JOIN pg_class c ON c.oid = i.indexrelid
+            WHERE i.indrelid = to_regclass(:table);
+        """), {"table": f"{self.schema_name}.{table}"})
+        return [row[0] for row in result if row[0] in self.indexes.get(table, {})]
+
+    def _invalid_indexes(self, connection, relation, indexes):
+        """Return the given indexes of relation that exist but are marked invalid."""
+        result = connection.execute(text("""
+            SELECT c.relname
+            FROM pg_index i
+            JOIN pg_class c ON c.oid = i.indexrelid
+            WHERE i.indrelid = to_regclass(:table) AND NOT i.indisvalid;
+        """), {"table": f"{self.schema_name}.{relation}"})
+        return [row[0] for row in result if row[0] in indexes]
+
+    def estimate_rows(self, table, partitions=None):
+        """Return the planner's row estimate for a table of the schema, 0 if it is unknown.
+
+        A partitioned table is never analyzed by autovacuum, so its estimate is the sum over its
+        partitions, or over the named partitions only.
+        """
+        with self.engine.connect() as connection:
+            rows = connection.execute(text("""
+                SELECT SUM(GREATEST(c.reltuples, 0))::bigint
+                FROM pg_class c
+                WHERE (c.oid = to_regclass(:table) AND CAST(:partitions AS TEXT[]) IS NULL)
+                OR c.oid IN (
+                    SELECT i.inhrelid FROM pg_inherits i
+                    JOIN pg_class p ON p.oid = i.inhrelid
+                    WHERE i.inhparent = to_regclass(:table)
+                    AND (CAST(:partitions AS TEXT[]) IS NULL OR p.relname = ANY(CAST(:partitions AS TEXT[])))
+                );
+            """), {"table": f"{self.schema_name}.{table}", "partitions": partitions}).scalar()
+        # reltuples is -1 for a table that has never been analyzed
+        return max(rows or 0, 0)
+
+    def is_large_load(self, table, incoming_rows, ratio=DROP_INDEX_RATIO, partitions=None):
+        """Return True if loading incoming_rows into table (or its named partitions) is worth dropping its indexes."""
+        return incoming_rows > ratio * self.estimate_rows(table, partitions)
+
+    @contextmanager
+    def bulk_load(self, tables, incoming_rows=None, concurrently=False, partitions=None):
+        """Drop the indexes of tables for the duration of a load and rebuild them afterwards.
+
+        With incoming_rows, the indexes are only dropped if the load is large for every table.
+        partitions limits a partitioned table to the partitions the load writes to, both for
+        that decision and for the drop and rebuild.
+        The indexes are rebuilt even if the load fails, so queries never run without them.
+        """
+        tables = list(tables)
+        if incoming_rows is not None and not all(
+            self.is_large_load(table, incoming_rows, partitions=partitions) for table in tables
+        ):
+            yield False
+            return
+
+        self.drop_indexes(tables, concurrently=concurrently, partitions=partitions)
+        try:
+            yield True
+        finally:
+            self.create_indexes(tables, concurrently=concurrently, partitions=partitions)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Create or drop the warehouse's secondary indexes.")
+    parser.add_argument("action", choices=["create", "drop"])
+    parser.add_argument("--tables", nargs="+", choices=list(WAREHOUSE_INDEXES), help="Tables to act on (default: all).")
+    parser.add_argument("--concurrently", action="store_true", help="Build or drop without blocking queries.")
+    args = parser.parse_args()
+
+    db_uri = os.getenv('DATABASE_URL')
+    if db_uri:
+        manager = IndexManager(db_uri)
+        if args.action == "create":
+            manager.create_indexes(args.tables, concurrently=args.concurrently)
+        else:
+            manager.drop_indexes(args.tables, concurrently=args.concurrently)
+    else:
+        print("DATABASE_URL is not set in the .env file")
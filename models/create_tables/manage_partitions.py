@@ -0,0 +1,116 @@
+import os
+import threading
+from datetime import date
+from sqlalchemy import text
+from utils.engines import get_engine
+from dotenv import load_dotenv
+from utils.date_keys import date_key
+from models.create_tables.manage_indexes import IndexManager
+
+# Load environment variables
+load_dotenv()
+
+class PartitionManager:
+    """Create the monthly range partitions of fact_sales that incoming data needs.
+
+    fact_sales is partitioned on its YYYYMMDD TimeID with one partition per calendar month, named
+    fact_sales_YYYYMM. Partitions are created on demand before each load, so a TimeID range
+    filter only touches the months it covers, and get their secondary indexes from IndexManager
+    as they are created. On an unpartitioned fact_sales every method is a no-op.
+    """
+    def __init__(self, db_uri, engine=None, table_name="fact_sales"):
+        self.db_uri = db_uri
+        self.engine = engine or get_engine(self.db_uri)
+        self.schema_name = 'dw_online_retail'
+        self.table_name = table_name
+        self._lock = threading.Lock()  # Concurrent loads must not race to create the same partition
+
+    @staticmethod
+    def month_start(day):
+        """Return the first day of the month of day."""
+        return date(day.year, day.month, 1)
+
+    @staticmethod
+    def next_month(month):
+        """Return the first day of the month after month."""
+        return date(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+    def partition_name(self, month):
+        return f"{self.table_name}_{month.year}{month.month:02d}"
+
+    def is_partitioned(self, connection):
+        """Return True if the table is a partitioned table."""
+        return bool(connection.execute(text(
+            "SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(:table);"
+        ), {"table": f"{self.schema_name}.{self.table_name}"}).scalar())
+
+    def ensure_partitions(self, days, connection=None, indexes=True):
+        """Create the monthly partitions covering days that do not exist yet and return their names.
+
+        With connection, the partitions are created in its transaction; otherwise in a transaction of their own.
+        New partitions are empty, so their secondary indexes are built with them unless indexes is False.
+        """
+        if connection is None:
+            with self._lock, self.engine.begin() as connection:
+                return self.ensure_partitions(days, connection, indexes)
+
+        if not self.is_partitioned(connection):
+            return []
+
+        created = []
+        for month in sorted({self.month_start(day) for day in days}):
+            name = self.partition_name(month)
+            exists = connection.execute(text("SELECT to_regclass(:name) IS NOT NULL;"),
+                                        {"name": f"{self.schema_name}.{name}"}).scalar()
+            if exists:
+                continue
+            connection.execute(text(f"""
+                CREATE TABLE IF NOT EXISTS {self.schema_name}.{name}
+                PARTITION OF {self.schema_name}.{self.table_name}
+                FOR VALUES FROM ({date_key(month)}) TO ({date_key(self.next_month(month))});
+            """))
+            if indexes:
+                index_manager = IndexManager(self.db_uri, engine=self.engine)
+                index_manager.create_relation_indexes(connection, name, index_manager.partition_indexes(self.table_name, name))
+            created.append(name)
+
+        if created:
+            print(f"Created partitions: {', '.join(created)}")
+        return created
+
+    def _months(self, source_table, date_expression, connection):
+        """Return the first days of the months of date_expression (a SQL date) over a table in the schema."""
+        return list(connection.execute(text(f"""
+            SELECT DISTINCT CAST(date_trunc('month', {date_expression}) AS DATE)
+            FROM {self.schema_name}.{source_table}
+            WHERE {date_expression} IS NOT NULL;
+        """)).scalars())
+
+    def ensure_partitions_for(self, source_table, date_expression, connection=None, indexes=True):
+        """Create the partitions for every month of date_expression (a SQL date) over a table in the schema."""
+        if connection is None:
+            with self.engine.begin() as connection:
+                return self.ensure_partitions_for(source_table, date_expression, connection, indexes)
+
+        return self.ensure_partitions(self._months(source_table, date_expression, connection), connection, indexes)
+
+    def partitions_for(self, source_table, date_expression):
+        """Create the partitions a load of source_table needs and return the names of all of them.
+
+        Returns None on an unpartitioned table.
+        """
+        with self.engine.begin() as connection:
+            if not self.is_partitioned(connection):
+                return None
+            months = self._months(source_table, date_expression, connection)
+            self.ensure_partitions(months, connection)
+        return [self.partition_name(month) for month in sorted(months)]
+
+if __name__ == "__main__":
+    db_uri = os.getenv('DATABASE_URL')
+    if db_uri:
+        # Create the partitions for whatever is currently staged
+        manager = PartitionManager(db_uri)
+        manager.ensure_partitions_for("stg_online_retail_cleaned", '"InvoiceDate"')
+    else:
+        print("DATABASE_URL is not set in the .env file")
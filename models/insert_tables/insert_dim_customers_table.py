@@ -1,29 +1,33 @@
 import os
-from sqlalchemy import create_engine, text
+from sqlalchemy import text
+from utils.engines import get_engine
 from dotenv import load_dotenv
+from models.insert_tables.insert_fact_sales_table import SQL_ROW_LOADED
 
 class InsertDimCustomers:
-    def __init__(self, db_uri):
+    def __init__(self, db_uri, engine=None):
         self.db_uri = db_uri
-        self.engine = create_engine(self.db_uri)
+        self.engine = engine or get_engine(self.db_uri)
         self.schema_name = 'dw_online_retail'
 
     def insert(self):
         try:
             query = text(f"""
                 INSERT INTO {self.schema_name}.dim_customers (CustomerID, Country)
-                SELECT DISTINCT
-                    "CustomerID" AS CustomerID,
-                    "Country" AS Country
-                FROM {self.schema_name}.stg_online_retail_cleaned
-                WHERE "CustomerID" IS NOT NULL
-                ON CONFLICT (CustomerID) DO NOTHING;
+                SELECT
+                    s."CustomerID" AS CustomerID,
+                    s."Country" AS Country
+                FROM {self.schema_name}.stg_online_retail_cleaned s
+                WHERE s."CustomerID" IS NOT NULL
+                AND NOT {SQL_ROW_LOADED.format(schema=self.schema_name)}
+                ON CONFLICT (CustomerID) DO NOTHING;  -- Repeated customers are skipped by a primary key probe
             """)
 
             with self.engine.connect() as connection:
                 result = connection.execute(query)
                 print(f"Inserted {result.rowcount} records into dim_customers.")
                 connection.execute(text("COMMIT;"))
+                return result.rowcount
 
         except Exception as e:
             print(f"Error inserting into dim_customers: {str(e)}")
@@ -1,14 +1,16 @@
-from sqlalchemy import create_engine, text
+from sqlalchemy import text
+from utils.engines import get_engine
 from dotenv import load_dotenv
+from models.insert_tables.insert_fact_sales_table import SQL_ROW_LOADED
 import os
 
 # Load environment variables
 load_dotenv()
 
 class InsertDimProducts:
-    def __init__(self, db_uri):
-        """Initialize with the database URI."""
-        self.engine = create_engine(db_uri)
+    def __init__(self, db_uri, engine=None):
+        """Initialize with the database URI, or an engine shared with other inserters."""
+        self.engine = engine or get_engine(db_uri)
         self.schema = "dw_online_retail"
 
     def insert(self):
@@ -20,12 +22,13 @@ class InsertDimProducts:
                     # SQL query for inserting data
                     query = text(f"""
                         INSERT INTO {self.schema}.dim_products (ProductID, ProductDescription, UnitPrice)
-                        SELECT DISTINCT
-                            "StockCode" AS ProductID,  -- Use StockCode as ProductID
-                            "Description" AS ProductDescription,
-                            "UnitPrice" AS UnitPrice
-                        FROM {self.schema}.stg_online_retail_cleaned
-                        WHERE "StockCode" IS NOT NULL  -- Ensure StockCode is not NULL
+                        SELECT
+                            s."StockCode" AS ProductID,  -- Use StockCode as ProductID
+                            s."Description" AS ProductDescription,
+                            s."UnitPrice" AS UnitPrice
+                        FROM {self.schema}.stg_online_retail_cleaned s
+                        WHERE s."StockCode" IS NOT NULL  -- Ensure StockCode is not NULL
+                        AND NOT {SQL_ROW_LOADED.format(schema=self.schema)}  -- Only rows new to fact_sales can add products
                         ON CONFLICT (ProductID) DO NOTHING;  -- Avoid duplicates based on ProductID
                     """)
 
@@ -33,6 +36,7 @@ class InsertDimProducts:
                     result = connection.execute(query)
                     print(f"Inserted {result.rowcount} records into dim_products.")
                     connection.execute(text("COMMIT;"))
+                    return result.rowcount
         except Exception as e:
             print(f"Error inserting into dim_products: {str(e)}")
             raise
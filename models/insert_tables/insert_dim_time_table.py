@@ -1,36 +1,34 @@
 import os
-from sqlalchemy import create_engine, text
+from sqlalchemy import text
+from utils.engines import get_engine
 from dotenv import load_dotenv
+from models.create_tables.create_dim_time_table import CALENDAR_QUERY
 
 # Load environment variables
 load_dotenv()
 
 class InsertDimTimeTable:
-    def __init__(self, db_uri):
+    def __init__(self, db_uri, engine=None):
         self.db_uri = db_uri
-        self.engine = create_engine(self.db_uri)
+        self.engine = engine or get_engine(self.db_uri)
         self.schema_name = 'dw_online_retail'
 
     def insert(self):
         try:
             with self.engine.connect() as connection:
-                insert_query = text(f"""
-                    INSERT INTO {self.schema_name}.dim_time (InvoiceDate, DayOfWeek, Month, Year, Quarter)
-                    SELECT DISTINCT
-                        CAST(TO_TIMESTAMP("InvoiceDate", 'DD/MM/YYYY HH12:MI:SS PM') AS DATE) AS InvoiceDate,  -- Corrected format
-                        TO_CHAR(TO_TIMESTAMP("InvoiceDate", 'DD/MM/YYYY HH12:MI:SS PM'), 'Day') AS DayOfWeek,
-                        TO_CHAR(TO_TIMESTAMP("InvoiceDate", 'DD/MM/YYYY HH12:MI:SS PM'), 'Month') AS Month,
-                        EXTRACT(YEAR FROM TO_TIMESTAMP("InvoiceDate", 'DD/MM/YYYY HH12:MI:SS PM')) AS Year,
-                        CONCAT('Q', EXTRACT(QUARTER FROM TO_TIMESTAMP("InvoiceDate", 'DD/MM/YYYY HH12:MI:SS PM'))) AS Quarter
-                    FROM {self.schema_name}.stg_online_retail_cleaned
-                    WHERE "InvoiceDate" IS NOT NULL
-                    ON CONFLICT (InvoiceDate) DO NOTHING;  -- Avoid inserting duplicate InvoiceDates
-                """)
+                # Extend the calendar to whole years around the staged dates
+                staging = f"{self.schema_name}.stg_online_retail_cleaned"
+                insert_query = text(CALENDAR_QUERY.format(
+                    schema=self.schema_name,
+                    start=f'(SELECT MIN("InvoiceDate") FROM {staging})',
+                    end=f'(SELECT MAX("InvoiceDate") FROM {staging})',
+                ))
 
                 # Execute the query
                 result = connection.execute(insert_query)
                 print(f"Inserted {result.rowcount} records into dim_time.")
                 connection.execute(text("COMMIT;"))
+                return result.rowcount
         except Exception as e:
             print(f"Error inserting into dim_time: {str(e)}")
 
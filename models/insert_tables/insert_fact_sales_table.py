@@ -1,47 +1,225 @@
 import os
-from sqlalchemy import create_engine, text
+import argparse
+from sqlalchemy import text
+from utils.engines import get_engine
 from dotenv import load_dotenv
+from models.create_tables.manage_partitions import PartitionManager
+from utils.date_keys import SQL_DATE_KEY
 
 # Load environment variables
 load_dotenv()
 
+# Filter on staging rows (aliased s) whose content hash is already in fact_sales. Only the other
+# rows can bring new dimension members, so the dimension loads skip these with an index probe.
+SQL_ROW_LOADED = f"""
+    EXISTS (
+        SELECT 1 FROM {{schema}}.fact_sales f
+        WHERE f.RowHash = s."RowHash" AND f.TimeID = {SQL_DATE_KEY.format(column='s."InvoiceDate"')}
+    )
+"""
+
+class StagingChangedError(RuntimeError):
+    """Raised when a load batch is resumed on a staging table that no longer holds the rows it was opened on."""
+
 class InsertFactSalesTable:
-    def __init__(self, db_uri):
+    def __init__(self, db_uri, engine=None, chunk_rows=None):
         self.db_uri = db_uri
-        self.engine = create_engine(self.db_uri)
+        self.engine = engine or get_engine(self.db_uri)
         self.schema_name = 'dw_online_retail'
+        self.staging_table = f"{self.schema_name}.stg_online_retail_cleaned"
+        self.chunk_rows = chunk_rows  # Commit every ~chunk_rows staged rows; None loads in one transaction
+
+    def _insert_query(self, chunk_filter=""):
+        """Return the INSERT ... SELECT of staged lines into fact_sales, optionally limited by chunk_filter."""
+        return text(f"""
+            INSERT INTO {self.schema_name}.fact_sales
+                (ProductID, CustomerID, TimeID, Quantity, UnitPrice, TotalAmount, InvoiceNo, InvoiceLine, RowHash, LoadBatchID)
+            SELECT
+                p.ProductID,
+                c.CustomerID,
+                {SQL_DATE_KEY.format(column='s."InvoiceDate"')},  -- TimeID is the date itself, no dim_time lookup needed
+                s."Quantity",  -- Correct case for Quantity
+                s."UnitPrice",  -- Correct case for UnitPrice
+                (s."Quantity" * s."UnitPrice") AS TotalAmount,  -- Correct case for Quantity and UnitPrice
+                s."InvoiceNo",
+                s."InvoiceLine",
+                s."RowHash",
+                :batch_id
+            FROM {self.staging_table} s
+            JOIN {self.schema_name}.dim_products p ON s."StockCode" = p.ProductID  -- Correct case for StockCode
+            JOIN {self.schema_name}.dim_customers c ON s."CustomerID" = c.CustomerID  -- Correct case for CustomerID
+            WHERE s."InvoiceNo" IS NOT NULL  -- Correct case for InvoiceNo
+            {chunk_filter}
+            ON CONFLICT DO NOTHING;  -- Rows loaded before are skipped via fact_sales_line_key or fact_sales_row_hash_key
+        """)
 
     def insert(self):
+        """Insert the staged lines that are not in fact_sales yet, tagged with a new load batch."""
+        if self.chunk_rows:
+            return self.insert_chunked()
         try:
             with self.engine.connect() as connection:
-                insert_query = text(f"""
-                    INSERT INTO {self.schema_name}.fact_sales (ProductID, CustomerID, TimeID, Quantity, UnitPrice, TotalAmount)
-                    SELECT DISTINCT
-                        p.ProductID,
-                        c.CustomerID,
-                        t.TimeID,
-                        s."Quantity",  -- Correct case for Quantity
-                        s."UnitPrice",  -- Correct case for UnitPrice
-                        (s."Quantity" * s."UnitPrice") AS TotalAmount  -- Correct case for Quantity and UnitPrice
-                    FROM {self.schema_name}.stg_online_retail_cleaned s
-                    JOIN {self.schema_name}.dim_products p ON s."StockCode" = p.ProductID  -- Correct case for StockCode
-                    JOIN {self.schema_name}.dim_customers c ON s."CustomerID" = c.CustomerID  -- Correct case for CustomerID
-                    JOIN {self.schema_name}.dim_time t ON CAST(TO_TIMESTAMP(s."InvoiceDate", 'DD/MM/YYYY HH12:MI:SS AM') AS DATE) = t.InvoiceDate  -- Use TO_TIMESTAMP to convert the InvoiceDate format
-                    WHERE s."InvoiceNo" IS NOT NULL  -- Correct case for InvoiceNo
-                    ON CONFLICT (SalesID) DO NOTHING;  -- Avoid inserting duplicate SalesID
-                """)
+                # Every month in staging needs its fact_sales partition before the insert
+                PartitionManager(self.db_uri, engine=self.engine).ensure_partitions_for(
+                    "stg_online_retail_cleaned", '"InvoiceDate"', connection
+                )
+
+                # Open a load batch so every inserted row can be traced back to this run
+                batch_id = connection.execute(text(f"""
+                    INSERT INTO {self.schema_name}.load_batches DEFAULT VALUES RETURNING LoadBatchID;
+                """)).scalar()
+
+                insert_query = self._insert_query()
 
                 # Execute the query
-                result = connection.execute(insert_query)
-                print(f"Inserted {result.rowcount} records into fact_sales.")
+                result = connection.execute(insert_query, {"batch_id": batch_id})
+                connection.execute(text(f"""
+                    UPDATE {self.schema_name}.load_batches
+                    SET FinishedAt = now(), RowsInserted = :rows
+                    WHERE LoadBatchID = :batch_id;
+                """), {"rows": result.rowcount, "batch_id": batch_id})
+                print(f"Inserted {result.rowcount} records into fact_sales (load batch {batch_id}).")
                 connection.execute(text("COMMIT;"))
+                return result.rowcount
+        except Exception as e:
+            print(f"Error inserting into fact_sales: {str(e)}")
+
+    def _chunk_pages(self, connection):
+        """Return the number of heap pages of the staging table holding about chunk_rows rows."""
+        pages, rows = connection.execute(text("""
+            SELECT pg_relation_size(CAST(:table AS regclass)) / current_setting('block_size')::bigint, reltuples
+            FROM pg_class WHERE oid = CAST(:table AS regclass);
+        """), {"table": self.staging_table}).one()
+        rows_per_page = rows / pages if pages and rows > 0 else 1
+        return max(1, int(self.chunk_rows / rows_per_page))
+
+    def _chunks(self, connection, chunk_pages):
+        """Split the staging table into ranges of chunk_pages heap pages."""
+        pages = connection.execute(text("""
+            SELECT pg_relation_size(CAST(:table AS regclass)) / current_setting('block_size')::bigint;
+        """), {"table": self.staging_table}).scalar()
+        return [(first, min(first + chunk_pages, pages)) for first in range(0, pages, chunk_pages)]
+
+    def _open_batch(self, connection, staging_oid, staged_rows):
+        """Return the unfinished load batch of this staging table with its chunk size, or open a new one for staged_rows rows.
+
+        A resumed batch must find the rows it was opened on: staging is UNLOGGED, so a server crash
+        empties it while keeping its OID, and finishing the batch would then drop the rest of the file.
+        It also keeps the chunk size it was opened with, since reltuples (after an ANALYZE) or
+        chunk_rows may have changed since, and other boundaries would not line up with its checkpoints.
+        """
+        batch = connection.execute(text(f"""
+            SELECT LoadBatchID, StagedRows, ChunkPages FROM {self.schema_name}.load_batches
+            WHERE FinishedAt IS NULL AND StagingOID = :staging_oid
+            ORDER BY LoadBatchID DESC LIMIT 1;
+        """), {"staging_oid": staging_oid}).one_or_none()
+        if batch is not None:
+            if batch.stagedrows is not None and batch.stagedrows != staged_rows:
+                raise StagingChangedError(
+                    f"Load batch {batch.loadbatchid} was opened on {batch.stagedrows} staged rows but "
+                    f"{self.staging_table} now holds {staged_rows}; the file must be staged again"
+                )
+            chunk_pages = batch.chunkpages
+            if chunk_pages is None:
+                # Batches opened before ChunkPages was recorded: their largest checkpoint is a full chunk
+                chunk_pages = connection.execute(text(f"""
+                    SELECT MAX(LastPage - FirstPage) FROM {self.schema_name}.fact_load_checkpoints
+                    WHERE LoadBatchID = :batch_id;
+                """), {"batch_id": batch.loadbatchid}).scalar() or self._chunk_pages(connection)
+            return batch.loadbatchid, chunk_pages, True
+        chunk_pages = self._chunk_pages(connection)
+        batch_id = connection.execute(text(f"""
+            INSERT INTO {self.schema_name}.load_batches (StagingOID, StagedRows, ChunkPages)
+            VALUES (:staging_oid, :staged_rows, :chunk_pages) RETURNING LoadBatchID;
+        """), {"staging_oid": staging_oid, "staged_rows": staged_rows, "chunk_pages": chunk_pages}).scalar()
+        return batch_id, chunk_pages, False
+
+    @staticmethod
+    def _uncommitted(first_page, last_page, done):
+        """Return the first page of [first_page, last_page) not covered by the committed ranges done (FirstPage -> LastPage)."""
+        while first_page < last_page and first_page in done:
+            first_page = done[first_page]
+        return first_page
+
+    def insert_chunked(self):
+        """Insert staging in page-range chunks, each committed with a checkpoint so an interrupted load resumes.
+
+        Staging is replaced as a whole by every ETL run, so its table OID identifies the data: a load
+        batch left unfinished on the same staging table picks up after its last committed chunk, as
+        long as staging still holds the row count the batch was opened on. Otherwise
+        StagingChangedError is raised and the batch stays unfinished. A resume reuses the batch's
+        chunk size and loads only the pages its checkpoints do not cover.
+
+        The ctid range predicate becomes a TID range scan on PostgreSQL 14 and later; older
+        servers scan the whole staging table for every chunk.
+        """
+        try:
+            with self.engine.begin() as connection:
+                PartitionManager(self.db_uri, engine=self.engine).ensure_partitions_for(
+                    "stg_online_retail_cleaned", '"InvoiceDate"', connection
+                )
+                staging_oid, staged_rows = connection.execute(text(f"""
+                    SELECT CAST(CAST(:table AS regclass) AS oid), COUNT(*) FROM {self.staging_table};
+                """), {"table": self.staging_table}).one()
+                batch_id, chunk_pages, resumed = self._open_batch(connection, staging_oid, staged_rows)
+                done = dict(connection.execute(text(f"""
+                    SELECT FirstPage, LastPage FROM {self.schema_name}.fact_load_checkpoints WHERE LoadBatchID = :batch_id;
+                """), {"batch_id": batch_id}).all())
+                chunks = self._chunks(connection, chunk_pages)
+
+            if resumed:
+                print(f"Resuming load batch {batch_id}: {len(done)}/{len(chunks)} chunks already committed.")
+
+            # A TID range scan (PostgreSQL 14+) reads only the chunk's pages
+            insert_query = self._insert_query(
+                'AND s.ctid >= CAST(:first_tid AS tid) AND s.ctid < CAST(:last_tid AS tid)'
+            )
+            inserted = 0
+            loaded = 0
+            for index, (first_page, last_page) in enumerate(chunks, start=1):
+                # Skip the pages committed before, even by chunks of other bounds
+                first_page = self._uncommitted(first_page, last_page, done)
+                if first_page >= last_page:
+                    continue
+                # The chunk and its checkpoint commit together, so a chunk is never applied twice
+                with self.engine.begin() as connection:
+                    result = connection.execute(insert_query, {
+                        "batch_id": batch_id,
+                        "first_tid": f"({first_page},0)",
+                        "last_tid": f"({last_page},0)",
+                    })
+                    connection.execute(text(f"""
+                        INSERT INTO {self.schema_name}.fact_load_checkpoints (LoadBatchID, FirstPage, LastPage, RowsInserted)
+                        VALUES (:batch_id, :first_page, :last_page, :rows);
+                    """), {"batch_id": batch_id, "first_page": first_page, "last_page": last_page, "rows": result.rowcount})
+                inserted += result.rowcount
+                loaded += 1
+                print(f"Chunk {index}/{len(chunks)}: inserted {result.rowcount} records into fact_sales.")
+
+            with self.engine.begin() as connection:
+                connection.execute(text(f"""
+                    UPDATE {self.schema_name}.load_batches
+                    SET FinishedAt = now(),
+                        RowsInserted = (SELECT COALESCE(SUM(RowsInserted), 0)
+                                        FROM {self.schema_name}.fact_load_checkpoints WHERE LoadBatchID = :batch_id)
+                    WHERE LoadBatchID = :batch_id;
+                """), {"batch_id": batch_id})
+            print(f"Inserted {inserted} records into fact_sales in {loaded} chunks (load batch {batch_id}).")
+            return inserted
+        except StagingChangedError:
+            raise
         except Exception as e:
             print(f"Error inserting into fact_sales: {str(e)}")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Insert the staged lines into fact_sales.")
+    parser.add_argument("--chunk-rows", type=int, default=None,
+                        help="Commit every ~N staged rows with a checkpoint, resuming an interrupted load.")
+    args = parser.parse_args()
+
     db_uri = os.getenv("DATABASE_URL")
     if not db_uri:
         print("DATABASE_URL is not set in the .env file")
     else:
-        inserter = InsertFactSalesTable(db_uri)
+        inserter = InsertFactSalesTable(db_uri, chunk_rows=args.chunk_rows)
         inserter.insert()
@@ -0,0 +1,107 @@
+import os
+from sqlalchemy import text
+from utils.engines import get_engine
+from dotenv import load_dotenv
+from utils.date_keys import SQL_DATE_KEY
+from utils.rollups import ROLLUP_TABLES
+
+# Load environment variables
+load_dotenv()
+
+class RefreshRollups:
+    """Recompute the dashboard rollups for the days a load touched.
+
+    Each touched day is deleted and re-aggregated from fact_sales in one transaction, so a
+    refresh is idempotent and readers see either the old or the new totals. The monthly
+    rollup is derived from the daily one rather than from the fact table.
+    """
+    def __init__(self, db_uri, engine=None):
+        self.db_uri = db_uri
+        self.engine = engine or get_engine(self.db_uri)
+        self.schema_name = 'dw_online_retail'
+
+    def rollups_exist(self, connection):
+        """Return True if every rollup table has been created."""
+        return all(
+            connection.execute(text("SELECT to_regclass(:table) IS NOT NULL;"),
+                               {"table": f"{self.schema_name}.{table}"}).scalar()
+            for table in ROLLUP_TABLES
+        )
+
+    def refresh(self, time_ids=None, connection=None):
+        """Re-aggregate the given YYYYMMDD TimeIDs (every day if None) and return the daily rows written."""
+        if connection is None:
+            with self.engine.begin() as connection:
+                return self.refresh(time_ids, connection)
+
+        if not self.rollups_exist(connection):
+            print("Rollup tables do not exist yet; skipping the refresh.")
+            return 0
+
+        if time_ids is None:
+            day_filter = fact_filter = month_filter = daily_month_filter = ""
+            params = {}
+        else:
+            time_ids = sorted({int(time_id) for time_id in time_ids})
+            if not time_ids:
+                return 0
+            day_filter = "WHERE TimeID = ANY(:time_ids)"
+            fact_filter = "WHERE f.TimeID = ANY(:time_ids)"  # TimeID is the partition key, so this prunes
+            month_filter = "WHERE MonthID = ANY(:month_ids)"
+            daily_month_filter = "WHERE r.TimeID / 100 = ANY(:month_ids)"
+            params = {"time_ids": time_ids, "month_ids": sorted({time_id // 100 for time_id in time_ids})}
+
+        # Concurrent refreshes of the same day would each keep their own inserts, so they take turns
+        connection.execute(text("SELECT pg_advisory_xact_lock(hashtext('dw_online_retail.rollups'));"))
+
+        connection.execute(text(f"DELETE FROM {self.schema_name}.agg_sales_daily_country {day_filter};"), params)
+        result = connection.execute(text(f"""
+            INSERT INTO {self.schema_name}.agg_sales_daily_country (TimeID, Country, TotalSales, TotalQuantity)
+            SELECT f.TimeID, c.Country, SUM(f.TotalAmount), SUM(f.Quantity)
+            FROM {self.schema_name}.fact_sales f
+            JOIN {self.schema_name}.dim_customers c ON f.CustomerID = c.CustomerID
+            {fact_filter}
+            GROUP BY f.TimeID, c.Country;
+        """), params)
+
+        connection.execute(text(f"DELETE FROM {self.schema_name}.agg_quantity_daily_product {day_filter};"), params)
+        connection.execute(text(f"""
+            INSERT INTO {self.schema_name}.agg_quantity_daily_product (TimeID, ProductID, TotalQuantity)
+            SELECT f.TimeID, f.ProductID, SUM(f.Quantity)
+            FROM {self.schema_name}.fact_sales f
+            {fact_filter}
+            GROUP BY f.TimeID, f.ProductID;
+        """), params)
+
+        # Whole months are rebuilt from the daily rollup, which is far smaller than the facts
+        connection.execute(text(f"DELETE FROM {self.schema_name}.agg_sales_monthly_weekday_country {month_filter};"), params)
+        connection.execute(text(f"""
+            INSERT INTO {self.schema_name}.agg_sales_monthly_weekday_country
+                (MonthID, Month, DayOfWeek, Country, TotalSales, TotalQuantity)
+            SELECT r.TimeID / 100, t.Month, t.DayOfWeek, r.Country, SUM(r.TotalSales), SUM(r.TotalQuantity)
+            FROM {self.schema_name}.agg_sales_daily_country r
+            JOIN {self.schema_name}.dim_time t ON r.TimeID = t.TimeID
+            {daily_month_filter}
+            GROUP BY r.TimeID / 100, t.Month, t.DayOfWeek, r.Country;
+        """), params)
+
+        print(f"Refreshed rollups for {len(time_ids) if time_ids is not None else 'all'} days.")
+        return result.rowcount
+
+    def refresh_for_staging(self):
+        """Refresh the days present in the staging table, i.e. the days the last fact load touched."""
+        with self.engine.begin() as connection:
+            time_ids = connection.execute(text(f"""
+                SELECT DISTINCT {SQL_DATE_KEY.format(column='"InvoiceDate"')}
+                FROM {self.schema_name}.stg_online_retail_cleaned
+                WHERE "InvoiceDate" IS NOT NULL;
+            """)).scalars().all()
+            return self.refresh(time_ids, connection)
+
+if __name__ == "__main__":
+    db_uri = os.getenv("DATABASE_URL")
+    if not db_uri:
+        print("DATABASE_URL is not set in the .env file")
+    else:
+        # Run by hand, the rollups are rebuilt for every day
+        RefreshRollups(db_uri).refresh()
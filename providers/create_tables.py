@@ -1,7 +1,15 @@
 import os
 import logging
-from sqlalchemy import create_engine, text
+from sqlalchemy import text
+from utils.engines import get_engine
 from dotenv import load_dotenv
+from models.create_tables.manage_indexes import IndexManager
+from models.create_tables.create_dim_products_table import CreateDimProductsTable
+from models.create_tables.create_dim_customers_table import CreateDimCustomersTable
+from models.create_tables.create_dim_time_table import CreateDimTimeTable
+from models.create_tables.create_fact_sales_table import CreateFactSalesTable
+from models.create_tables.create_rollup_tables import CreateRollupTables
+from utils.rollups import ROLLUP_TABLES
 
 # Set up logging
 logging.basicConfig(
@@ -30,7 +38,7 @@ class CreateTables:
     """Create tables in the specified schema."""
     def __init__(self, db_uri):
         self.db_uri = db_uri
-        self.engine = create_engine(self.db_uri)
+        self.engine = get_engine(self.db_uri)
         self.schema_name = 'dw_online_retail'
 
         # Initialize SchemaManager
@@ -43,94 +51,53 @@ class CreateTables:
         # Step 1: Ensure schema exists
         self.schema_manager.create_schema(self.schema_name)
 
-        # Step 2: Create tables
+        # Step 2: Create tables, with the same definitions as the standalone creators in models/create_tables
         self._create_dim_products_table()
         self._create_dim_customers_table()
         self._create_dim_time_table()
         self._create_fact_sales_table()
+        self._create_rollup_tables()
 
         # Step 3: Confirm table creation
         if not self._check_tables_created():
             raise Exception("One or more tables were not created successfully.")
         logging.info("All tables created successfully.")
 
+        # Step 4: Create the secondary indexes used by the dashboard queries
+        self._create_indexes()
+
     def _create_dim_products_table(self):
         """Create the dim_products table."""
-        self._execute_table_creation(
-            table_name="dim_products",
-            create_query=f"""
-                CREATE TABLE IF NOT EXISTS {self.schema_name}.dim_products (
-                    ProductID BIGINT PRIMARY KEY,
-                    ProductDescription TEXT,
-                    Category TEXT,
-                    UnitPrice DOUBLE PRECISION
-                );
-            """,
-        )
+        CreateDimProductsTable(self.engine).create_table()
 
     def _create_dim_customers_table(self):
         """Create the dim_customers table."""
-        self._execute_table_creation(
-            table_name="dim_customers",
-            create_query=f"""
-                CREATE TABLE IF NOT EXISTS {self.schema_name}.dim_customers (
-                    CustomerID BIGINT PRIMARY KEY,
-                    CustomerName TEXT,
-                    Country TEXT
-                );
-            """,
-        )
+        CreateDimCustomersTable(self.db_uri).create_table()
 
     def _create_dim_time_table(self):
-        """Create the dim_time table."""
-        self._execute_table_creation(
-            table_name="dim_time",
-            create_query=f"""
-                CREATE TABLE IF NOT EXISTS {self.schema_name}.dim_time (
-                    TimeID SERIAL PRIMARY KEY,
-                    InvoiceDate DATE,
-                    DayOfWeek TEXT,
-                    Month TEXT,
-                    Year BIGINT,
-                    Quarter TEXT
-                );
-            """,
-        )
+        """Create the dim_time table, keyed by YYYYMMDD TimeIDs."""
+        CreateDimTimeTable(self.db_uri).create_table()
 
     def _create_fact_sales_table(self):
-        """Create the fact_sales table."""
-        self._execute_table_creation(
-            table_name="fact_sales",
-            create_query=f"""
-                CREATE TABLE IF NOT EXISTS {self.schema_name}.fact_sales (
-                    SalesID BIGINT PRIMARY KEY,
-                    ProductID BIGINT,
-                    CustomerID BIGINT,
-                    TimeID BIGINT,
-                    Quantity BIGINT,
-                    TotalAmount DOUBLE PRECISION,
-                    FOREIGN KEY (ProductID) REFERENCES {self.schema_name}.dim_products(ProductID),
-                    FOREIGN KEY (CustomerID) REFERENCES {self.schema_name}.dim_customers(CustomerID),
-                    FOREIGN KEY (TimeID) REFERENCES {self.schema_name}.dim_time(TimeID)
-                );
-            """,
-        )
-
-    def _execute_table_creation(self, table_name, create_query):
-        """Helper to execute table creation."""
+        """Create the monthly partitioned fact_sales table with its line and row-hash keys, and its load bookkeeping tables."""
+        CreateFactSalesTable(self.db_uri).create_table()
+
+    def _create_rollup_tables(self):
+        """Create the dashboard rollups, so the charts read them instead of aggregating fact_sales."""
+        CreateRollupTables(self.db_uri).create_tables()
+
+    def _create_indexes(self):
+        """Create the secondary indexes on the fact foreign keys and the filtered dimension columns."""
         try:
-            with self.engine.connect() as connection:
-                connection.execute(text(create_query))
-                # Explicitly commit the transaction to ensure changes are saved
-                connection.execute(text("COMMIT;"))
-                logging.info(f"Table '{table_name}' created successfully.")
+            IndexManager(self.db_uri, engine=self.engine).create_indexes()
+            logging.info("Secondary indexes created successfully.")
         except Exception as e:
-            logging.error(f"Error creating table '{table_name}': {str(e)}")
+            logging.error(f"Error creating secondary indexes: {str(e)}")
             raise
 
     def _check_tables_created(self):
         """Check if all tables exist in the schema."""
-        table_names = ["dim_products", "dim_customers", "dim_time", "fact_sales"]
+        table_names = ["dim_products", "dim_customers", "dim_time", "fact_sales"] + ROLLUP_TABLES
         placeholders = ", ".join(f"'{table}'" for table in table_names)
         check_tables_query = text(f"""
             SELECT COUNT(*) AS table_count
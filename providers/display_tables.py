@@ -1,58 +1,163 @@
 import os
-from sqlalchemy import create_engine, text
+import argparse
+from sqlalchemy import text
+from utils.engines import get_engine
 from dotenv import load_dotenv
 
+# Tables whose dead tuples exceed this share of their rows are reported as bloated
+DEAD_TUPLE_RATIO = 0.2
+
+# Tables read by sequential scans averaging more rows than this, more often than by index, may lack an index
+SEQ_SCAN_ROWS = 10000
+
 class DisplayTablesAndColumns:
-    """Display tables and their columns in a specific schema."""
+    """Display tables and their columns in a specific schema, and report their storage and access statistics."""
     def __init__(self, db_uri):
-        self.engine = create_engine(db_uri)
+        self.engine = get_engine(db_uri)
 
     def show_tables_and_columns(self, schema_name):
         """Display all tables and their columns in the specified schema."""
+        # The whole catalog of the schema in one round trip
+        catalog_query = text("""
+            SELECT t.table_name, c.column_name, c.data_type
+            FROM information_schema.tables t
+            LEFT JOIN information_schema.columns c
+                ON c.table_schema = t.table_schema AND c.table_name = t.table_name
+            WHERE t.table_schema = :schema_name
+            ORDER BY t.table_name, c.ordinal_position;
+        """)
+
+        try:
+            with self.engine.connect() as connection:
+                rows = connection.execute(catalog_query, {"schema_name": schema_name}).fetchall()
+
+            if not rows:
+                print(f"No tables found in the schema '{schema_name}'.")
+                return
+
+            print(f"Tables and columns in the schema '{schema_name}':")
+            current_table = None
+            for table_name, column_name, data_type in rows:
+                if table_name != current_table:
+                    current_table = table_name
+                    print(f"\nTable: {table_name}")
+                if column_name is None:
+                    print("  No columns found.")
+                else:
+                    print(f"  - {column_name} ({data_type})")
+        except Exception as e:
+            print(f"Error displaying tables and columns: {str(e)}")
+            raise
+
+    def show_storage_report(self, schema_name):
+        """Display table and index sizes, row estimates, dead tuples, maintenance times and scan counts.
+
+        Tables with many dead tuples are flagged as bloated, tables mostly read by large sequential
+        scans as candidates for an index, and indexes that were never scanned as unused.
+        """
         tables_query = text("""
-            SELECT table_name
-            FROM information_schema.tables
-            WHERE table_schema = :schema_name
-            ORDER BY table_name;
+            SELECT
+                s.relname,
+                c.reltuples::bigint AS estimated_rows,
+                pg_total_relation_size(c.oid) AS total_bytes,
+                pg_relation_size(c.oid) AS table_bytes,
+                pg_indexes_size(c.oid) AS index_bytes,
+                s.n_live_tup,
+                s.n_dead_tup,
+                GREATEST(s.last_vacuum, s.last_autovacuum) AS last_vacuum,
+                GREATEST(s.last_analyze, s.last_autoanalyze) AS last_analyze,
+                s.seq_scan,
+                s.seq_tup_read,
+                COALESCE(s.idx_scan, 0) AS idx_scan
+            FROM pg_stat_user_tables s
+            JOIN pg_class c ON c.oid = s.relid
+            WHERE s.schemaname = :schema_name
+            ORDER BY pg_total_relation_size(c.oid) DESC;
         """)
 
-        columns_query = text("""
-            SELECT column_name, data_type
-            FROM information_schema.columns
-            WHERE table_schema = :schema_name AND table_name = :table_name
-            ORDER BY ordinal_position;
+        indexes_query = text("""
+            SELECT
+                s.relname,
+                s.indexrelname,
+                pg_relation_size(s.indexrelid) AS index_bytes,
+                s.idx_scan,
+                i.indisunique
+            FROM pg_stat_user_indexes s
+            JOIN pg_index i ON i.indexrelid = s.indexrelid
+            WHERE s.schemaname = :schema_name
+            ORDER BY pg_relation_size(s.indexrelid) DESC;
         """)
 
         try:
             with self.engine.connect() as connection:
-                # Fetch all tables in the schema
                 tables = connection.execute(tables_query, {"schema_name": schema_name}).fetchall()
-                
-                if tables:
-                    print(f"Tables and columns in the schema '{schema_name}':")
-                    for table in tables:
-                        table_name = table[0]
-                        print(f"\nTable: {table_name}")
-                        
-                        # Fetch columns for the current table
-                        columns = connection.execute(columns_query, {
-                            "schema_name": schema_name,
-                            "table_name": table_name
-                        }).fetchall()
-
-                        if columns:
-                            for column in columns:
-                                column_name, data_type = column
-                                print(f"  - {column_name} ({data_type})")
-                        else:
-                            print("  No columns found.")
-                else:
-                    print(f"No tables found in the schema '{schema_name}'.")
+                indexes = connection.execute(indexes_query, {"schema_name": schema_name}).fetchall()
+
+            if not tables:
+                print(f"No tables found in the schema '{schema_name}'.")
+                return
+
+            print(f"\nStorage report for the schema '{schema_name}':")
+            print(f"{'Table':<36} {'Total':>10} {'Table':>10} {'Indexes':>10} {'Est. rows':>12} {'Dead':>10} "
+                  f"{'Seq scans':>10} {'Idx scans':>10}  {'Last vacuum':<19}  {'Last analyze':<19}")
+            for table in tables:
+                print(f"{table.relname:<36} {self._size(table.total_bytes):>10} {self._size(table.table_bytes):>10} "
+                      f"{self._size(table.index_bytes):>10} {max(table.estimated_rows, 0):>12,} {table.n_dead_tup:>10,} "
+                      f"{table.seq_scan:>10,} {table.idx_scan:>10,}  {self._time(table.last_vacuum):<19}  "
+                      f"{self._time(table.last_analyze):<19}")
+
+            print(f"\n{'Index':<44} {'Table':<36} {'Size':>10} {'Scans':>10}")
+            for index in indexes:
+                print(f"{index.indexrelname:<44} {index.relname:<36} {self._size(index.index_bytes):>10} {index.idx_scan:>10,}")
+
+            findings = self._findings(tables, indexes)
+            print("\nFindings:")
+            for finding in findings or ["No bloat, missing-index or unused-index candidates found."]:
+                print(f"  - {finding}")
         except Exception as e:
-            print(f"Error displaying tables and columns: {str(e)}")
+            print(f"Error displaying the storage report: {str(e)}")
             raise
 
+    def _findings(self, tables, indexes):
+        """Return the bloat, missing-index and unused-index candidates of a storage report."""
+        findings = []
+        for table in tables:
+            rows = table.n_live_tup + table.n_dead_tup
+            if rows and table.n_dead_tup / rows > DEAD_TUPLE_RATIO:
+                findings.append(f"{table.relname}: {table.n_dead_tup / rows:.0%} dead tuples; consider VACUUM.")
+            # Staging tables are read whole by every load, so sequential scans are expected there
+            large_seq_scans = table.seq_scan and table.seq_tup_read / table.seq_scan > SEQ_SCAN_ROWS
+            if large_seq_scans and table.seq_scan > table.idx_scan and not table.relname.startswith("stg_"):
+                findings.append(f"{table.relname}: {table.seq_scan:,} sequential scans reading "
+                                f"{table.seq_tup_read // table.seq_scan:,} rows each on average; consider an index.")
+            if table.last_analyze is None and rows:
+                findings.append(f"{table.relname}: never analyzed; planner estimates may be off.")
+        for index in indexes:
+            # Unique indexes enforce keys, so they are needed even if never scanned
+            if index.idx_scan == 0 and not index.indisunique:
+                findings.append(f"{index.indexrelname} on {index.relname}: never scanned "
+                                f"({self._size(index.index_bytes)}); consider dropping it.")
+        return findings
+
+    @staticmethod
+    def _size(size_bytes):
+        """Format a size in bytes with a binary unit."""
+        for unit in ["B", "kB", "MB", "GB"]:
+            if size_bytes < 1024:
+                return f"{size_bytes:.0f} {unit}" if unit == "B" else f"{size_bytes:.1f} {unit}"
+            size_bytes /= 1024
+        return f"{size_bytes:.1f} TB"
+
+    @staticmethod
+    def _time(timestamp):
+        return timestamp.strftime("%Y-%m-%d %H:%M:%S") if timestamp else "never"
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Display the warehouse tables, their columns and a storage report.")
+    parser.add_argument("--schema", default="dw_online_retail", help="Schema to report on (default: dw_online_retail).")
+    parser.add_argument("--columns-only", action="store_true", help="Only list the tables and their columns.")
+    args = parser.parse_args()
+
     # Load environment variables
     load_dotenv()
     db_uri = os.getenv("DATABASE_URL")
@@ -62,6 +167,8 @@ if __name__ == "__main__":
     else:
         try:
             display = DisplayTablesAndColumns(db_uri)
-            display.show_tables_and_columns("dw_online_retail")
+            display.show_tables_and_columns(args.schema)
+            if not args.columns_only:
+                display.show_storage_report(args.schema)
         except Exception as e:
             print(f"Critical failure: {str(e)}")
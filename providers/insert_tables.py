@@ -1,8 +1,16 @@
 from models.insert_tables.insert_dim_customers_table import InsertDimCustomers
 from models.insert_tables.insert_dim_products_table import InsertDimProducts
-from models.insert_tables.insert_dim_time_table import InsertDimTime
-from models.insert_tables.insert_fact_sales_table import InsertFactSales
+from models.insert_tables.insert_dim_time_table import InsertDimTimeTable
+from models.insert_tables.insert_fact_sales_table import InsertFactSalesTable, StagingChangedError
+from models.insert_tables.refresh_rollups import RefreshRollups
+from models.create_tables.manage_indexes import IndexManager
+from models.create_tables.manage_partitions import PartitionManager
+from etl.metrics import RunReport
+from etl.manifest import IngestionManifest
+from concurrent.futures import ThreadPoolExecutor, wait
+from utils.engines import get_engine
 from dotenv import load_dotenv
+import argparse
 import os
 import sys
 
@@ -11,41 +19,109 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'm
 load_dotenv()
 
 class InsertTables:
-    def __init__(self):
+    def __init__(self, concurrent=False, concurrent_index_builds=False, chunk_rows=None,
+                 manifest_file=os.path.join("data", "ingestion_manifest.json")):
         self.db_uri = os.getenv("DATABASE_URL")
         if not self.db_uri:
             raise ValueError("DATABASE_URL is not set in the .env file")
+        self.concurrent = concurrent
+        self.concurrent_index_builds = concurrent_index_builds
+        self.chunk_rows = chunk_rows
+        # The ETL's ingestion manifest, so a file whose staged rows were lost is ingested again
+        self.manifest_file = manifest_file
+        self.report_dir = os.path.join("etl", "reports")
+        self.report = RunReport("insert_run")
+
+        # One pooled engine for every inserter; the registry's default pool fits the three concurrent dimension loads
+        self.engine = get_engine(self.db_uri)
+
+    def _timed_insert(self, stage, inserter):
+        """Run an inserter as a report stage, recording the rows it inserted."""
+        with self.report.stage(stage) as metrics:
+            inserted = inserter.insert()
+            metrics.rows_out += inserted or 0
+        return inserted
+
+    def _insert_dimensions(self):
+        """Load dim_customers, dim_products and dim_time, in parallel when concurrent is set."""
+        dimensions = {
+            "dim_customers": ("insert_dim_customers", InsertDimCustomers(self.db_uri, engine=self.engine)),
+            "dim_products": ("insert_dim_products", InsertDimProducts(self.db_uri, engine=self.engine)),
+            "dim_time": ("insert_dim_time", InsertDimTimeTable(self.db_uri, engine=self.engine)),
+        }
+
+        if not self.concurrent:
+            for table, (stage, inserter) in dimensions.items():
+                print(f"Starting insertion into {table}...")
+                self._timed_insert(stage, inserter)
+            return
+
+        # The dimensions are independent of each other, so only the fact load has to wait for them
+        print(f"Starting concurrent insertion into {', '.join(dimensions)}...")
+        with ThreadPoolExecutor(max_workers=len(dimensions)) as executor:
+            futures = [executor.submit(self._timed_insert, stage, inserter) for stage, inserter in dimensions.values()]
+            wait(futures)
+
+        # Let every load finish before re-raising the first failure
+        for future in futures:
+            future.result()
 
     def insert_all(self):
         try:
-            # Insert data into dim_customers
-            print("Starting insertion into dim_customers...")
-            dim_customers_inserter = InsertDimCustomers(self.db_uri)
-            dim_customers_inserter.insert()
-
-            # Insert data into dim_products
-            print("Starting insertion into dim_products...")
-            dim_products_inserter = InsertDimProducts(self.db_uri)
-            dim_products_inserter.insert()
-
-            # Insert data into dim_time
-            print("Starting insertion into dim_time...")
-            dim_time_inserter = InsertDimTime(self.db_uri)
-            dim_time_inserter.insert()
-
-            # Insert data into fact_sales
+            # Insert data into dim_customers, dim_products and dim_time
+            self._insert_dimensions()
+
+            # Insert data into fact_sales, without its secondary indexes if the batch is large
             print("Starting insertion into fact_sales...")
-            fact_sales_inserter = InsertFactSales(self.db_uri)
-            fact_sales_inserter.insert()
+            fact_sales_inserter = InsertFactSalesTable(self.db_uri, engine=self.engine, chunk_rows=self.chunk_rows)
+            index_manager = IndexManager(self.db_uri, engine=self.engine)
+            staged_rows = index_manager.estimate_rows("stg_online_retail_cleaned")
+            # On a partitioned fact_sales only the partitions of the staged months are weighed, dropped and rebuilt
+            partitions = PartitionManager(self.db_uri, engine=self.engine).partitions_for(
+                "stg_online_retail_cleaned", '"InvoiceDate"'
+            )
+            with index_manager.bulk_load(["fact_sales"], incoming_rows=staged_rows, partitions=partitions,
+                                         concurrently=self.concurrent_index_builds) as dropped:
+                if dropped:
+                    print(f"Dropped the fact_sales indexes for a bulk load of ~{staged_rows} rows"
+                          + (f" into {', '.join(partitions)}." if partitions else "."))
+                try:
+                    inserted = self._timed_insert("insert_fact_sales", fact_sales_inserter)
+                except StagingChangedError:
+                    # The unfinished batch cannot be completed from this staging table; re-stage its file
+                    forgotten = IngestionManifest(self.manifest_file).forget_staged("stg_online_retail_cleaned")
+                    print(f"Staging no longer matches the interrupted load; removed {', '.join(forgotten) or 'no files'} "
+                          f"from {self.manifest_file}. Re-run the ETL to stage them again, then insert.")
+                    raise
+            # The inserter reports its own error and returns None; the rollups must not be refreshed then
+            if inserted is None:
+                raise RuntimeError("Inserting into fact_sales failed")
+
+            # Re-aggregate the dashboard rollups for the staged days only
+            print("Refreshing rollups...")
+            with self.report.stage("refresh_rollups") as metrics:
+                metrics.rows_out += RefreshRollups(self.db_uri, engine=self.engine).refresh_for_staging()
 
             print("All tables successfully populated.")
         except Exception as e:
             print(f"An error occurred during the insertion process: {str(e)}")
             raise
+        finally:
+            print(f"Run report written to: {self.report.write(self.report_dir)}")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Populate the warehouse tables from the staging table.")
+    parser.add_argument("--concurrent", action="store_true",
+                        help="Load dim_customers, dim_products and dim_time in parallel before fact_sales.")
+    parser.add_argument("--concurrent-index-builds", action="store_true",
+                        help="Drop and rebuild indexes around bulk loads with CONCURRENTLY, so queries are not blocked.")
+    parser.add_argument("--chunk-rows", type=int, default=None,
+                        help="Insert fact_sales in chunks of ~N staged rows, each committed with a checkpoint so a failed load resumes.")
+    args = parser.parse_args()
+
     try:
-        inserter = InsertTables()
+        inserter = InsertTables(concurrent=args.concurrent, concurrent_index_builds=args.concurrent_index_builds,
+                                chunk_rows=args.chunk_rows)
         inserter.insert_all()
     except Exception as main_exception:
         print(f"Critical failure during batch processing: {str(main_exception)}")
@@ -0,0 +1,42 @@
+import sys
+import os
+
+# Dynamically add the project root directory to sys.path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, ".."))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from etl.manifest import IngestionManifest
+
+def test_manifest_skips_unchanged_files(tmp_path):
+    """
+    A recorded file is only reported as changed once its contents change.
+    """
+    raw_file = tmp_path / "online_retail.xlsx"
+    raw_file.write_bytes(b"first export")
+    manifest_file = tmp_path / "manifest.json"
+
+    manifest = IngestionManifest(str(manifest_file))
+    assert manifest.is_changed(str(raw_file))
+    manifest.record(str(raw_file))
+
+    # A fresh manifest reads the persisted entries
+    manifest = IngestionManifest(str(manifest_file))
+    assert not manifest.is_changed(str(raw_file))
+
+    # Touching the file without changing its contents is not a change
+    stat = raw_file.stat()
+    os.utime(raw_file, (stat.st_atime, stat.st_mtime + 60))
+    assert not manifest.is_changed(str(raw_file))
+
+    # Same size, different contents
+    raw_file.write_bytes(b"second expor")
+    os.utime(raw_file, (stat.st_atime, stat.st_mtime + 120))
+    assert manifest.is_changed(str(raw_file))
+
+if __name__ == "__main__":
+    import tempfile
+    import pathlib
+    with tempfile.TemporaryDirectory() as temp_dir:
+        test_manifest_skips_unchanged_files(pathlib.Path(temp_dir))
@@ -0,0 +1,49 @@
+import sys
+import os
+
+# Dynamically add the project root directory to sys.path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, ".."))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+import pandas as pd
+from etl.profiler import DataProfile
+
+def test_chunk_profiles_merge_into_the_file_profile(tmp_path):
+    """
+    Profiles of chunks, merged after a round trip through the sidecar, match the profile of the whole frame.
+    """
+    df = pd.DataFrame({
+        "InvoiceNo": [536365, "536366", "C536367", 536365, None, "536368"],
+        "StockCode": ["85123A", 71053, "85123A", "85123A", "22752", None],
+        "Quantity": [6, 8, -2, "six", 0, 32],
+        "InvoiceDate": ["2010-12-01 08:26", "2010-12-01 08:28", None, "not a date", "2010-12-02", "2010-12-03"],
+        "UnitPrice": [2.55, 3.39, 0.85, 7.65, 4.25, 1.69],
+        "Country": ["United Kingdom"] * 6,
+    })
+
+    whole = DataProfile()
+    whole.update(df)
+
+    first, second = DataProfile(), DataProfile()
+    first.update(df.iloc[:3])
+    second.update(df.iloc[3:])
+    second.write(str(tmp_path / "second.profile.json"))
+    first.merge(DataProfile.read(str(tmp_path / "second.profile.json")))
+
+    assert first.rows() == whole.rows()
+
+    columns = {row["column"]: row for row in whole.rows()}
+    assert columns["InvoiceNo"]["nulls"] == 1
+    assert columns["InvoiceNo"]["distinct"] == 4
+    assert columns["Quantity"]["invalid"] == 1
+    assert columns["Quantity"]["min"] == "-2.0"
+    assert columns["InvoiceDate"]["nulls"] == 1 and columns["InvoiceDate"]["invalid"] == 1
+    assert columns["StockCode"]["top"].startswith('[["85123A", 3]')
+
+if __name__ == "__main__":
+    import tempfile
+    import pathlib
+    with tempfile.TemporaryDirectory() as temp_dir:
+        test_chunk_profiles_merge_into_the_file_profile(pathlib.Path(temp_dir))
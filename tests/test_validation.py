@@ -0,0 +1,84 @@
+import sys
+import os
+
+# Dynamically add the project root directory to sys.path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, ".."))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+import pandas as pd
+import pyarrow.parquet as pq
+from etl.cleaned_layer import row_hashes
+from etl.validation import QuarantineWriter, validate
+
+def raw_frame(invoice_numbers, stock_codes):
+    rows = len(invoice_numbers)
+    return pd.DataFrame({
+        "InvoiceNo": invoice_numbers,
+        "StockCode": stock_codes,
+        "Description": ["WHITE HANGING HEART T-LIGHT HOLDER"] * rows,
+        "Quantity": [6] * rows,
+        "InvoiceDate": ["2010-12-01 08:26"] * rows,
+        "UnitPrice": [2.55] * rows,
+        "CustomerID": [17850] * rows,
+        "Country": ["United Kingdom"] * rows,
+    })
+
+def test_numeric_keys_read_as_floats_match_the_streamed_keys():
+    """
+    Keys of an all-numeric column read by pandas as float64 match the ints openpyxl streams.
+    """
+    from_pandas = raw_frame([536365.0, 536366.0, None], [85123.0, 71053.0, 22752.0])
+    from_openpyxl = raw_frame([536365, 536366, None], [85123, 71053, 22752])
+
+    valid_pandas, _, _ = validate(from_pandas)
+    valid_openpyxl, _, _ = validate(from_openpyxl)
+
+    assert valid_pandas["InvoiceNo"].tolist() == ["536365", "536366"]
+    assert valid_pandas["StockCode"].tolist() == ["85123", "71053"]
+    assert row_hashes(valid_pandas).tolist() == row_hashes(valid_openpyxl).tolist()
+
+def test_rejected_rows_are_quarantined_with_every_reason(tmp_path):
+    """
+    Each rule rejects its rows, a row failing several rules lists every code, and the
+    quarantine file keeps the raw values as text.
+    """
+    df = raw_frame(["536365", "536366", "536367", " ", "536369"], ["85123A", "71053", "84406B", "22752", "21730"])
+    df["Quantity"] = [6, "six", 6, 6, 6]
+    df["UnitPrice"] = [2.55, 2.55, 0, 2.55, 2.55]
+    df["CustomerID"] = [17850, 17850, None, 17850, 17850]
+    df["InvoiceDate"] = ["2010-12-01 08:26"] * 4 + ["not a date"]
+
+    valid, rejected, counts = validate(df)
+
+    assert valid["InvoiceNo"].tolist() == ["536365"]
+    assert valid["Quantity"].dtype == "int64" and valid["CustomerID"].dtype == "int64"
+    assert counts["invalid_quantity"] == 1
+    assert counts["missing_invoice_no"] == 1
+    assert counts["invalid_invoice_date"] == 1
+    assert rejected.set_index("StockCode")["RejectReasons"].to_dict() == {
+        "71053": "invalid_quantity",
+        "84406B": "missing_customer_id;non_positive_unit_price",
+        "22752": "missing_invoice_no",
+        "21730": "invalid_invoice_date",
+    }
+
+    quarantine_file = str(tmp_path / "online_retail_quarantine.parquet")
+    with QuarantineWriter(quarantine_file) as quarantine:
+        quarantine.write(rejected)
+        quarantine.write(rejected.iloc[:0])
+    assert quarantine.rows == 4
+
+    quarantined = pq.read_table(quarantine_file).to_pandas()
+    assert quarantined["Quantity"].tolist() == ["six", "6", "6", "6"]
+    assert quarantined["CustomerID"].isna().tolist() == [False, True, False, False]
+    assert quarantined["CustomerID"].dropna().tolist() == ["17850"] * 3
+    assert quarantined["InvoiceLine"].isna().all()
+
+if __name__ == "__main__":
+    import tempfile
+    import pathlib
+    test_numeric_keys_read_as_floats_match_the_streamed_keys()
+    with tempfile.TemporaryDirectory() as temp_dir:
+        test_rejected_rows_are_quarantined_with_every_reason(pathlib.Path(temp_dir))
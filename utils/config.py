@@ -1,11 +1,54 @@
 import os
+import threading
 from psycopg2.extras import RealDictCursor
+from psycopg2.pool import PoolError, ThreadedConnectionPool
 from dotenv import load_dotenv
-import psycopg2
 
 # Load environment variables from .env file
 load_dotenv()
 
+# Physical connections per process, shared by every Database_Connection with the same credentials
+POOL_MAX_CONNECTIONS = int(os.getenv('DB_POOL_MAX', '20'))
+POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', '30'))  # Seconds to wait for a free connection
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+class _BlockingPool:
+    """ThreadedConnectionPool that waits for a free connection instead of failing when all are checked out."""
+    def __init__(self, maxconn, **connect_kwargs):
+        self.pool = ThreadedConnectionPool(0, maxconn, **connect_kwargs)
+        self.available = threading.BoundedSemaphore(maxconn)
+
+    def getconn(self):
+        if not self.available.acquire(timeout=POOL_TIMEOUT):
+            raise PoolError(f"No database connection became free within {POOL_TIMEOUT:.0f}s")
+        try:
+            connection = self.pool.getconn()
+            if connection.closed:
+                # Dropped by the server since it was returned; replace it
+                self.pool.putconn(connection, close=True)
+                connection = self.pool.getconn()
+            return connection
+        except Exception:
+            self.available.release()
+            raise
+
+    def putconn(self, connection):
+        # The pool rolls back a connection returned mid-transaction and discards a broken one
+        try:
+            self.pool.putconn(connection, close=bool(connection.closed))
+        finally:
+            self.available.release()
+
+def _get_pool(**connect_kwargs):
+    """Return the process-wide pool for a set of connection parameters, creating it on first use."""
+    key = tuple(sorted(connect_kwargs.items()))
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = _BlockingPool(POOL_MAX_CONNECTIONS, **connect_kwargs)
+        return _pools[key]
+
 class Database_Connection:
     def __init__(self):
         """
@@ -22,31 +65,30 @@ class Database_Connection:
         if not all([self.dbname, self.user, self.password]):
             raise ValueError("Missing database credentials in environment variables.")
 
+    def _pool(self):
+        """Return the pool shared by every Database_Connection with these credentials."""
+        return _get_pool(
+            dbname=self.dbname,
+            user=self.user,
+            password=self.password,
+            host=self.host,
+            port=self.port,
+            options="-c search_path=dw_online_retail,public",
+        )
+
     def connect(self):
         """
-        Establish a connection to the PostgreSQL database and create a cursor.
-        This method also sets the schema search path to dw_online_retail.
+        Check out a connection from the process-wide pool and create a cursor.
+        Pooled connections are opened with the schema search path set to dw_online_retail, public,
+        so a checkout makes no round trips of its own.
         """
+        if self.connection is not None:
+            return
         try:
-            # Establish the connection
-            self.connection = psycopg2.connect(
-                dbname=self.dbname,
-                user=self.user,
-                password=self.password,
-                host=self.host,
-                port=self.port
-            )
+            self.connection = self._pool().getconn()
             # Create a cursor for executing SQL queries
             self.cursor = self.connection.cursor(cursor_factory=RealDictCursor)
 
-            # Set the schema search path to dw_online_retail, public
-            self.cursor.execute("SET search_path TO dw_online_retail, public;")
-            
-            # Verify that the search_path is set correctly
-            self.cursor.execute("SHOW search_path;")
-            search_path = self.cursor.fetchone()
-            print(f"Current search_path: {search_path['search_path']}")  # Should show dw_online_retail, public
-
             print("Database connection successful.")
         except Exception as e:
             print(f"Error connecting to the database: {e}")
@@ -54,13 +96,25 @@ class Database_Connection:
 
     def close(self):
         """
-        Close the database cursor and connection.
+        Close the database cursor and return the connection to the pool.
         """
         if self.cursor:
             self.cursor.close()
+            self.cursor = None
         if self.connection:
-            self.connection.close()
-        print("Database connection closed.")
+            self._pool().putconn(self.connection)
+            self.connection = None
+            print("Database connection closed.")
+
+    def __enter__(self):
+        """
+        Check out a connection for the duration of a with block, so it is returned even if the block raises.
+        """
+        self.connect()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
 
     def execute_query(self, query, params=None):
         """
@@ -86,6 +140,21 @@ class Database_Connection:
             print(f"Error executing update query: {e}")
             self.connection.rollback()
 
+    def copy_expert(self, query, file):
+        """
+        Stream a file-like object through a COPY ... FROM STDIN query and return the number of rows copied.
+        """
+        try:
+            with self.connection.cursor() as cursor:
+                cursor.copy_expert(query, file)
+                row_count = cursor.rowcount
+            self.connection.commit()
+            return row_count
+        except Exception as e:
+            print(f"Error executing COPY: {e}")
+            self.connection.rollback()
+            raise
+
     def get_database_uri(self):
         """Returns the PostgreSQL URI for connection."""
         return f"postgresql://{self.user}:{self.password}@{self.host}:{self.port}/{self.dbname}"
@@ -0,0 +1,17 @@
+# dim_time is keyed by the day itself as a YYYYMMDD integer, so TimeIDs sort like dates and a
+# date range maps to a TimeID range without a lookup.
+
+def date_key(day):
+    """Return the YYYYMMDD TimeID of a date or datetime."""
+    return day.year * 10000 + day.month * 100 + day.day
+
+def date_keys(dates):
+    """Return the YYYYMMDD TimeIDs of a datetime Series."""
+    return dates.dt.year * 10000 + dates.dt.month * 100 + dates.dt.day
+
+# SQL expression for the TimeID of a DATE or TIMESTAMP column, computed arithmetically
+# rather than by formatting and re-parsing a string for every row
+SQL_DATE_KEY = (
+    "CAST(EXTRACT(YEAR FROM {column}) * 10000 + EXTRACT(MONTH FROM {column}) * 100"
+    " + EXTRACT(DAY FROM {column}) AS INTEGER)"
+)
@@ -0,0 +1,38 @@
+import os
+import threading
+from sqlalchemy import create_engine
+from dotenv import load_dotenv
+
+# Load environment variables from .env file
+load_dotenv()
+
+# Engine defaults, overridable through the environment
+POOL_SIZE = int(os.getenv('DB_ENGINE_POOL_SIZE', '5'))
+MAX_OVERFLOW = int(os.getenv('DB_ENGINE_MAX_OVERFLOW', '5'))
+STATEMENT_TIMEOUT_MS = int(os.getenv('DB_STATEMENT_TIMEOUT_MS', '0'))  # 0 disables the timeout
+
+_engines = {}
+_engines_lock = threading.Lock()
+
+def get_engine(db_uri, pool_size=None, max_overflow=None, statement_timeout_ms=None, pool_pre_ping=True):
+    """Return the process-wide SQLAlchemy engine for db_uri, creating it on first use.
+
+    Every caller with the same URI shares one connection pool. The options only take effect
+    for the call that creates the engine; later calls get the existing engine as it is.
+    pool_pre_ping checks each connection on checkout, so connections the server dropped
+    are replaced instead of failing the first query.
+    """
+    with _engines_lock:
+        engine = _engines.get(db_uri)
+        if engine is None:
+            timeout = STATEMENT_TIMEOUT_MS if statement_timeout_ms is None else statement_timeout_ms
+            connect_args = {"options": f"-c statement_timeout={timeout}"} if timeout else {}
+            engine = create_engine(
+                db_uri,
+                pool_size=POOL_SIZE if pool_size is None else pool_size,
+                max_overflow=MAX_OVERFLOW if max_overflow is None else max_overflow,
+                pool_pre_ping=pool_pre_ping,
+                connect_args=connect_args,
+            )
+            _engines[db_uri] = engine
+        return engine
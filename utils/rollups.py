@@ -0,0 +1,19 @@
+# Aggregate tables kept in step with fact_sales by RefreshRollups, finest grain first
+ROLLUP_TABLES = [
+    "agg_sales_daily_country",  # TimeID x Country: sales and quantity
+    "agg_quantity_daily_product",  # TimeID x ProductID: quantity
+    "agg_sales_monthly_weekday_country",  # MonthID x DayOfWeek x Country: sales and quantity
+]
+
+# Rollups found so far; once created they are never dropped, so only hits are remembered
+_available = set()
+
+def rollup_available(db, table):
+    """Return True if a rollup table exists, so charts can read it instead of fact_sales."""
+    if table in _available:
+        return True
+    result = db.execute_query("SELECT to_regclass(%s) IS NOT NULL AS available;", [f"dw_online_retail.{table}"])
+    if result and result[0]["available"]:
+        _available.add(table)
+        return True
+    return False